@@ -1,7 +1,18 @@
 from django.contrib import admin
-from .models import Campo, Exercicio, TrainingExercicio, Avaliacao
+from .models import Campo, Exercicio, TrainingExercicio, Avaliacao, ModeloPrograma, ItemModeloPrograma
 
 admin.site.register(Campo)
 admin.site.register(Exercicio)
 admin.site.register(TrainingExercicio)
-admin.site.register(Avaliacao)
\ No newline at end of file
+admin.site.register(Avaliacao)
+
+
+class ItemModeloProgramaInline(admin.TabularInline):
+    model = ItemModeloPrograma
+    extra = 1
+
+
+@admin.register(ModeloPrograma)
+class ModeloProgramaAdmin(admin.ModelAdmin):
+    inlines = [ItemModeloProgramaInline]
+    list_display = ('nome', 'criado_por', 'criado_em')
@@ -1,6 +1,10 @@
+import re
+
 from django import forms
 from django.core.exceptions import ValidationError
-from .models import TrainingExercicio, Exercicio
+from django.db.models import Q
+from usuarios.models import Perfil
+from .models import TrainingExercicio, Exercicio, ModeloPrograma, ItemModeloPrograma
 
 class TrainingExercicioForm(forms.ModelForm):
     """
@@ -93,4 +97,86 @@ class ExercicioForm(forms.ModelForm):
             nome = nome.strip()
             if len(nome) < 2:
                 raise ValidationError('O nome do exercício deve ter pelo menos 2 caracteres.')
-        return nome
\ No newline at end of file
+        return nome
+
+
+class ModeloProgramaForm(forms.ModelForm):
+    """Formulário dos dados gerais de um modelo de programa."""
+    class Meta:
+        model = ModeloPrograma
+        fields = ['nome', 'descricao']
+        widgets = {
+            'nome': forms.TextInput(attrs={'class': 'form-control', 'placeholder': 'Ex.: Hipertrofia iniciante'}),
+            'descricao': forms.Textarea(attrs={'class': 'form-control', 'rows': 2}),
+        }
+
+    def clean_nome(self):
+        """Valida que o nome do modelo não esteja vazio."""
+        nome = self.cleaned_data.get('nome', '').strip()
+        if len(nome) < 3:
+            raise ValidationError('O nome do programa deve ter pelo menos 3 caracteres.')
+        return nome
+
+
+class ItemModeloProgramaForm(TrainingExercicioForm):
+    """
+    Exercício de um modelo de programa. Herda os widgets e as validações de
+    séries, repetições, carga e tempo do TrainingExercicioForm.
+    """
+    class Meta(TrainingExercicioForm.Meta):
+        model = ItemModeloPrograma
+        fields = ['exercicio', 'grupo', 'series', 'repeticoes', 'carga', 'tempo', 'video_url']
+
+
+ItensModeloFormSet = forms.inlineformset_factory(
+    ModeloPrograma,
+    ItemModeloPrograma,
+    form=ItemModeloProgramaForm,
+    extra=8,
+    can_delete=True,
+    min_num=1,
+    validate_min=True,
+)
+
+
+class AplicarModeloForm(forms.Form):
+    """
+    Aplicação de um modelo de programa a vários membros, identificados por
+    matrícula ou nome de usuário.
+    """
+    nome_programa = forms.CharField(
+        max_length=100,
+        required=False,
+        label='Nome do Programa',
+        widget=forms.TextInput(attrs={'class': 'form-control'}),
+        help_text='Deixe em branco para usar o nome do modelo.',
+    )
+    membros = forms.CharField(
+        label='Membros',
+        widget=forms.Textarea(attrs={'class': 'form-control', 'rows': 8, 'placeholder': '20261110001\n20261110002\nmaria.silva'}),
+        help_text='Matrículas ou nomes de usuário, um por linha (ou separados por vírgula ou espaço).',
+    )
+
+    def clean_membros(self):
+        """
+        Converte a lista em ids de usuário com uma única consulta e rejeita
+        identificadores que não correspondem a nenhum membro.
+        """
+        identificadores = set(re.split(r'[\s,;]+', self.cleaned_data['membros'].strip())) - {''}
+        if not identificadores:
+            raise ValidationError('Informe ao menos um membro.')
+        encontrados = Perfil.objects.filter(
+            Q(matricula__in=identificadores) | Q(usuario__username__in=identificadores)
+        ).values_list('usuario_id', 'matricula', 'usuario__username')
+        usuarios_ids = set()
+        reconhecidos = set()
+        for usuario_id, matricula, username in encontrados:
+            usuarios_ids.add(usuario_id)
+            reconhecidos.update((matricula, username))
+        desconhecidos = sorted(identificadores - reconhecidos)
+        if desconhecidos:
+            exibidos = ', '.join(desconhecidos[:10])
+            if len(desconhecidos) > 10:
+                exibidos += f' e mais {len(desconhecidos) - 10}'
+            raise ValidationError(f'Membros não encontrados: {exibidos}.')
+        return usuarios_ids
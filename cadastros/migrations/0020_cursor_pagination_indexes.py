@@ -0,0 +1,19 @@
+# Generated by Django 5.2.7 on 2026-10-17 21:16
+
+from django.conf import settings
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('cadastros', '0019_trainingexercicio_video_url'),
+        migrations.swappable_dependency(settings.AUTH_USER_MODEL),
+    ]
+
+    operations = [
+        migrations.AddIndex(
+            model_name='avaliacao',
+            index=models.Index(fields=['-data', '-hora', '-id'], name='avaliacao_data_hora_idx'),
+        ),
+    ]
@@ -0,0 +1,86 @@
+# Generated by Django 5.2.7 on 2026-10-17 21:25
+
+import unicodedata
+from operator import attrgetter
+
+from django.core.exceptions import ObjectDoesNotExist
+from django.db import migrations, models
+
+
+# Cópias congeladas de paginas.busca (normalizar, montar_texto_busca e
+# preencher_texto_busca) como eram quando esta migração foi criada: a
+# migração não deve mudar de comportamento se o código da aplicação mudar.
+
+def normalizar(texto):
+    if not texto:
+        return ''
+    decomposto = unicodedata.normalize('NFKD', str(texto))
+    sem_acentos = ''.join(c for c in decomposto if not unicodedata.combining(c))
+    return ' '.join(sem_acentos.casefold().split())
+
+
+def montar_texto_busca(obj, campos):
+    partes = []
+    for campo in campos:
+        try:
+            valor = attrgetter(campo)(obj)
+        except (AttributeError, ObjectDoesNotExist):
+            valor = None
+        partes.append(normalizar(valor))
+    return ' '.join(parte for parte in partes if parte)
+
+
+def preencher_texto_busca(model, campos, batch_size=500):
+    relacionados = sorted({campo.split('.')[0] for campo in campos if '.' in campo})
+    alterados = []
+    for obj in model.objects.select_related(*relacionados).order_by('pk').iterator(chunk_size=batch_size):
+        texto = montar_texto_busca(obj, campos)
+        if texto != obj.texto_busca:
+            obj.texto_busca = texto
+            alterados.append(obj)
+        if len(alterados) >= batch_size:
+            model.objects.bulk_update(alterados, ['texto_busca'])
+            alterados = []
+    if alterados:
+        model.objects.bulk_update(alterados, ['texto_busca'])
+
+
+def remover_indice_busca(model, schema_editor):
+    """Ao desfazer: no SQLite, remove a tabela FTS5 e os triggers que leem texto_busca."""
+    if schema_editor.connection.vendor != 'sqlite':
+        return
+    fts = f'{model._meta.db_table}_busca'
+    for sufixo in ('ai', 'ad', 'au'):
+        schema_editor.execute(f'DROP TRIGGER IF EXISTS "{fts}_{sufixo}"')
+    schema_editor.execute(f'DROP TABLE IF EXISTS "{fts}"')
+
+
+def preencher(apps, schema_editor):
+    preencher_texto_busca(apps.get_model('cadastros', 'TrainingExercicio'), ('nome_programa', 'grupo'))
+    preencher_texto_busca(apps.get_model('cadastros', 'Avaliacao'), ('nome_completo',))
+
+
+def desfazer(apps, schema_editor):
+    remover_indice_busca(apps.get_model('cadastros', 'TrainingExercicio'), schema_editor)
+    remover_indice_busca(apps.get_model('cadastros', 'Avaliacao'), schema_editor)
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('cadastros', '0020_cursor_pagination_indexes'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='avaliacao',
+            name='texto_busca',
+            field=models.TextField(blank=True, default='', editable=False),
+        ),
+        migrations.AddField(
+            model_name='trainingexercicio',
+            name='texto_busca',
+            field=models.TextField(blank=True, default='', editable=False),
+        ),
+        migrations.RunPython(preencher, desfazer),
+    ]
@@ -0,0 +1,51 @@
+# Generated by Django 5.2.7 on 2026-10-17 21:50
+
+import django.db.models.deletion
+from django.conf import settings
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('cadastros', '0021_texto_busca'),
+        migrations.swappable_dependency(settings.AUTH_USER_MODEL),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='ModeloPrograma',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('nome', models.CharField(max_length=100, verbose_name='Nome do Programa')),
+                ('descricao', models.TextField(blank=True, verbose_name='Descrição')),
+                ('criado_em', models.DateTimeField(auto_now_add=True)),
+                ('criado_por', models.ForeignKey(blank=True, editable=False, null=True, on_delete=django.db.models.deletion.SET_NULL, related_name='modelos_programa', to=settings.AUTH_USER_MODEL)),
+            ],
+            options={
+                'verbose_name': 'Modelo de Programa',
+                'verbose_name_plural': 'Modelos de Programa',
+                'ordering': ['nome'],
+            },
+        ),
+        migrations.CreateModel(
+            name='ItemModeloPrograma',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('ordem', models.PositiveIntegerField(default=0)),
+                ('grupo', models.CharField(default='Desconhecido', max_length=50)),
+                ('series', models.PositiveIntegerField(default=10)),
+                ('repeticoes', models.PositiveIntegerField(default=10)),
+                ('carga', models.IntegerField(default=0, verbose_name='Carga (kg)')),
+                ('tempo', models.IntegerField(default=0, verbose_name='Minutos (mn)')),
+                ('video_url', models.URLField(blank=True, max_length=500, null=True, verbose_name='URL do Vídeo')),
+                ('exercicio', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='itens_modelo', to='cadastros.exercicio')),
+                ('modelo', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='itens', to='cadastros.modeloprograma')),
+            ],
+            options={
+                'verbose_name': 'Item de Modelo de Programa',
+                'verbose_name_plural': 'Itens de Modelo de Programa',
+                'ordering': ['ordem', 'id'],
+            },
+        ),
+    ]
@@ -1,16 +1,42 @@
-from django.db import models
+import time
+from django.db import models, transaction
 from datetime import timedelta
+from django.conf import settings
 from django.core.validators import MaxValueValidator, MinValueValidator
 from django.contrib.auth.models import User
 
+from paginas.busca import IndexadoParaBusca, montar_texto_busca
+
+
+# Cache do exercício padrão por processo: {'id': pk ou None, 'expira_em': timestamp}.
+# Limpo pelos sinais de Exercicio; a expiração cobre alterações feitas em outros processos.
+_exercicio_padrao = {}
+CACHE_EXERCICIO_PADRAO_SEGUNDOS = 300
 
 
 def get_default_exercicio():
     """
-    Retorna o primeiro exercício disponível como padrão.
+    Retorna o id do primeiro exercício disponível como padrão.
     Usado como valor padrão para o campo exercicio em TrainingExercicio.
+
+    Se ``EXERCICIO_PADRAO_ID`` estiver definido nas configurações, ele é usado
+    diretamente. Caso contrário o id é consultado uma vez e mantido em cache
+    no processo, evitando uma consulta a cada TrainingExercicio instanciado.
     """
-    return Exercicio.objects.first()
+    configurado = getattr(settings, 'EXERCICIO_PADRAO_ID', None)
+    if configurado:
+        return configurado
+
+    agora = time.monotonic()
+    if _exercicio_padrao.get('expira_em', 0) <= agora:
+        _exercicio_padrao['id'] = Exercicio.objects.order_by('nome', 'pk').values_list('pk', flat=True).first()
+        _exercicio_padrao['expira_em'] = agora + CACHE_EXERCICIO_PADRAO_SEGUNDOS
+    return _exercicio_padrao['id']
+
+
+def limpar_cache_exercicio_padrao():
+    """Descarta o exercício padrão em cache, forçando nova consulta no próximo uso."""
+    _exercicio_padrao.clear()
 
 class Campo(models.Model):
     """
@@ -50,7 +76,7 @@ class Exercicio(models.Model):
     def __str__(self):
         return self.nome
 
-class TrainingExercicio(models.Model):
+class TrainingExercicio(IndexadoParaBusca):
     """
     Modelo para representar programas de treinamento com exercícios específicos.
     Relaciona um exercício a um programa de treino com séries, repetições, carga e tempo.
@@ -71,6 +97,9 @@ class TrainingExercicio(models.Model):
     video_url = models.URLField(max_length=500, blank=True, null=True, verbose_name="URL do Vídeo")
     usuario = models.ForeignKey(User, on_delete=models.CASCADE, default=1)
 
+    # Campos pesquisáveis na lista de programas (ver paginas.busca)
+    campos_busca = ('nome_programa', 'grupo')
+
     class Meta:
         verbose_name = "Programa de Treinamento"
         verbose_name_plural = "Programas de Treinamento"
@@ -78,9 +107,94 @@ class TrainingExercicio(models.Model):
 
     def __str__(self):
         return f'{self.nome_programa} - {self.grupo}'
+
+
+class ModeloPrograma(models.Model):
+    """
+    Modelo reutilizável de programa de treinamento: uma lista ordenada de
+    exercícios (ItemModeloPrograma) que o staff aplica de uma só vez a
+    vários membros, criando os TrainingExercicio de cada um.
+    """
+    nome = models.CharField(max_length=100, verbose_name="Nome do Programa")
+    descricao = models.TextField(blank=True, verbose_name="Descrição")
+    criado_por = models.ForeignKey(
+        User, on_delete=models.SET_NULL, null=True, blank=True, editable=False, related_name='modelos_programa'
+    )
+    criado_em = models.DateTimeField(auto_now_add=True)
+
+    class Meta:
+        verbose_name = "Modelo de Programa"
+        verbose_name_plural = "Modelos de Programa"
+        ordering = ['nome']
+
+    def __str__(self):
+        return self.nome
+
+    def aplicar(self, usuarios_ids, nome_programa=None):
+        """
+        Cria os exercícios do modelo para cada usuário em ``usuarios_ids``, em
+        uma transação e com um único ``bulk_create``. Usuários que já têm um
+        programa com o mesmo nome são ignorados, de modo que reaplicar o modelo
+        não duplica os exercícios. Retorna (membros atendidos, membros ignorados).
+        """
+        nome_programa = nome_programa or self.nome
+        itens = list(self.itens.all())
+        usuarios_ids = set(usuarios_ids)
+        with transaction.atomic():
+            ja_tem = set(
+                TrainingExercicio.objects.filter(usuario_id__in=usuarios_ids, nome_programa=nome_programa)
+                .values_list('usuario_id', flat=True)
+            )
+            novos = sorted(usuarios_ids - ja_tem)
+            programas = []
+            for usuario_id in novos:
+                # Inseridos do último para o primeiro: as listas de programas
+                # ordenam por -id, e assim mostram a rotina na ordem do modelo
+                for item in reversed(itens):
+                    programas.append(item.para_usuario(usuario_id, nome_programa))
+            TrainingExercicio.objects.bulk_create(programas, batch_size=500)
+        return len(novos), len(ja_tem)
+
+
+class ItemModeloPrograma(models.Model):
+    """Exercício de um ModeloPrograma, com a mesma prescrição de TrainingExercicio."""
+    modelo = models.ForeignKey(ModeloPrograma, related_name='itens', on_delete=models.CASCADE)
+    ordem = models.PositiveIntegerField(default=0)
+    exercicio = models.ForeignKey(Exercicio, related_name='itens_modelo', on_delete=models.CASCADE)
+    grupo = models.CharField(max_length=50, default='Desconhecido')
+    series = models.PositiveIntegerField(default=10)
+    repeticoes = models.PositiveIntegerField(default=10)
+    carga = models.IntegerField(default=0, verbose_name="Carga (kg)")
+    tempo = models.IntegerField(default=0, verbose_name="Minutos (mn)")
+    video_url = models.URLField(max_length=500, blank=True, null=True, verbose_name="URL do Vídeo")
+
+    class Meta:
+        verbose_name = "Item de Modelo de Programa"
+        verbose_name_plural = "Itens de Modelo de Programa"
+        ordering = ['ordem', 'id']
+
+    def __str__(self):
+        return f'{self.modelo.nome} #{self.ordem + 1}'
+
+    def para_usuario(self, usuario_id, nome_programa):
+        """TrainingExercicio (não salvo) deste item para o usuário."""
+        programa = TrainingExercicio(
+            usuario_id=usuario_id,
+            exercicio_id=self.exercicio_id,
+            nome_programa=nome_programa,
+            grupo=self.grupo,
+            series=self.series,
+            repeticoes=self.repeticoes,
+            carga=self.carga,
+            tempo=self.tempo,
+            video_url=self.video_url,
+        )
+        # O bulk_create não chama save(), que calcularia o texto de busca
+        programa.texto_busca = montar_texto_busca(programa, TrainingExercicio.campos_busca)
+        return programa
     
 
-class Avaliacao(models.Model):
+class Avaliacao(IndexadoParaBusca):
     """
     Modelo para representar avaliações físicas completas de usuários.
     Armazena medidas corporais detalhadas incluindo peso, altura, circunferências
@@ -111,10 +225,17 @@ class Avaliacao(models.Model):
     panturrilha_dir = models.DecimalField(max_digits=5, decimal_places=2)
     panturrilha_esq = models.DecimalField(max_digits=5, decimal_places=2)
 
+    # Campos pesquisáveis na lista de avaliações (ver paginas.busca)
+    campos_busca = ('nome_completo',)
+
     class Meta:
         verbose_name = "Avaliação Física"
         verbose_name_plural = "Avaliações Físicas"
         ordering = ['-data', '-hora']
+        indexes = [
+            # Paginação por cursor da lista de avaliações
+            models.Index(fields=['-data', '-hora', '-id'], name='avaliacao_data_hora_idx'),
+        ]
 
     def __str__(self):
         return f"Avaliação de {self.usuario.first_name} {self.usuario.last_name} | Data: {self.data} | Hora: {self.hora}"
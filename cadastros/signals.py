@@ -0,0 +1,13 @@
+from django.db.models.signals import post_save, post_delete
+from django.dispatch import receiver
+from .models import Exercicio, limpar_cache_exercicio_padrao
+
+
+@receiver(post_save, sender=Exercicio)
+@receiver(post_delete, sender=Exercicio)
+def invalidar_exercicio_padrao(sender, instance, **kwargs):
+    """
+    Descarta o exercício padrão em cache quando um exercício é criado,
+    renomeado ou removido, já que o padrão é o primeiro em ordem alfabética.
+    """
+    limpar_cache_exercicio_padrao()
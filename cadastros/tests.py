@@ -1 +1,79 @@
+from django.contrib.auth.models import User
 from django.test import TestCase
+from django.urls import reverse
+
+from usuarios.models import Perfil
+
+from .models import Exercicio, ItemModeloPrograma, ModeloPrograma, TrainingExercicio
+
+
+class ModeloProgramaTests(TestCase):
+
+    def setUp(self):
+        self.exercicios = [Exercicio.objects.create(nome=f'Exercício {n}') for n in range(5)]
+        self.modelo = ModeloPrograma.objects.create(nome='Hipertrofia A')
+        # Ordem do modelo diferente da ordem dos ids dos exercícios
+        for ordem, indice in enumerate((4, 1, 2)):
+            ItemModeloPrograma.objects.create(modelo=self.modelo, ordem=ordem, exercicio=self.exercicios[indice])
+        self.membros = [User.objects.create_user(f'membro{n}') for n in range(3)]
+
+    def test_lista_mostra_a_rotina_na_ordem_do_modelo(self):
+        self.modelo.aplicar([membro.pk for membro in self.membros])
+        esperado = [self.exercicios[i].pk for i in (4, 1, 2)]
+        for membro in self.membros:
+            # Mesma ordenação das listas de programas (Meta.ordering = -id)
+            programas = TrainingExercicio.objects.filter(usuario=membro)
+            self.assertEqual(list(programas.values_list('exercicio_id', flat=True)), esperado)
+
+    def test_reaplicar_nao_duplica(self):
+        ids = [membro.pk for membro in self.membros]
+        self.assertEqual(self.modelo.aplicar(ids[:2]), (2, 0))
+        self.assertEqual(self.modelo.aplicar(ids), (1, 2))
+        self.assertEqual(TrainingExercicio.objects.count(), 9)
+
+
+class AplicarModeloProgramaTests(TestCase):
+
+    def setUp(self):
+        self.modelo = ModeloPrograma.objects.create(nome='Hipertrofia A')
+        ItemModeloPrograma.objects.create(modelo=self.modelo, exercicio=Exercicio.objects.create(nome='Supino'))
+
+    def test_membro_recebe_403_sem_consultar_o_modelo(self):
+        self.client.force_login(User.objects.create_user('membro'))
+        with self.assertNumQueries(2):  # sessão e usuário
+            resposta = self.client.get(reverse('aplicar-modelo-programa', args=[self.modelo.pk]))
+        self.assertEqual(resposta.status_code, 403)
+
+    def test_staff_aplica_o_modelo(self):
+        self.client.force_login(User.objects.create_user('professor', is_staff=True))
+        membro = User.objects.create_user('membro')
+        Perfil.objects.create(usuario=membro, nome_completo='Membro')
+        url = reverse('aplicar-modelo-programa', args=[self.modelo.pk])
+        self.assertEqual(self.client.get(url).status_code, 200)
+        self.assertEqual(self.client.get(reverse('aplicar-modelo-programa', args=[0])).status_code, 404)
+
+        resposta = self.client.post(url, {'nome_programa': 'Treino A', 'membros': 'membro'})
+        self.assertRedirects(resposta, reverse('listar-modelos-programa'), fetch_redirect_response=False)
+        self.assertTrue(TrainingExercicio.objects.filter(usuario=membro, nome_programa='Treino A').exists())
+
+
+class ExportacaoTests(TestCase):
+
+    def _cabecalho(self, nome_url):
+        self.client.force_login(User.objects.create_user('professor', is_staff=True))
+        resposta = self.client.get(reverse(nome_url))
+        self.assertEqual(resposta.status_code, 200)
+        primeira_linha = b''.join(resposta.streaming_content).decode('utf-8-sig').splitlines()[0]
+        return primeira_linha.split(';')
+
+    def test_rotulos_das_avaliacoes(self):
+        cabecalho = self._cabecalho('exportar-avaliacoes')
+        self.assertEqual(cabecalho[:3], ['Usuário', 'Nome Completo', 'Data'])
+        self.assertIn('Pescoço', cabecalho)
+        self.assertIn('Braço Contraído Esquerdo', cabecalho)
+
+    def test_rotulos_dos_programas(self):
+        self.assertEqual(self._cabecalho('exportar-training-exercicios'), [
+            'Usuário', 'Nome do Programa', 'Grupo Muscular', 'Exercício', 'Séries',
+            'Repetições', 'Carga (kg)', 'Tempo (min)', 'URL do Vídeo',
+        ])
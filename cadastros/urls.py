@@ -6,7 +6,9 @@ from .views import (
     CampoUpdate, ExercicioUpdate, TrainingExercicioUpdate, AvaliacaoUpdate,
     CampoDelete, ExercicioDelete, TrainingExercicioDelete, AvaliacaoDelete,
     CampoList, ExercicioList, TrainingExercicioList, AvaliacaoList,
-    TrainingExercicioCreateForPerfil,
+    TrainingExercicioCreateForPerfil, TrainingExercicioExport, AvaliacaoExport,
+    ModeloProgramaList, ModeloProgramaCreate, ModeloProgramaUpdate, ModeloProgramaDelete,
+    AplicarModeloPrograma,
 )
 
 urlpatterns = [
@@ -31,11 +33,20 @@ urlpatterns = [
     path('editar/training-exercicio/<int:pk>/', TrainingExercicioUpdate.as_view(), name='editar-training-exercicio'),
     path('excluir/training-exercicio/<int:pk>/', TrainingExercicioDelete.as_view(), name='excluir-training-exercicio'),
     path('listar/training-exercicios/', TrainingExercicioList.as_view(), name='listar-training-exercicios'),
+    path('exportar/training-exercicios/', TrainingExercicioExport.as_view(), name='exportar-training-exercicios'),
+
+    # URLs para ModeloPrograma
+    path('listar/modelos-programa/', ModeloProgramaList.as_view(), name='listar-modelos-programa'),
+    path('cadastrar/modelo-programa/', ModeloProgramaCreate.as_view(), name='cadastrar-modelo-programa'),
+    path('editar/modelo-programa/<int:pk>/', ModeloProgramaUpdate.as_view(), name='editar-modelo-programa'),
+    path('excluir/modelo-programa/<int:pk>/', ModeloProgramaDelete.as_view(), name='excluir-modelo-programa'),
+    path('aplicar/modelo-programa/<int:pk>/', AplicarModeloPrograma.as_view(), name='aplicar-modelo-programa'),
 
     # URLs para Avaliação
     path('cadastrar/avaliacao/', AvaliacaoCreate.as_view(), name='cadastrar-avaliacao'),
     path('editar/avaliacao/<int:pk>/', AvaliacaoUpdate.as_view(), name='editar-avaliacao'),
     path('excluir/avaliacao/<int:pk>/', AvaliacaoDelete.as_view(), name='excluir-avaliacao'),
     path('listar/avaliacoes/', AvaliacaoList.as_view(), name='listar-avaliacoes'),
+    path('exportar/avaliacoes/', AvaliacaoExport.as_view(), name='exportar-avaliacoes'),
 ]
 
@@ -1,9 +1,13 @@
 from django.db.models.query import QuerySet
 from django.views.generic.edit import CreateView, UpdateView, DeleteView
 from django.views.generic.list import ListView
-from .models import Campo, Exercicio, TrainingExercicio, Avaliacao
+from django.views.generic.detail import SingleObjectMixin
+from django.views.generic.edit import FormView
+from django.db import transaction
+from django.db.models import Count
+from .models import Campo, Exercicio, TrainingExercicio, Avaliacao, ModeloPrograma
 from django.urls import reverse_lazy
-from .forms import TrainingExercicioForm, ExercicioForm
+from .forms import TrainingExercicioForm, ExercicioForm, ModeloProgramaForm, ItensModeloFormSet, AplicarModeloForm
 from django.contrib.auth.mixins import LoginRequiredMixin
 from braces.views import GroupRequiredMixin
 from django.http import HttpResponseForbidden
@@ -11,6 +15,9 @@ from django.shortcuts import get_object_or_404, redirect
 from django import forms
 from django.contrib import messages
 from usuarios.models import Perfil
+from paginas.paginacao import CursorPaginationMixin
+from paginas.busca import BuscaMixin
+from paginas.exportacao import ExportacaoCSVMixin
 
 # Create Views
 class CampoCreate(LoginRequiredMixin, CreateView):
@@ -328,15 +335,18 @@ class ExercicioList(LoginRequiredMixin, ListView):
     model = Exercicio
     template_name = 'cadastros/listas/exercicio.html'
 
-class TrainingExercicioList(LoginRequiredMixin, ListView):
+class TrainingExercicioList(LoginRequiredMixin, BuscaMixin, CursorPaginationMixin, ListView):
     """
     Lista de treinamentos com exercícios.
-    Otimizada com select_related para reduzir queries ao banco de dados.
+    Otimizada com select_related e paginação por cursor para reduzir o custo
+    das consultas ao banco de dados.
     """
     login_url = reverse_lazy('login')
     model = TrainingExercicio
     template_name = 'cadastros/listas/training_exercicio.html'
     paginate_by = 3
+    cursor_ordering = ('-id',)
+    busca_param = 'nome_programa'
     context_object_name = 'programas'
 
     def get_queryset(self):
@@ -347,23 +357,24 @@ class TrainingExercicioList(LoginRequiredMixin, ListView):
             # Usuário comum só pode ver os próprios programas
             queryset = TrainingExercicio.objects.select_related('usuario', 'exercicio').filter(usuario=self.request.user)
         
-        # Aplicar o filtro de nome_programa, se existir
-        txt_nome = self.request.GET.get('nome_programa')
-        if txt_nome:
-            queryset = queryset.filter(nome_programa__icontains=txt_nome)
+        # Busca por nome do programa ou grupo (ver paginas.busca)
+        queryset = self.filtrar_busca(queryset)
         
         return queryset.order_by('-id') 
 
 
-class AvaliacaoList(LoginRequiredMixin, ListView):
+class AvaliacaoList(LoginRequiredMixin, BuscaMixin, CursorPaginationMixin, ListView):
     """
     Lista de avaliações físicas.
-    Otimizada com select_related para reduzir queries ao banco de dados.
+    Otimizada com select_related e paginação por cursor para reduzir o custo
+    das consultas ao banco de dados.
     """
     login_url = reverse_lazy('login')
     model = Avaliacao
     template_name = 'cadastros/listas/avaliacao.html'
     paginate_by = 1
+    cursor_ordering = ('-data', '-hora', '-id')
+    busca_param = 'nome_completo'
 
     def get_queryset(self):
         # Se o usuário é staff, ele pode ver todas as avaliações
@@ -373,12 +384,200 @@ class AvaliacaoList(LoginRequiredMixin, ListView):
             # Usuário comum só pode ver as próprias avaliações
             queryset = Avaliacao.objects.select_related('usuario').filter(usuario=self.request.user)
         
-        # Aplicar o filtro de nome_completo, se existir
-        txt_nome = self.request.GET.get('nome_completo')
-        if txt_nome:
-            queryset = queryset.filter(nome_completo__icontains=txt_nome)
+        # Busca por nome do usuário avaliado (ver paginas.busca)
+        queryset = self.filtrar_busca(queryset)
         
         return queryset.order_by('-data', '-hora')  
 
 
+# Export Views
+class TrainingExercicioExport(ExportacaoCSVMixin, TrainingExercicioList):
+    """
+    Exporta em CSV os programas da lista, com a mesma busca (nome_programa)
+    e as mesmas permissões.
+    """
+    nome_arquivo_exportacao = 'programas_treinamento.csv'
+    campos_exportacao = (
+        ('usuario__username', 'Usuário'),
+        ('nome_programa', 'Nome do Programa'),
+        ('grupo', 'Grupo Muscular'),
+        ('exercicio__nome', 'Exercício'),
+        ('series', 'Séries'),
+        ('repeticoes', 'Repetições'),
+        ('carga', 'Carga (kg)'),
+        ('tempo', 'Tempo (min)'),
+        ('video_url', 'URL do Vídeo'),
+    )
+
+
+class AvaliacaoExport(ExportacaoCSVMixin, AvaliacaoList):
+    """
+    Exporta em CSV as avaliações da lista, com a mesma busca (nome_completo)
+    e as mesmas permissões, opcionalmente limitadas ao período de/ate.
+    """
+    nome_arquivo_exportacao = 'avaliacoes.csv'
+    campo_data_exportacao = 'data'
+    campos_exportacao = (
+        ('usuario__username', 'Usuário'),
+        ('nome_completo', 'Nome Completo'),
+        ('data', 'Data'),
+        ('hora', 'Hora'),
+        ('idade', 'Idade'),
+        ('peso', 'Peso'),
+        ('altura', 'Altura'),
+        ('pescoco', 'Pescoço'),
+        ('ombro_dir', 'Ombro Direito'),
+        ('ombro_esq', 'Ombro Esquerdo'),
+        ('braco_relaxado_dir', 'Braço Relaxado Direito'),
+        ('braco_relaxado_esq', 'Braço Relaxado Esquerdo'),
+        ('braco_contraido_dir', 'Braço Contraído Direito'),
+        ('braco_contraido_esq', 'Braço Contraído Esquerdo'),
+        ('antebraco_dir', 'Antebraço Direito'),
+        ('antebraco_esq', 'Antebraço Esquerdo'),
+        ('torax_relaxado', 'Tórax Relaxado'),
+        ('torax_contraido', 'Tórax Contraído'),
+        ('cintura', 'Cintura'),
+        ('quadril', 'Quadril'),
+        ('coxa_dir', 'Coxa Direita'),
+        ('coxa_esq', 'Coxa Esquerda'),
+        ('panturrilha_dir', 'Panturrilha Direita'),
+        ('panturrilha_esq', 'Panturrilha Esquerda'),
+    )
+
+
+# Modelos de programa
+class ApenasStaffMixin(LoginRequiredMixin):
+    """Restringe a view a funcionários (staff)."""
+    login_url = reverse_lazy('login')
+
+    def dispatch(self, request, *args, **kwargs):
+        if request.user.is_authenticated and not request.user.is_staff:
+            return HttpResponseForbidden("Apenas funcionários podem gerenciar modelos de programa.")
+        return super().dispatch(request, *args, **kwargs)
+
+
+class ModeloProgramaList(ApenasStaffMixin, ListView):
+    model = ModeloPrograma
+    template_name = 'cadastros/listas/modelo_programa.html'
+    context_object_name = 'modelos'
+
+    def get_queryset(self):
+        return ModeloPrograma.objects.annotate(total_itens=Count('itens')).order_by('nome')
+
+
+class ModeloProgramaFormMixin(ApenasStaffMixin):
+    """
+    Criação e edição de um modelo com os seus exercícios (formset). A ordem
+    dos exercícios é a ordem em que aparecem no formulário.
+    """
+    model = ModeloPrograma
+    form_class = ModeloProgramaForm
+    template_name = 'cadastros/form_modelo_programa.html'
+    success_url = reverse_lazy('listar-modelos-programa')
+
+    def get_formset(self):
+        if self.request.method == 'POST':
+            return ItensModeloFormSet(self.request.POST, instance=self.object)
+        return ItensModeloFormSet(instance=self.object)
 
+    def get_context_data(self, **kwargs):
+        context = super().get_context_data(**kwargs)
+        context.setdefault('formset', self.get_formset())
+        context['botao'] = 'Salvar'
+        return context
+
+    def form_valid(self, form):
+        formset = ItensModeloFormSet(self.request.POST, instance=form.instance)
+        if not formset.is_valid():
+            return self.form_invalid(form, formset)
+        with transaction.atomic():
+            self.object = form.save()
+            formset.save(commit=False)
+            for item in formset.deleted_objects:
+                item.delete()
+            ordem = 0
+            for item_form in formset.forms:
+                if item_form in formset.deleted_forms or (item_form.instance.pk is None and not item_form.has_changed()):
+                    continue
+                item = item_form.instance
+                item.modelo = self.object
+                item.ordem = ordem
+                item.save()
+                ordem += 1
+        messages.success(self.request, 'Modelo de programa salvo com sucesso!')
+        return redirect(self.get_success_url())
+
+    def form_invalid(self, form, formset=None):
+        messages.error(self.request, 'Por favor, corrija os erros no formulário.')
+        return self.render_to_response(self.get_context_data(form=form, formset=formset or self.get_formset()))
+
+
+class ModeloProgramaCreate(ModeloProgramaFormMixin, CreateView):
+
+    def form_valid(self, form):
+        form.instance.criado_por = self.request.user
+        return super().form_valid(form)
+
+    def get_context_data(self, **kwargs):
+        context = super().get_context_data(**kwargs)
+        context['titulo'] = 'Novo Modelo de Programa'
+        return context
+
+
+class ModeloProgramaUpdate(ModeloProgramaFormMixin, UpdateView):
+
+    def get_context_data(self, **kwargs):
+        context = super().get_context_data(**kwargs)
+        context['titulo'] = f'Editar Modelo: {self.object.nome}'
+        return context
+
+
+class ModeloProgramaDelete(ApenasStaffMixin, DeleteView):
+    model = ModeloPrograma
+    template_name = 'cadastros/form-excluir.html'
+    success_url = reverse_lazy('listar-modelos-programa')
+
+
+class AplicarModeloPrograma(ApenasStaffMixin, SingleObjectMixin, FormView):
+    """
+    Aplica um modelo a vários membros de uma vez: todos os exercícios são
+    criados em uma transação, com um único bulk_create.
+    """
+    model = ModeloPrograma
+    form_class = AplicarModeloForm
+    template_name = 'cadastros/form.html'
+    success_url = reverse_lazy('listar-modelos-programa')
+
+    # O modelo só é carregado depois da verificação de acesso (dispatch)
+    def get(self, request, *args, **kwargs):
+        self.object = self.get_object()
+        return super().get(request, *args, **kwargs)
+
+    def post(self, request, *args, **kwargs):
+        self.object = self.get_object()
+        return super().post(request, *args, **kwargs)
+
+    def get_initial(self):
+        initial = super().get_initial()
+        initial['nome_programa'] = self.object.nome
+        return initial
+
+    def form_valid(self, form):
+        atendidos, ignorados = self.object.aplicar(
+            form.cleaned_data['membros'], form.cleaned_data['nome_programa'],
+        )
+        mensagem = f'Modelo "{self.object.nome}" aplicado a {atendidos} membro(s).'
+        if ignorados:
+            mensagem += f' {ignorados} membro(s) já tinham um programa com este nome e foram ignorados.'
+        messages.success(self.request, mensagem)
+        return super().form_valid(form)
+
+    def form_invalid(self, form):
+        messages.error(self.request, 'Por favor, corrija os erros no formulário.')
+        return super().form_invalid(form)
+
+    def get_context_data(self, **kwargs):
+        context = super().get_context_data(**kwargs)
+        context['titulo'] = f'Aplicar Modelo: {self.object.nome}'
+        context['botao'] = 'Aplicar'
+        return context
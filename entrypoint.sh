@@ -13,7 +13,27 @@ python manage.py migrate --noinput
 # Coleta arquivos estáticos
 python manage.py collectstatic --noinput
 
-# Inicia Gunicorn apontando para o WSGI correto do projeto
-exec gunicorn myproject.wsgi:application \
-    --bind 0.0.0.0:8000 \
-    --workers 3
\ No newline at end of file
+# Inicia o Gunicorn. SERVER_MODE escolhe a interface:
+#   wsgi (padrão) - workers síncronos, cada requisição ocupa um worker
+#   asgi          - workers Uvicorn; as views async (calendário, contadores,
+#                   gráfico) não bloqueiam o worker enquanto aguardam o banco
+SERVER_MODE="${SERVER_MODE:-wsgi}"
+WEB_WORKERS="${WEB_WORKERS:-3}"
+
+case "$SERVER_MODE" in
+  asgi)
+    exec gunicorn myproject.asgi:application \
+        --worker-class uvicorn_worker.UvicornWorker \
+        --bind 0.0.0.0:8000 \
+        --workers "$WEB_WORKERS"
+    ;;
+  wsgi)
+    exec gunicorn myproject.wsgi:application \
+        --bind 0.0.0.0:8000 \
+        --workers "$WEB_WORKERS"
+    ;;
+  *)
+    echo "SERVER_MODE inválido: $SERVER_MODE (use wsgi ou asgi)" >&2
+    exit 1
+    ;;
+esac
\ No newline at end of file
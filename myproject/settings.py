@@ -51,6 +51,7 @@ INSTALLED_APPS = [
 ]
 
 MIDDLEWARE = [
+    'paginas.instrumentacao.InstrumentacaoMiddleware',
     'django.middleware.security.SecurityMiddleware',
     'django.contrib.sessions.middleware.SessionMiddleware',
     'django.middleware.common.CommonMiddleware',
@@ -64,7 +65,8 @@ ROOT_URLCONF = 'myproject.urls'
 
 TEMPLATES = [
     {
-        'BACKEND': 'django.template.backends.django.DjangoTemplates',
+        # DjangoTemplates que cronometra as renderizações (paginas.instrumentacao)
+        'BACKEND': 'paginas.instrumentacao.TemplatesInstrumentados',
         'DIRS': [os.path.join(BASE_DIR, 'templates')],  # Pastas de templates
         'APP_DIRS': True,
         'OPTIONS': {
@@ -87,6 +89,22 @@ WSGI_APPLICATION = 'myproject.wsgi.application'
 # Em desenvolvimento local (sem Docker), pode usar SQLite.
 # Em produção/Docker, configuramos Postgres via variáveis de ambiente.
 
+# Perfil de desempenho do SQLite (opt-in com SQLITE_TUNING=True), para
+# academias pequenas que rodam sem Postgres em um único container. Aplicado a
+# cada nova conexão: journal WAL (leitores não bloqueiam o escritor),
+# synchronous=NORMAL (seguro em WAL, sem fsync a cada commit), mmap e cache
+# maiores. As escritas abrem transações IMMEDIATE, que pegam o lock de escrita
+# já no BEGIN e esperam até SQLITE_BUSY_TIMEOUT segundos por ele, em vez de
+# falharem com "database is locked" ao promover uma leitura para escrita.
+SQLITE_PRAGMAS = (
+    'journal_mode=WAL',
+    'synchronous=NORMAL',
+    f"mmap_size={int(os.environ.get('SQLITE_MMAP_SIZE', 128 * 1024 * 1024))}",
+    f"cache_size={int(os.environ.get('SQLITE_CACHE_SIZE', -20000))}",
+    'temp_store=MEMORY',
+)
+SQLITE_BUSY_TIMEOUT = int(os.environ.get('SQLITE_BUSY_TIMEOUT', 20))
+
 if os.environ.get('DB_HOST'):
     # Configuração para Postgres (usada no Docker)
     DATABASES = {
@@ -97,8 +115,29 @@ if os.environ.get('DB_HOST'):
             'PASSWORD': os.environ.get('POSTGRES_PASSWORD', ''),
             'HOST': os.environ.get('DB_HOST', 'db'),
             'PORT': os.environ.get('DB_PORT', '5432'),
+            # Revalida a conexão persistente antes de reutilizá-la
+            'CONN_HEALTH_CHECKS': os.environ.get('DB_CONN_HEALTH_CHECKS', 'True') == 'True',
         }
     }
+
+    if os.environ.get('DB_POOL', 'False') == 'True':
+        # Pool de conexões do psycopg 3 (um por processo). Incompatível com
+        # conexões persistentes, por isso CONN_MAX_AGE fica em 0.
+        DATABASES['default']['CONN_MAX_AGE'] = 0
+        DATABASES['default']['OPTIONS'] = {
+            'pool': {
+                'min_size': int(os.environ.get('DB_POOL_MIN_SIZE', 2)),
+                'max_size': int(os.environ.get('DB_POOL_MAX_SIZE', 10)),
+                'timeout': float(os.environ.get('DB_POOL_TIMEOUT', 10)),
+            },
+        }
+    else:
+        # Conexões persistentes: cada worker reaproveita a conexão por até
+        # DB_CONN_MAX_AGE segundos em vez de abrir uma nova a cada requisição.
+        # Sob ASGI cada requisição roda em outra thread e a conexão não seria
+        # reaproveitada, então o padrão é 0 (prefira DB_POOL=True).
+        padrao_max_age = 0 if os.environ.get('SERVER_MODE') == 'asgi' else 60
+        DATABASES['default']['CONN_MAX_AGE'] = int(os.environ.get('DB_CONN_MAX_AGE') or padrao_max_age)
 else:
     # Fallback para SQLite (desenvolvimento sem Docker)
     DATABASES = {
@@ -108,6 +147,69 @@ else:
         }
     }
 
+    if os.environ.get('SQLITE_TUNING', 'False') == 'True':
+        DATABASES['default']['OPTIONS'] = {
+            'init_command': ';'.join(f'PRAGMA {pragma}' for pragma in SQLITE_PRAGMAS),
+            'transaction_mode': 'IMMEDIATE',
+            'timeout': SQLITE_BUSY_TIMEOUT,
+        }
+
+
+# Cache
+# https://docs.djangoproject.com/en/5.1/topics/cache/
+#
+# Em desenvolvimento a memória local basta. Com vários workers do Gunicorn,
+# use um backend compartilhado (ex.: FileBasedCache) via variáveis de ambiente,
+# para que as invalidações do calendário valham para todos os processos.
+
+CACHES = {
+    'default': {
+        'BACKEND': os.environ.get('CACHE_BACKEND', 'django.core.cache.backends.locmem.LocMemCache'),
+        'LOCATION': os.environ.get('CACHE_LOCATION', 'fitcrol'),
+    }
+}
+
+# Tempo (segundos) que os payloads JSON do calendário ficam em cache
+TASKS_CACHE_TIMEOUT = int(os.environ.get('TASKS_CACHE_TIMEOUT', 60 * 60))
+
+# Tempo (segundos) que os contadores do dashboard ficam em cache
+TASKS_CONTADORES_CACHE_TIMEOUT = int(os.environ.get('TASKS_CONTADORES_CACHE_TIMEOUT', 60))
+
+
+# Instrumentação das requisições (paginas.instrumentacao): fração das
+# requisições medidas (1 = todas, 0 = desligada, o padrão). Cada requisição
+# medida recebe o cabeçalho Server-Timing e gera uma linha de log; as que
+# passam dos limites de consultas ou de tempo total (ms) são registradas como
+# WARNING. Ative pelo ambiente (ex.: 0.01 em produção, 1 para depurar).
+INSTRUMENTACAO_AMOSTRAGEM = float(os.environ.get('INSTRUMENTACAO_AMOSTRAGEM', 0))
+INSTRUMENTACAO_LIMITE_CONSULTAS = int(os.environ.get('INSTRUMENTACAO_LIMITE_CONSULTAS', 30))
+INSTRUMENTACAO_LIMITE_MS = int(os.environ.get('INSTRUMENTACAO_LIMITE_MS', 500))
+
+LOGGING = {
+    'version': 1,
+    'disable_existing_loggers': False,
+    'handlers': {
+        'console': {'class': 'logging.StreamHandler'},
+    },
+    'loggers': {
+        'paginas.instrumentacao': {
+            'handlers': ['console'],
+            'level': os.environ.get('INSTRUMENTACAO_LOG_LEVEL', 'INFO'),
+            'propagate': False,
+        },
+    },
+}
+
+
+# Exercício usado como padrão em novos programas de treinamento.
+# Se não for definido, o primeiro exercício em ordem alfabética é usado.
+EXERCICIO_PADRAO_ID = int(os.environ['EXERCICIO_PADRAO_ID']) if os.environ.get('EXERCICIO_PADRAO_ID') else None
+
+# Processos usados para calcular os hashes de senha na importação de membros
+# pela página de staff (ver usuarios.importacao). O padrão 1 evita criar
+# processos dentro do worker web; o comando importar_membros usa --processos.
+IMPORTACAO_PROCESSOS = int(os.environ.get('IMPORTACAO_PROCESSOS', 1))
+
 
 # Password validation
 # https://docs.djangoproject.com/en/5.1/ref/settings/#auth-password-validators
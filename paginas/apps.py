@@ -1,6 +1,15 @@
 from django.apps import AppConfig
+from django.db.backends.signals import connection_created
+from django.db.models.signals import post_migrate
 
 
 class PaginasConfig(AppConfig):
     default_auto_field = 'django.db.models.BigAutoField'
     name = 'paginas'
+
+    def ready(self):
+        from . import busca, instrumentacao
+        # Cria/recupera os índices de busca depois de cada migrate
+        post_migrate.connect(busca.preparar_indices, sender=self)
+        # Cronometra as consultas das requisições instrumentadas
+        connection_created.connect(instrumentacao.instalar_cronometro)
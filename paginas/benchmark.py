@@ -0,0 +1,293 @@
+"""
+Benchmark das jornadas principais: login, dashboard, feed do calendário,
+progresso de IMC, busca na lista de membros e criação de programa.
+
+Roda com o cliente de testes do Django (banco de testes descartável, populado
+de forma determinística) ou contra um servidor local via HTTP. Em ambos os
+casos a quantidade de consultas vem do cabeçalho Server-Timing de
+``paginas.instrumentacao``; contra um servidor, ele precisa estar com
+``INSTRUMENTACAO_AMOSTRAGEM=1``.
+
+Os resultados podem ser salvos como baseline (JSON com chaves ordenadas e
+valores arredondados, para que regressões apareçam em diffs) e comparados com
+um baseline anterior.
+"""
+import http.cookiejar
+import json
+import random
+import re
+import statistics
+import threading
+import time
+import urllib.error
+import urllib.parse
+import urllib.request
+from datetime import timedelta
+
+from django.utils import timezone
+
+USUARIO_BENCHMARK = 'benchmark'
+SENHA_BENCHMARK = 'benchmark-senha-123'
+
+TERMOS_BUSCA = ('silva', 'ana', 'santos', 'jo', 'oliveira', 'maria', 'lima', 'souza')
+
+# Aumentos de p95 menores que isto (ms) são ruído e não contam como regressão
+MARGEM_MINIMA_MS = 5
+
+_SERVER_TIMING_CONSULTAS = re.compile(r'desc="(\d+) consulta')
+
+
+# Clientes
+
+class Resposta:
+    def __init__(self, status, server_timing, duracao_ms):
+        self.status = status
+        self.duracao_ms = duracao_ms
+        encontrado = _SERVER_TIMING_CONSULTAS.search(server_timing or '')
+        self.consultas = int(encontrado.group(1)) if encontrado else None
+
+
+class ClienteDjango:
+    """Cliente de testes do Django (sem rede, sem checagem de CSRF)."""
+
+    def __init__(self):
+        from django.test import Client
+        self.client = Client()
+
+    def requisitar(self, metodo, caminho, dados=None):
+        inicio = time.perf_counter()
+        if metodo == 'POST':
+            resposta = self.client.post(caminho, dados or {})
+        else:
+            resposta = self.client.get(caminho)
+        duracao = (time.perf_counter() - inicio) * 1000
+        return Resposta(resposta.status_code, resposta.headers.get('Server-Timing'), duracao)
+
+
+class _SemRedirecionamento(urllib.request.HTTPRedirectHandler):
+    def redirect_request(self, *args, **kwargs):
+        return None
+
+
+class ClienteHTTP:
+    """Cliente HTTP com cookies e CSRF, para um servidor em execução."""
+
+    def __init__(self, url_base):
+        self.url_base = url_base.rstrip('/')
+        self.cookies = http.cookiejar.CookieJar()
+        self.opener = urllib.request.build_opener(
+            urllib.request.HTTPCookieProcessor(self.cookies), _SemRedirecionamento()
+        )
+
+    def _csrf(self):
+        for cookie in self.cookies:
+            if cookie.name == 'csrftoken':
+                return cookie.value
+        return ''
+
+    def requisitar(self, metodo, caminho, dados=None):
+        url = self.url_base + caminho
+        corpo = None
+        cabecalhos = {}
+        if metodo == 'POST':
+            corpo = urllib.parse.urlencode(dados or {}).encode()
+            cabecalhos = {'X-CSRFToken': self._csrf(), 'Referer': url}
+        requisicao = urllib.request.Request(url, data=corpo, headers=cabecalhos, method=metodo)
+        inicio = time.perf_counter()
+        try:
+            with self.opener.open(requisicao) as resposta:
+                resposta.read()
+                status, cabecalhos_resposta = resposta.status, resposta.headers
+        except urllib.error.HTTPError as erro:
+            erro.read()
+            status, cabecalhos_resposta = erro.code, erro.headers
+        duracao = (time.perf_counter() - inicio) * 1000
+        return Resposta(status, cabecalhos_resposta.get('Server-Timing'), duracao)
+
+
+# Jornadas
+#
+# Cada jornada é (status esperado, função que recebe o cliente, o contexto e o
+# número da iteração e devolve a Resposta medida).
+
+def _login(cliente, contexto, i):
+    return cliente.requisitar('POST', '/login/', {
+        'username': contexto['usuario'], 'password': contexto['senha'],
+    })
+
+
+def _dashboard(cliente, contexto, i):
+    return cliente.requisitar('GET', '/dashboard/')
+
+
+def _calendario(cliente, contexto, i):
+    hoje = timezone.localdate()
+    inicio = hoje.replace(day=1)
+    fim = (inicio + timedelta(days=32)).replace(day=1)
+    return cliente.requisitar('GET', f'/api/tasks/?start={inicio.isoformat()}&end={fim.isoformat()}')
+
+
+def _progresso_imc(cliente, contexto, i):
+    return cliente.requisitar('GET', '/progresso-imc/')
+
+
+def _busca_membros(cliente, contexto, i):
+    termo = TERMOS_BUSCA[i % len(TERMOS_BUSCA)]
+    return cliente.requisitar('GET', f'/listar/usersauth/?nome_completo={termo}')
+
+
+def _criar_programa(cliente, contexto, i):
+    return cliente.requisitar('POST', '/cadastrar/training-exercicio/', {
+        'usuario': contexto['dono_programa_id'],
+        'exercicio': contexto['exercicio_id'],
+        'nome_programa': f'Programa benchmark {i}',
+        'grupo': 'Peito',
+        'series': 3,
+        'repeticoes': 12,
+        'carga': 20,
+        'tempo': 10,
+    })
+
+
+JORNADAS = {
+    'login': (302, _login),
+    'dashboard': (200, _dashboard),
+    'calendario': (200, _calendario),
+    'progresso_imc': (200, _progresso_imc),
+    'busca_membros': (200, _busca_membros),
+    'criar_programa': (302, _criar_programa),
+}
+
+
+# Dados
+
+def popular(membros=500, registros_imc=120, semente=0):
+    """
+    Cria, de forma determinística, o usuário do benchmark (staff, com
+    histórico de IMC) e uma academia sintética com ``membros`` membros.
+    Retorna o contexto usado pelas jornadas.
+    """
+    from django.contrib.auth.models import User
+    from usuarios.models import IMCRegistro, Perfil
+
+    from .dados_sinteticos import GeradorAcademia
+
+    aleatorio = random.Random(semente)
+    usuario = User.objects.create_user(USUARIO_BENCHMARK, password=SENHA_BENCHMARK, is_staff=True)
+    Perfil.objects.create(usuario=usuario, nome_completo='Usuário Benchmark', matricula='00000000000')
+    agora = timezone.now()
+    registros = []
+    for n in range(registros_imc):
+        peso = round(aleatorio.uniform(60, 90), 1)
+        registros.append(IMCRegistro(
+            user=usuario, peso=peso, altura=1.75, imc=peso / 1.75 ** 2,
+            data_registro=agora - timedelta(days=7 * n),
+        ))
+    IMCRegistro.objects.bulk_create(registros)
+
+    gerador = GeradorAcademia(
+        usuarios=membros, anos=1, avaliacoes=1, programas=1, eventos=600, staff=2, semente=semente,
+    )
+    gerador.gerar()
+    return {
+        'usuario': USUARIO_BENCHMARK,
+        'senha': SENHA_BENCHMARK,
+        'exercicio_id': gerador.exercicios[0],
+        'dono_programa_id': User.objects.filter(perfil__isnull=False).exclude(pk=usuario.pk)
+        .order_by('pk').values_list('pk', flat=True).first() or usuario.pk,
+    }
+
+
+# Execução e estatísticas
+
+def _percentil(valores, p):
+    if len(valores) < 2:
+        return valores[0] if valores else 0.0
+    return statistics.quantiles(valores, n=100, method='inclusive')[p - 1]
+
+
+def executar(criar_cliente, contexto, jornadas, iteracoes, aquecimento=5, concorrencia=1):
+    """
+    Executa cada jornada ``iteracoes`` vezes em cada um dos ``concorrencia``
+    clientes (já autenticados) e devolve as estatísticas por jornada.
+    """
+    clientes = []
+    for _ in range(concorrencia):
+        cliente = criar_cliente()
+        cliente.requisitar('GET', '/login/')
+        _login(cliente, contexto, 0)
+        clientes.append(cliente)
+
+    resultados = {}
+    for nome in jornadas:
+        esperado, jornada = JORNADAS[nome]
+        for i in range(aquecimento):
+            jornada(clientes[0], contexto, i)
+
+        respostas = []
+
+        def rodar(cliente, deslocamento):
+            for i in range(iteracoes):
+                respostas.append(jornada(cliente, contexto, deslocamento + i))
+
+        inicio = time.perf_counter()
+        if concorrencia == 1:
+            rodar(clientes[0], 0)
+        else:
+            threads = [
+                threading.Thread(target=rodar, args=(cliente, n * iteracoes))
+                for n, cliente in enumerate(clientes)
+            ]
+            for thread in threads:
+                thread.start()
+            for thread in threads:
+                thread.join()
+        duracao = time.perf_counter() - inicio
+
+        duracoes = [resposta.duracao_ms for resposta in respostas]
+        consultas = [resposta.consultas for resposta in respostas if resposta.consultas is not None]
+        resultados[nome] = {
+            'requisicoes': len(respostas),
+            'erros': sum(1 for resposta in respostas if resposta.status != esperado),
+            'p50_ms': round(_percentil(duracoes, 50), 1),
+            'p95_ms': round(_percentil(duracoes, 95), 1),
+            'p99_ms': round(_percentil(duracoes, 99), 1),
+            'req_s': round(len(respostas) / duracao, 1),
+            'consultas': round(statistics.mean(consultas), 1) if consultas else None,
+        }
+    return resultados
+
+
+# Baseline
+
+def salvar_baseline(caminho, resultados, parametros):
+    caminho.parent.mkdir(parents=True, exist_ok=True)
+    conteudo = {'parametros': parametros, 'jornadas': resultados}
+    caminho.write_text(json.dumps(conteudo, indent=2, sort_keys=True, ensure_ascii=False) + '\n', encoding='utf-8')
+
+
+def comparar_baseline(caminho, resultados, tolerancia):
+    """
+    Compara com o baseline salvo. Retorna linhas de relatório e a lista de
+    regressões: qualquer aumento de consultas, erros novos ou p95 acima da
+    tolerância (fração, ex.: 0.2 = 20%) e de ``MARGEM_MINIMA_MS``.
+    """
+    anterior = json.loads(caminho.read_text(encoding='utf-8'))['jornadas']
+    linhas, regressoes = [], []
+    for nome, atual in resultados.items():
+        base = anterior.get(nome)
+        if base is None:
+            linhas.append(f'{nome}: sem baseline')
+            continue
+        linhas.append(
+            f"{nome}: p95 {base['p95_ms']} -> {atual['p95_ms']} ms, "
+            f"consultas {base['consultas']} -> {atual['consultas']}"
+        )
+        if atual['consultas'] is not None and base['consultas'] is not None and atual['consultas'] > base['consultas']:
+            regressoes.append(f"{nome}: consultas {base['consultas']} -> {atual['consultas']}")
+        if atual['erros'] > base['erros']:
+            regressoes.append(f"{nome}: erros {base['erros']} -> {atual['erros']}")
+        limite_p95 = max(base['p95_ms'] * (1 + tolerancia), base['p95_ms'] + MARGEM_MINIMA_MS)
+        if atual['p95_ms'] > limite_p95:
+            regressoes.append(f"{nome}: p95 {base['p95_ms']} -> {atual['p95_ms']} ms")
+    return linhas, regressoes
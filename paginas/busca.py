@@ -0,0 +1,286 @@
+"""
+Busca textual das listagens (membros, programas de treino e avaliações).
+
+Cada model pesquisável herda de ``IndexadoParaBusca`` e declara em
+``campos_busca`` os campos que entram na busca. No save, esses valores são
+normalizados (minúsculas, sem acentos) e gravados na coluna ``texto_busca``,
+que é indexada conforme o banco:
+
+* PostgreSQL: índice GIN com ``gin_trgm_ops`` (extensão pg_trgm), que atende
+  ``LIKE '%termo%'``; a relevância vem de ``word_similarity``.
+* SQLite: tabela virtual FTS5 com tokenizador ``trigram`` sincronizada por
+  triggers; a relevância vem de ``bm25``.
+* Outros bancos (ou SQLite sem FTS5): ``LIKE`` sem índice e sem relevância.
+
+Os índices são criados (ou recriados) após cada ``migrate``, de modo que
+sobrevivem às reconstruções de tabela que o SQLite faz em migrações.
+``buscar`` é a única API usada pelas views.
+"""
+import logging
+import unicodedata
+from operator import attrgetter
+
+from django.apps import apps
+from django.db import DatabaseError, connections, models
+from django.db.models import FloatField, Value
+from django.db.models.expressions import RawSQL
+
+logger = logging.getLogger(__name__)
+
+# Termos menores que isto não usam o índice de trigramas
+TAMANHO_MINIMO_TRIGRAMA = 3
+
+# Tabelas com índice FTS5 já confirmado, por alias de banco
+_indices_fts = set()
+
+
+def normalizar(texto):
+    """Minúsculas, sem acentos e com espaços simples: "  João  " -> "joao"."""
+    if not texto:
+        return ''
+    decomposto = unicodedata.normalize('NFKD', str(texto))
+    sem_acentos = ''.join(c for c in decomposto if not unicodedata.combining(c))
+    return ' '.join(sem_acentos.casefold().split())
+
+
+def montar_texto_busca(obj, campos):
+    """Concatena os valores normalizados de ``campos`` (aceita "usuario.username")."""
+    partes = []
+    for campo in campos:
+        try:
+            valor = attrgetter(campo)(obj)
+        except (AttributeError, models.ObjectDoesNotExist):
+            valor = None
+        partes.append(normalizar(valor))
+    return ' '.join(parte for parte in partes if parte)
+
+
+class IndexadoParaBusca(models.Model):
+    """
+    Model abstrato para registros pesquisáveis por ``buscar``. As subclasses
+    definem ``campos_busca``; ``texto_busca`` é recalculado em todo save.
+    """
+    campos_busca = ()
+
+    texto_busca = models.TextField(default='', blank=True, editable=False)
+
+    class Meta:
+        abstract = True
+
+    def atualizar_texto_busca(self):
+        """Recalcula ``texto_busca``; retorna True se o valor mudou."""
+        texto = montar_texto_busca(self, self.campos_busca)
+        alterado = texto != self.texto_busca
+        self.texto_busca = texto
+        return alterado
+
+    def save(self, *args, **kwargs):
+        self.atualizar_texto_busca()
+        if kwargs.get('update_fields') is not None:
+            kwargs['update_fields'] = {*kwargs['update_fields'], 'texto_busca'}
+        super().save(*args, **kwargs)
+
+
+def preencher_texto_busca(model, campos, batch_size=500, using='default'):
+    """
+    Recalcula ``texto_busca`` de todos os registros de ``model`` em lotes,
+    gravando só os que mudaram. Aceita models históricos (migrações).
+    Retorna a quantidade de registros atualizados.
+    """
+    relacionados = sorted({campo.split('.')[0] for campo in campos if '.' in campo})
+    manager = model._default_manager.db_manager(using)
+    queryset = manager.select_related(*relacionados).order_by('pk')
+    alterados = []
+    total = 0
+    for obj in queryset.iterator(chunk_size=batch_size):
+        texto = montar_texto_busca(obj, campos)
+        if texto != obj.texto_busca:
+            obj.texto_busca = texto
+            alterados.append(obj)
+        if len(alterados) >= batch_size:
+            manager.bulk_update(alterados, ['texto_busca'])
+            total += len(alterados)
+            alterados = []
+    if alterados:
+        manager.bulk_update(alterados, ['texto_busca'])
+        total += len(alterados)
+    return total
+
+
+def models_pesquisaveis():
+    return [model for model in apps.get_models() if issubclass(model, IndexadoParaBusca)]
+
+
+# Índices por banco
+
+def _nome_fts(tabela):
+    return f'{tabela}_busca'
+
+
+def _sqlite_tem_fts5(connection):
+    with connection.cursor() as cursor:
+        try:
+            cursor.execute("CREATE VIRTUAL TABLE temp.teste_fts5 USING fts5(x, tokenize='trigram')")
+            cursor.execute('DROP TABLE temp.teste_fts5')
+        except DatabaseError:
+            return False
+    return True
+
+
+def _preparar_sqlite(connection, model):
+    tabela = model._meta.db_table
+    fts = _nome_fts(tabela)
+    pk = model._meta.pk.column
+    gatilhos = {
+        f'{fts}_ai': (
+            f'AFTER INSERT ON "{tabela}" BEGIN '
+            f'INSERT INTO "{fts}"(rowid, texto_busca) VALUES (new."{pk}", new.texto_busca); END'
+        ),
+        f'{fts}_ad': (
+            f'AFTER DELETE ON "{tabela}" BEGIN '
+            f'INSERT INTO "{fts}"("{fts}", rowid, texto_busca) VALUES (\'delete\', old."{pk}", old.texto_busca); END'
+        ),
+        f'{fts}_au': (
+            f'AFTER UPDATE OF texto_busca ON "{tabela}" BEGIN '
+            f'INSERT INTO "{fts}"("{fts}", rowid, texto_busca) VALUES (\'delete\', old."{pk}", old.texto_busca); '
+            f'INSERT INTO "{fts}"(rowid, texto_busca) VALUES (new."{pk}", new.texto_busca); END'
+        ),
+    }
+    with connection.cursor() as cursor:
+        cursor.execute(
+            f'CREATE VIRTUAL TABLE IF NOT EXISTS "{fts}" USING fts5('
+            f'texto_busca, content=\'{tabela}\', content_rowid=\'{pk}\', tokenize=\'trigram\')'
+        )
+        cursor.execute(
+            "SELECT name FROM sqlite_master WHERE type = 'trigger' AND tbl_name = %s", [tabela]
+        )
+        existentes = {linha[0] for linha in cursor.fetchall()}
+        if existentes.issuperset(gatilhos):
+            return
+        # Triggers ausentes (tabela nova ou reconstruída por uma migração):
+        # recria tudo e reindexa a partir da tabela de conteúdo
+        for nome, corpo in gatilhos.items():
+            cursor.execute(f'DROP TRIGGER IF EXISTS "{nome}"')
+            cursor.execute(f'CREATE TRIGGER "{nome}" {corpo}')
+        cursor.execute(f'INSERT INTO "{fts}"("{fts}") VALUES (\'rebuild\')')
+
+
+def _preparar_postgresql(connection, model):
+    tabela = model._meta.db_table
+    with connection.cursor() as cursor:
+        cursor.execute('CREATE EXTENSION IF NOT EXISTS pg_trgm')
+        cursor.execute(
+            f'CREATE INDEX IF NOT EXISTS "{tabela}_busca_trgm" '
+            f'ON "{tabela}" USING gin (texto_busca gin_trgm_ops)'
+        )
+
+
+def preparar_indices(using='default', **kwargs):
+    """
+    Cria (se necessário) os índices de busca de todos os models pesquisáveis.
+    Conectado ao sinal post_migrate; é idempotente.
+    """
+    connection = connections[using]
+    if connection.vendor == 'sqlite':
+        if not _sqlite_tem_fts5(connection):
+            logger.warning('SQLite sem FTS5 (trigram); a busca usará LIKE sem índice.')
+            return
+        preparar = _preparar_sqlite
+    elif connection.vendor == 'postgresql':
+        preparar = _preparar_postgresql
+    else:
+        return
+
+    with connection.cursor() as cursor:
+        tabelas = set(connection.introspection.table_names(cursor))
+    for model in models_pesquisaveis():
+        tabela = model._meta.db_table
+        if tabela not in tabelas:
+            continue
+        with connection.cursor() as cursor:
+            colunas = {coluna.name for coluna in connection.introspection.get_table_description(cursor, tabela)}
+        if 'texto_busca' not in colunas:
+            # Banco migrado para antes da coluna (migrate para trás)
+            continue
+        try:
+            preparar(connection, model)
+        except DatabaseError:
+            logger.exception('Não foi possível criar o índice de busca de %s.', model._meta.label)
+
+
+def _usa_fts(connection, tabela):
+    chave = (connection.alias, tabela)
+    if chave not in _indices_fts:
+        with connection.cursor() as cursor:
+            cursor.execute(
+                "SELECT 1 FROM sqlite_master WHERE type = 'table' AND name = %s", [_nome_fts(tabela)]
+            )
+            if cursor.fetchone() is None:
+                return False
+        _indices_fts.add(chave)
+    return True
+
+
+# Consulta
+
+def buscar(queryset, termo):
+    """
+    Filtra ``queryset`` pelos registros que contêm todas as palavras de
+    ``termo`` (em qualquer parte, sem diferenciar acentos e maiúsculas) e
+    anota ``relevancia`` (maior = melhor).
+    """
+    termos = normalizar(termo).split()
+    if not termos:
+        return queryset.annotate(relevancia=Value(0.0, output_field=FloatField()))
+
+    tabela = queryset.model._meta.db_table
+    connection = connections[queryset.db]
+    longos = [t for t in termos if len(t) >= TAMANHO_MINIMO_TRIGRAMA]
+    curtos = [t for t in termos if len(t) < TAMANHO_MINIMO_TRIGRAMA]
+
+    for parte in curtos:
+        queryset = queryset.filter(texto_busca__contains=parte)
+
+    if connection.vendor == 'sqlite' and longos and _usa_fts(connection, tabela):
+        fts = _nome_fts(tabela)
+        pk = queryset.model._meta.pk.column
+        consulta = ' AND '.join('"%s"' % parte.replace('"', '""') for parte in longos)
+        queryset = queryset.filter(
+            pk__in=RawSQL(f'SELECT rowid FROM "{fts}" WHERE "{fts}" MATCH %s', [consulta])
+        )
+        relevancia = RawSQL(
+            f'SELECT -bm25("{fts}") FROM "{fts}" WHERE "{fts}" MATCH %s AND rowid = "{tabela}"."{pk}"',
+            [consulta],
+            output_field=FloatField(),
+        )
+        return queryset.annotate(relevancia=relevancia)
+
+    for parte in longos:
+        queryset = queryset.filter(texto_busca__contains=parte)
+
+    if connection.vendor == 'postgresql':
+        from django.contrib.postgres.search import TrigramWordSimilarity
+        relevancia = TrigramWordSimilarity(' '.join(termos), 'texto_busca')
+    else:
+        relevancia = Value(0.0, output_field=FloatField())
+    return queryset.annotate(relevancia=relevancia)
+
+
+class BuscaMixin:
+    """
+    Mixin para ListView com CursorPaginationMixin: aplica ``buscar`` com o
+    parâmetro ``busca_param`` e, quando há termo, ordena por relevância.
+    """
+    busca_param = 'q'
+
+    def get_termo_busca(self):
+        return self.request.GET.get(self.busca_param, '').strip()
+
+    def filtrar_busca(self, queryset):
+        termo = self.get_termo_busca()
+        return buscar(queryset, termo) if termo else queryset
+
+    def get_cursor_ordering(self):
+        if self.get_termo_busca():
+            return ('-relevancia', '-id')
+        return super().get_cursor_ordering()
@@ -0,0 +1,288 @@
+"""
+Geração de uma academia sintética para testes de desempenho.
+
+Cria usuários com Perfil e matrícula, histórico de IMC, avaliações físicas,
+programas de treinamento e eventos do calendário, sempre com ``bulk_create``
+em lotes. Tudo deriva de uma única semente e de uma data de referência, de
+modo que duas execuções com os mesmos parâmetros sobre o mesmo banco geram os
+mesmos dados.
+
+Como ``bulk_create`` não chama ``save()`` nem dispara sinais, os campos que o
+save calcularia (IMC, texto de busca, nome normalizado, fim da série) são
+preenchidos aqui, e os resumos/caches derivados são refeitos no final.
+"""
+import random
+from datetime import datetime, time as dt_time, timedelta
+from decimal import Decimal
+
+from django.contrib.auth.hashers import make_password
+from django.contrib.auth.models import User
+from django.db import transaction
+from django.utils import timezone
+
+from cadastros.models import Avaliacao, Exercicio, TrainingExercicio
+from tasks import cache as tasks_cache
+from tasks import recorrencia
+from tasks.models import Task
+from usuarios import matriculas, typeahead
+from usuarios.models import IMCRegistro, MatriculaDisponivel, Perfil, ResumoIMC
+
+from .busca import montar_texto_busca, normalizar
+
+# Registros gravados por INSERT
+TAMANHO_BLOCO = 1000
+
+SENHA_PADRAO = 'academia123'
+
+NOMES = (
+    'Ana', 'João', 'Maria', 'José', 'Francisca', 'Antônio', 'Luiza', 'Pedro', 'Júlia', 'Lucas',
+    'Mariana', 'Gabriel', 'Beatriz', 'Rafael', 'Letícia', 'Carlos', 'Camila', 'Paulo', 'Fernanda', 'Mateus',
+)
+SOBRENOMES = (
+    'Silva', 'Santos', 'Oliveira', 'Souza', 'Lima', 'Pereira', 'Costa', 'Ferreira', 'Araújo', 'Rodrigues',
+    'Almeida', 'Nascimento', 'Carvalho', 'Gomes', 'Martins', 'Ribeiro', 'Barbosa', 'Rocha',
+)
+EXERCICIOS = (
+    ('Supino reto', 'Força'), ('Agachamento livre', 'Força'), ('Levantamento terra', 'Força'),
+    ('Remada curvada', 'Força'), ('Desenvolvimento', 'Força'), ('Rosca direta', 'Força'),
+    ('Esteira', 'Cardio'), ('Bicicleta ergométrica', 'Cardio'), ('Remo ergômetro', 'Cardio'),
+    ('Alongamento posterior', 'Flexibilidade'), ('Mobilidade de quadril', 'Flexibilidade'),
+)
+GRUPOS = ('Peito', 'Costas', 'Pernas', 'Ombros', 'Braços', 'Abdômen', 'Corpo inteiro')
+PROGRAMAS = ('Treino A', 'Treino B', 'Treino C', 'Hipertrofia', 'Resistência', 'Emagrecimento', 'Iniciante')
+EVENTOS = ('Aula de spinning', 'Funcional', 'Yoga', 'Pilates', 'Avaliação coletiva', 'Zumba', 'Circuito')
+
+# Medidas da avaliação física: (campo, mínimo, máximo) em cm
+MEDIDAS_AVALIACAO = (
+    ('pescoco', 30, 45), ('ombro_dir', 100, 130), ('ombro_esq', 100, 130),
+    ('braco_relaxado_dir', 25, 40), ('braco_relaxado_esq', 25, 40),
+    ('braco_contraido_dir', 27, 45), ('braco_contraido_esq', 27, 45),
+    ('antebraco_dir', 22, 35), ('antebraco_esq', 22, 35),
+    ('torax_relaxado', 80, 120), ('torax_contraido', 85, 125), ('cintura', 60, 110), ('quadril', 80, 120),
+    ('coxa_dir', 45, 70), ('coxa_esq', 45, 70), ('panturrilha_dir', 30, 45), ('panturrilha_esq', 30, 45),
+)
+
+
+def _decimal(valor):
+    return Decimal(f'{valor:.2f}')
+
+
+class GeradorAcademia:
+    """
+    Gera os dados em lotes de ``lote`` usuários, cada lote em uma transação.
+    ``usuarios_existem`` deve ser checado antes: os usernames são derivados
+    de ``prefixo`` e não podem colidir com os já cadastrados.
+    """
+
+    def __init__(
+        self, usuarios=1000, anos=2, imc_por_mes=1, avaliacoes=2, programas=3, eventos=200,
+        staff=5, semente=0, prefixo='membro', data_referencia=None, lote=1000,
+    ):
+        self.usuarios = usuarios
+        self.anos = anos
+        self.imc_por_mes = imc_por_mes
+        self.avaliacoes = avaliacoes
+        self.programas = programas
+        self.eventos = eventos
+        self.staff = staff
+        self.prefixo = prefixo
+        self.lote = lote
+        self.hoje = data_referencia or timezone.localdate()
+        self.aleatorio = random.Random(semente)
+        self.senha = make_password(SENHA_PADRAO, salt=f'sintetico{semente}')
+        self.exercicios = []
+        self.totais = dict.fromkeys(
+            ('usuarios', 'imc', 'avaliacoes', 'programas', 'eventos'), 0
+        )
+
+    def usuarios_existem(self):
+        return User.objects.filter(username__startswith=self.prefixo).exists()
+
+    def gerar(self, progresso=None):
+        """Gera tudo e retorna a quantidade de registros por tipo."""
+        self.exercicios = self._garantir_exercicios()
+        staff = self._gerar_staff()
+        for inicio in range(0, self.usuarios, self.lote):
+            quantidade = min(self.lote, self.usuarios - inicio)
+            with transaction.atomic():
+                self._gerar_lote(inicio, quantidade, self.exercicios)
+            if progresso:
+                progresso(inicio + quantidade)
+        with transaction.atomic():
+            self._gerar_eventos(staff)
+
+        ResumoIMC.reconstruir_todos(batch_size=TAMANHO_BLOCO)
+        tasks_cache.invalidar()
+        typeahead.limpar_cache()
+        return self.totais
+
+    # Usuários
+
+    def _nome(self):
+        return (
+            self.aleatorio.choice(NOMES),
+            f'{self.aleatorio.choice(SOBRENOMES)} {self.aleatorio.choice(SOBRENOMES)}',
+        )
+
+    def _criar_usuarios(self, usernames, **extras):
+        nomes = [self._nome() for _ in usernames]
+        inicio_periodo = self.hoje - timedelta(days=365 * self.anos)
+        usuarios = [
+            User(
+                username=username, first_name=primeiro, last_name=ultimo, password=self.senha,
+                email=f'{username}@exemplo.com',
+                date_joined=timezone.make_aware(datetime.combine(
+                    inicio_periodo + timedelta(days=self.aleatorio.randrange(365 * self.anos or 1)), dt_time(8)
+                )),
+                **extras,
+            )
+            for username, (primeiro, ultimo) in zip(usernames, nomes)
+        ]
+        User.objects.bulk_create(usuarios, batch_size=TAMANHO_BLOCO)
+        if any(usuario.pk is None for usuario in usuarios):
+            # Bancos que não devolvem as chaves no bulk_create
+            ids = dict(User.objects.filter(username__in=usernames).values_list('username', 'pk'))
+            for usuario in usuarios:
+                usuario.pk = ids[usuario.username]
+        return usuarios
+
+    def _gerar_staff(self):
+        usernames = [f'{self.prefixo}-staff{n:03d}' for n in range(self.staff)]
+        return self._criar_usuarios(usernames, is_staff=True)
+
+    def _gerar_perfis(self, usuarios):
+        ano = self.hoje.year
+        numeros = matriculas.reservar_numeros(ano, len(usuarios))
+        perfis = []
+        for usuario, numero in zip(usuarios, numeros):
+            perfil = Perfil(
+                usuario=usuario,
+                nome_completo=f'{usuario.first_name} {usuario.last_name}'[:50],
+                email=usuario.email,
+                matricula=matriculas.formatar_matricula(ano, numero),
+            )
+            perfil.nome_normalizado = normalizar(perfil.nome_completo)[:100]
+            perfil.texto_busca = montar_texto_busca(perfil, Perfil.campos_busca)
+            perfis.append(perfil)
+        Perfil.objects.bulk_create(perfis, batch_size=TAMANHO_BLOCO)
+        MatriculaDisponivel.objects.bulk_create(
+            [MatriculaDisponivel(matricula=perfil.matricula, utilizada=True) for perfil in perfis],
+            batch_size=TAMANHO_BLOCO,
+        )
+        return perfis
+
+    def _gerar_lote(self, inicio, quantidade, exercicios):
+        usernames = [f'{self.prefixo}{n:07d}' for n in range(inicio, inicio + quantidade)]
+        usuarios = self._criar_usuarios(usernames)
+        perfis = self._gerar_perfis(usuarios)
+
+        registros, avaliacoes, programas = [], [], []
+        for usuario, perfil in zip(usuarios, perfis):
+            altura = round(self.aleatorio.uniform(1.50, 1.95), 2)
+            peso = self.aleatorio.uniform(55, 110)
+            registros.extend(self._historico_imc(usuario, altura, peso))
+            avaliacoes.extend(self._avaliacoes(usuario, perfil, altura, peso))
+            programas.extend(self._programas(usuario, exercicios))
+
+        IMCRegistro.objects.bulk_create(registros, batch_size=TAMANHO_BLOCO)
+        Avaliacao.objects.bulk_create(avaliacoes, batch_size=TAMANHO_BLOCO)
+        TrainingExercicio.objects.bulk_create(programas, batch_size=TAMANHO_BLOCO)
+        self.totais['usuarios'] += len(usuarios)
+        self.totais['imc'] += len(registros)
+        self.totais['avaliacoes'] += len(avaliacoes)
+        self.totais['programas'] += len(programas)
+
+    # Histórico
+
+    def _historico_imc(self, usuario, altura, peso):
+        """Um passeio aleatório de peso desde o ingresso, ``imc_por_mes`` vezes por mês."""
+        if not self.imc_por_mes:
+            return []
+        passo = timedelta(days=30 / self.imc_por_mes)
+        data = usuario.date_joined
+        fim = timezone.make_aware(datetime.combine(self.hoje, dt_time(23, 59)))
+        registros = []
+        while data <= fim:
+            peso = min(max(peso + self.aleatorio.uniform(-1.5, 1.2), 40), 180)
+            peso_registro = round(peso, 1)
+            registros.append(IMCRegistro(
+                user=usuario, peso=peso_registro, altura=altura,
+                imc=peso_registro / (altura ** 2), data_registro=data,
+            ))
+            data += passo
+        return registros
+
+    def _avaliacoes(self, usuario, perfil, altura, peso):
+        avaliacoes = []
+        dias = max((self.hoje - usuario.date_joined.date()).days, 1)
+        for _ in range(self.avaliacoes):
+            avaliacao = Avaliacao(
+                nome_completo=perfil.nome_completo,
+                usuario=usuario,
+                data=usuario.date_joined.date() + timedelta(days=self.aleatorio.randrange(dias)),
+                hora=dt_time(self.aleatorio.randrange(6, 22), self.aleatorio.choice((0, 30))),
+                idade=self.aleatorio.randrange(16, 70),
+                peso=_decimal(peso + self.aleatorio.uniform(-5, 5)),
+                altura=_decimal(altura),
+                **{
+                    campo: _decimal(self.aleatorio.uniform(minimo, maximo))
+                    for campo, minimo, maximo in MEDIDAS_AVALIACAO
+                },
+            )
+            avaliacao.texto_busca = montar_texto_busca(avaliacao, Avaliacao.campos_busca)
+            avaliacoes.append(avaliacao)
+        return avaliacoes
+
+    def _programas(self, usuario, exercicios):
+        programas = []
+        for _ in range(self.programas):
+            programa = TrainingExercicio(
+                usuario=usuario,
+                exercicio_id=self.aleatorio.choice(exercicios),
+                nome_programa=f'{self.aleatorio.choice(PROGRAMAS)} {self.aleatorio.randrange(1, 10)}',
+                grupo=self.aleatorio.choice(GRUPOS),
+                series=self.aleatorio.randrange(2, 6),
+                repeticoes=self.aleatorio.choice((8, 10, 12, 15)),
+                carga=self.aleatorio.randrange(0, 120, 5),
+                tempo=self.aleatorio.randrange(0, 60, 5),
+            )
+            programa.texto_busca = montar_texto_busca(programa, TrainingExercicio.campos_busca)
+            programas.append(programa)
+        return programas
+
+    def _garantir_exercicios(self):
+        existentes = set(Exercicio.objects.values_list('nome', flat=True))
+        Exercicio.objects.bulk_create(
+            [Exercicio(nome=nome, tipo=tipo) for nome, tipo in EXERCICIOS if nome not in existentes]
+        )
+        return list(Exercicio.objects.order_by('pk').values_list('pk', flat=True))
+
+    # Calendário
+
+    def _gerar_eventos(self, staff):
+        if not staff:
+            return
+        inicio_periodo = self.hoje - timedelta(days=365 * self.anos)
+        dias = (self.hoje - inicio_periodo).days + 90
+        tarefas = []
+        for _ in range(self.eventos):
+            inicio = inicio_periodo + timedelta(days=self.aleatorio.randrange(dias))
+            hora = self.aleatorio.randrange(6, 21)
+            tarefa = Task(
+                title=self.aleatorio.choice(EVENTOS),
+                description='Evento gerado para testes de desempenho.',
+                start_date=inicio,
+                end_date=inicio,
+                start_time=dt_time(hora),
+                end_time=dt_time(hora + 1),
+                total_subs=self.aleatorio.choice((0, 10, 20, 30)),
+                usuario=self.aleatorio.choice(staff),
+            )
+            # Uma em cada dez é uma aula semanal de alguns meses
+            if self.aleatorio.random() < 0.1:
+                tarefa.recorrencia = recorrencia.SEMANAL
+                tarefa.recorrencia_fim = inicio + timedelta(weeks=self.aleatorio.randrange(4, 27))
+            tarefa.fim_serie = recorrencia.fim_serie(tarefa)
+            tarefas.append(tarefa)
+        Task.objects.bulk_create(tarefas, batch_size=TAMANHO_BLOCO)
+        self.totais['eventos'] += len(tarefas)
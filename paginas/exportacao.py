@@ -0,0 +1,162 @@
+"""
+Exportações em CSV transmitidas em streaming.
+
+As linhas são escritas e enviadas ao cliente à medida que são geradas, sem
+montar o arquivo inteiro em memória; o primeiro byte sai antes de a consulta
+terminar de ser percorrida. Consultas são percorridas com ``values_list`` e
+``iterator(chunk_size=...)``: nenhuma instância de model é criada e, no
+PostgreSQL, as linhas vêm de um cursor do lado do servidor, de modo que a
+memória do worker não cresce com o tamanho da tabela.
+"""
+import csv
+import datetime
+from decimal import Decimal
+from itertools import islice
+
+from asgiref.sync import sync_to_async
+from django.core.handlers.asgi import ASGIRequest
+from django.http import HttpResponseBadRequest, StreamingHttpResponse
+from django.utils import timezone
+from django.utils.dateparse import parse_date
+
+# BOM para o Excel reconhecer o arquivo como UTF-8
+BOM_UTF8 = '﻿'
+
+# Linhas buscadas por vez no banco
+CHUNK_EXPORTACAO = 2000
+
+# Linhas CSV enviadas por vez quando a resposta é servida via ASGI
+LINHAS_POR_BLOCO = 500
+
+# Início de célula que o Excel/LibreOffice interpretam como fórmula
+PREFIXOS_FORMULA = ('=', '+', '-', '@', '\t', '\r')
+
+
+class _Eco:
+    """Objeto "arquivo" que apenas devolve o que o csv.writer escreve."""
+
+    def write(self, valor):
+        return valor
+
+
+def linhas_csv(cabecalho, linhas):
+    """Gera o conteúdo CSV (cabeçalho e linhas) linha a linha."""
+    escritor = csv.writer(_Eco(), delimiter=';')
+    yield BOM_UTF8 + escritor.writerow(cabecalho)
+    for linha in linhas:
+        yield escritor.writerow(linha)
+
+
+async def _blocos_async(conteudo):
+    """
+    Versão assíncrona de ``conteudo``: sob ASGI, o Django lê iteradores
+    síncronos inteiros para a memória antes de enviá-los. Os blocos são
+    gerados na thread da requisição, a mesma da conexão com o banco.
+    """
+    iterador = iter(conteudo)
+    proximo_bloco = sync_to_async(lambda: ''.join(islice(iterador, LINHAS_POR_BLOCO)))
+    while bloco := await proximo_bloco():
+        yield bloco
+
+
+def resposta_csv(nome_arquivo, cabecalho, linhas, request=None):
+    """
+    Resposta HTTP em streaming com um CSV para download. ``linhas`` pode ser
+    qualquer iterável (de preferência um gerador ou ``QuerySet.iterator()``).
+    Passe ``request`` para que o streaming também funcione sob ASGI.
+    """
+    conteudo = linhas_csv(cabecalho, linhas)
+    if isinstance(request, ASGIRequest):
+        conteudo = _blocos_async(conteudo)
+    resposta = StreamingHttpResponse(conteudo, content_type='text/csv; charset=utf-8')
+    resposta['Content-Disposition'] = f'attachment; filename="{nome_arquivo}"'
+    return resposta
+
+
+def formatar_valor(valor):
+    """
+    Formata um valor do banco para a planilha (datas e decimais no padrão
+    brasileiro). Textos que começam como fórmula recebem um apóstrofo na
+    frente, para não serem executados ao abrir o arquivo (injeção de CSV).
+    """
+    if valor is None:
+        return ''
+    if isinstance(valor, str):
+        return f"'{valor}" if valor.startswith(PREFIXOS_FORMULA) else valor
+    if isinstance(valor, datetime.datetime):
+        if timezone.is_aware(valor):
+            valor = timezone.localtime(valor)
+        return valor.strftime('%d/%m/%Y %H:%M')
+    if isinstance(valor, datetime.date):
+        return valor.strftime('%d/%m/%Y')
+    if isinstance(valor, datetime.time):
+        return valor.strftime('%H:%M')
+    if isinstance(valor, float):
+        return f'{valor:.2f}'.replace('.', ',')
+    if isinstance(valor, Decimal):
+        return str(valor).replace('.', ',')
+    return valor
+
+
+def linhas_queryset(queryset, campos, chunk_size=CHUNK_EXPORTACAO):
+    """Gera as linhas formatadas de ``queryset`` com os ``campos`` (caminhos com ``__``)."""
+    for linha in queryset.values_list(*campos).iterator(chunk_size=chunk_size):
+        yield [formatar_valor(valor) for valor in linha]
+
+
+def rotulo_campo(model, caminho):
+    """Rótulo de coluna a partir do verbose_name do campo em ``caminho``."""
+    *relacoes, nome = caminho.split('__')
+    for relacao in relacoes:
+        model = model._meta.get_field(relacao).related_model
+    return str(model._meta.get_field(nome).verbose_name).capitalize()
+
+
+def intervalo_datas(request):
+    """
+    Lê o intervalo de datas dos parâmetros ``de`` e ``ate`` (AAAA-MM-DD,
+    ambos opcionais). Levanta ValueError se algum for inválido.
+    """
+    datas = []
+    for parametro in ('de', 'ate'):
+        texto = request.GET.get(parametro, '').strip()
+        data = parse_date(texto) if texto else None
+        if texto and data is None:
+            raise ValueError(parametro)
+        datas.append(data)
+    return tuple(datas)
+
+
+class ExportacaoCSVMixin:
+    """
+    Mixin para as ListViews: o GET responde com um CSV do ``get_queryset()``
+    da lista (e portanto com os mesmos filtros e permissões), transmitido em
+    streaming. Cada item de ``campos_exportacao`` é o caminho do campo ou
+    (caminho, rótulo da coluna). ``campo_data_exportacao`` (DateField)
+    habilita o filtro pelos parâmetros ``de`` e ``ate``.
+    """
+    campos_exportacao = ()
+    nome_arquivo_exportacao = 'exportacao.csv'
+    campo_data_exportacao = None
+
+    def get(self, request, *args, **kwargs):
+        try:
+            de, ate = intervalo_datas(request)
+        except ValueError:
+            return HttpResponseBadRequest('Os parâmetros de e ate devem estar no formato AAAA-MM-DD.')
+
+        queryset = self.get_queryset()
+        if self.campo_data_exportacao:
+            if de:
+                queryset = queryset.filter(**{f'{self.campo_data_exportacao}__gte': de})
+            if ate:
+                queryset = queryset.filter(**{f'{self.campo_data_exportacao}__lte': ate})
+
+        campos, cabecalho = [], []
+        for item in self.campos_exportacao:
+            campo, rotulo = (item, None) if isinstance(item, str) else item
+            campos.append(campo)
+            cabecalho.append(rotulo or rotulo_campo(queryset.model, campo))
+        return resposta_csv(
+            self.nome_arquivo_exportacao, cabecalho, linhas_queryset(queryset, campos), request,
+        )
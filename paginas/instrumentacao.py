@@ -0,0 +1,183 @@
+"""
+Instrumentação por requisição: quantidade de consultas, tempo no banco,
+tempo de renderização de templates e tempo total.
+
+As medições de uma requisição ficam num ``Medicao`` guardado em uma
+ContextVar, de modo que também valem para views async (as consultas rodam em
+outra thread, mas herdam o contexto). As consultas são cronometradas por um
+execute_wrapper instalado em cada conexão nova; os templates, pelo backend
+``TemplatesInstrumentados``. Fora de uma medição, ambos só repassam a chamada.
+
+``InstrumentacaoMiddleware`` mede uma amostra das requisições, devolve os
+números no cabeçalho Server-Timing, registra uma linha de log por requisição e
+marca com WARNING as que passam dos limites configurados. ``medir()`` expõe a
+mesma medição para o shell e os benchmarks.
+"""
+import contextvars
+import logging
+import random
+import time
+from contextlib import contextmanager
+
+from asgiref.sync import iscoroutinefunction, markcoroutinefunction
+from django.conf import settings
+from django.core.exceptions import MiddlewareNotUsed
+from django.template.backends.django import DjangoTemplates, Template
+
+logger = logging.getLogger(__name__)
+
+_medicao_atual = contextvars.ContextVar('medicao_atual', default=None)
+
+
+class Medicao:
+    """Números acumulados durante uma requisição (tempos em milissegundos)."""
+
+    def __init__(self):
+        self.consultas = 0
+        self.banco_ms = 0.0
+        self.template_ms = 0.0
+        self.total_ms = 0.0
+        self.view = ''
+        self._renderizacoes = 0
+        self._inicio = time.perf_counter()
+
+    def finalizar(self):
+        self.total_ms = (time.perf_counter() - self._inicio) * 1000
+
+    def server_timing(self):
+        return (
+            f'db;dur={self.banco_ms:.1f};desc="{self.consultas} consulta(s)", '
+            f'tpl;dur={self.template_ms:.1f}, total;dur={self.total_ms:.1f}'
+        )
+
+
+@contextmanager
+def medir():
+    """Mede o bloco: ``with medir() as medicao: ...``."""
+    medicao = Medicao()
+    token = _medicao_atual.set(medicao)
+    try:
+        yield medicao
+    finally:
+        _medicao_atual.reset(token)
+        medicao.finalizar()
+
+
+# Consultas
+
+def _cronometrar_consulta(execute, sql, params, many, context):
+    medicao = _medicao_atual.get()
+    if medicao is None:
+        return execute(sql, params, many, context)
+    inicio = time.perf_counter()
+    try:
+        return execute(sql, params, many, context)
+    finally:
+        medicao.consultas += 1
+        medicao.banco_ms += (time.perf_counter() - inicio) * 1000
+
+
+def instalar_cronometro(sender=None, connection=None, **kwargs):
+    """Conectado ao sinal connection_created."""
+    if _cronometrar_consulta not in connection.execute_wrappers:
+        connection.execute_wrappers.append(_cronometrar_consulta)
+
+
+# Templates
+
+class TemplateInstrumentado(Template):
+    def render(self, context=None, request=None):
+        medicao = _medicao_atual.get()
+        if medicao is None:
+            return super().render(context, request)
+        # Só a renderização mais externa conta (render_to_string aninhado)
+        medicao._renderizacoes += 1
+        inicio = time.perf_counter()
+        try:
+            return super().render(context, request)
+        finally:
+            medicao._renderizacoes -= 1
+            if not medicao._renderizacoes:
+                medicao.template_ms += (time.perf_counter() - inicio) * 1000
+
+
+class TemplatesInstrumentados(DjangoTemplates):
+    """Backend DjangoTemplates que cronometra as renderizações."""
+
+    def from_string(self, template_code):
+        return TemplateInstrumentado(super().from_string(template_code).template, self)
+
+    def get_template(self, template_name):
+        return TemplateInstrumentado(super().get_template(template_name).template, self)
+
+
+# Middleware
+
+def _nome_view(view_func):
+    alvo = getattr(view_func, 'view_class', view_func)
+    return f'{alvo.__module__}.{alvo.__qualname__}'
+
+
+class InstrumentacaoMiddleware:
+    """
+    Mede a fração ``INSTRUMENTACAO_AMOSTRAGEM`` das requisições (0 desliga).
+    Deve ser o primeiro middleware, para que o tempo total inclua os demais.
+    """
+    sync_capable = True
+    async_capable = True
+
+    def __init__(self, get_response):
+        self.amostragem = getattr(settings, 'INSTRUMENTACAO_AMOSTRAGEM', 0)
+        if self.amostragem <= 0:
+            raise MiddlewareNotUsed
+        self.limite_consultas = getattr(settings, 'INSTRUMENTACAO_LIMITE_CONSULTAS', 30)
+        self.limite_ms = getattr(settings, 'INSTRUMENTACAO_LIMITE_MS', 500)
+        self.get_response = get_response
+        if iscoroutinefunction(get_response):
+            markcoroutinefunction(self)
+
+    def _amostrar(self):
+        return self.amostragem >= 1 or random.random() < self.amostragem
+
+    def __call__(self, request):
+        if iscoroutinefunction(self):
+            return self.__acall__(request)
+        if not self._amostrar():
+            return self.get_response(request)
+        with medir() as medicao:
+            response = self.get_response(request)
+        self._registrar(request, response, medicao)
+        return response
+
+    async def __acall__(self, request):
+        if not self._amostrar():
+            return await self.get_response(request)
+        with medir() as medicao:
+            response = await self.get_response(request)
+        self._registrar(request, response, medicao)
+        return response
+
+    def _registrar(self, request, response, medicao):
+        if request.resolver_match is not None:
+            medicao.view = _nome_view(request.resolver_match.func)
+        response.headers['Server-Timing'] = medicao.server_timing()
+        excedeu = medicao.consultas > self.limite_consultas or medicao.total_ms > self.limite_ms
+        logger.log(
+            logging.WARNING if excedeu else logging.INFO,
+            'metodo=%s caminho=%s status=%s view=%s consultas=%d banco_ms=%.1f '
+            'template_ms=%.1f total_ms=%.1f acima_do_limite=%s',
+            request.method, request.path, response.status_code, medicao.view or '-',
+            medicao.consultas, medicao.banco_ms, medicao.template_ms, medicao.total_ms,
+            'sim' if excedeu else 'nao',
+            extra={
+                'metodo': request.method,
+                'caminho': request.path,
+                'status': response.status_code,
+                'view': medicao.view,
+                'consultas': medicao.consultas,
+                'banco_ms': round(medicao.banco_ms, 1),
+                'template_ms': round(medicao.template_ms, 1),
+                'total_ms': round(medicao.total_ms, 1),
+                'acima_do_limite': excedeu,
+            },
+        )
@@ -0,0 +1,141 @@
+import logging
+from pathlib import Path
+
+from django.conf import settings
+from django.core.management.base import BaseCommand, CommandError
+from django.test.utils import override_settings, setup_test_environment, teardown_test_environment
+
+from paginas import benchmark
+
+BASELINE_PADRAO = Path(settings.BASE_DIR) / 'benchmarks' / 'baseline.json'
+
+
+class Command(BaseCommand):
+    help = (
+        'Mede latência (p50/p95/p99), vazão e consultas por requisição das jornadas '
+        'principais, com o cliente de testes (banco de testes descartável) ou contra '
+        'um servidor local (--url). Pode salvar e comparar baselines.'
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--url',
+            help='Servidor a medir (ex.: http://localhost:8000). Sem ela, usa o cliente de testes. '
+                 'O servidor deve ter INSTRUMENTACAO_AMOSTRAGEM=1 para medir as consultas.',
+        )
+        parser.add_argument('--usuario', help='Usuário staff do servidor (obrigatório com --url).')
+        parser.add_argument('--senha', help='Senha do usuário (obrigatória com --url).')
+        parser.add_argument(
+            '--exercicio', type=int,
+            help='Id de um Exercicio do servidor, para a jornada criar_programa (com --url).',
+        )
+        parser.add_argument(
+            '--dono-programa', type=int,
+            help='Id do usuário que recebe os programas criados pela jornada criar_programa (com --url).',
+        )
+        parser.add_argument(
+            '--jornada', action='append', choices=list(benchmark.JORNADAS), dest='jornadas',
+            help='Jornada a medir (pode repetir; padrão: todas).',
+        )
+        parser.add_argument('--iteracoes', type=int, default=50, help='Requisições por jornada (padrão: 50).')
+        parser.add_argument('--aquecimento', type=int, default=5, help='Requisições descartadas (padrão: 5).')
+        parser.add_argument(
+            '--concorrencia', type=int, default=1,
+            help='Clientes simultâneos (só com --url; padrão: 1).',
+        )
+        parser.add_argument(
+            '--membros', type=int, default=500,
+            help='Perfis criados no banco de testes (padrão: 500).',
+        )
+        parser.add_argument('--semente', type=int, default=0, help='Semente dos dados gerados (padrão: 0).')
+        parser.add_argument(
+            '--salvar', nargs='?', const=BASELINE_PADRAO, type=Path,
+            help=f'Salva o resultado como baseline (padrão: {BASELINE_PADRAO.relative_to(settings.BASE_DIR)}).',
+        )
+        parser.add_argument(
+            '--comparar', nargs='?', const=BASELINE_PADRAO, type=Path,
+            help='Compara com um baseline e falha se houver regressão.',
+        )
+        parser.add_argument(
+            '--tolerancia', type=float, default=0.2,
+            help='Aumento de p95 tolerado na comparação (padrão: 0.2 = 20%%).',
+        )
+
+    def handle(self, *args, **options):
+        if options['iteracoes'] < 1 or options['concorrencia'] < 1:
+            raise CommandError('--iteracoes e --concorrencia devem ser maiores que zero.')
+        if options['comparar'] and not options['comparar'].exists():
+            raise CommandError(f"Baseline não encontrado: {options['comparar']}")
+        jornadas = options['jornadas'] or list(benchmark.JORNADAS)
+
+        if options['url']:
+            resultados = self._medir_servidor(options, jornadas)
+            parametros = {'modo': 'http', 'concorrencia': options['concorrencia']}
+        else:
+            if options['concorrencia'] != 1:
+                raise CommandError('--concorrencia só pode ser usada com --url.')
+            resultados = self._medir_cliente(options, jornadas)
+            parametros = {'modo': 'cliente', 'membros': options['membros'], 'semente': options['semente']}
+        parametros.update(iteracoes=options['iteracoes'], banco=settings.DATABASES['default']['ENGINE'])
+
+        self._imprimir(resultados)
+
+        if options['salvar']:
+            benchmark.salvar_baseline(options['salvar'], resultados, parametros)
+            self.stdout.write(f"Baseline salvo em {options['salvar']}.")
+
+        if options['comparar']:
+            linhas, regressoes = benchmark.comparar_baseline(options['comparar'], resultados, options['tolerancia'])
+            for linha in linhas:
+                self.stdout.write(linha)
+            if regressoes:
+                raise CommandError('Regressões em relação ao baseline:\n' + '\n'.join(regressoes))
+            self.stdout.write(self.style.SUCCESS('Sem regressões em relação ao baseline.'))
+
+    def _medir_servidor(self, options, jornadas):
+        if not (options['usuario'] and options['senha']):
+            raise CommandError('--usuario e --senha são obrigatórios com --url.')
+        if 'criar_programa' in jornadas and not (options['exercicio'] and options['dono_programa']):
+            raise CommandError('A jornada criar_programa precisa de --exercicio e --dono-programa com --url.')
+        contexto = {
+            'usuario': options['usuario'],
+            'senha': options['senha'],
+            'exercicio_id': options['exercicio'],
+            'dono_programa_id': options['dono_programa'],
+        }
+        return benchmark.executar(
+            lambda: benchmark.ClienteHTTP(options['url']), contexto, jornadas,
+            options['iteracoes'], options['aquecimento'], options['concorrencia'],
+        )
+
+    def _medir_cliente(self, options, jornadas):
+        from django.db import connection
+
+        setup_test_environment()
+        nome_original = connection.settings_dict['NAME']
+        connection.creation.create_test_db(verbosity=0, autoclobber=True, serialize=False)
+        # Sem uma linha de log por requisição durante a medição
+        log_instrumentacao = logging.getLogger('paginas.instrumentacao')
+        log_instrumentacao.disabled = True
+        try:
+            contexto = benchmark.popular(membros=options['membros'], semente=options['semente'])
+            with override_settings(INSTRUMENTACAO_AMOSTRAGEM=1):
+                return benchmark.executar(
+                    benchmark.ClienteDjango, contexto, jornadas, options['iteracoes'], options['aquecimento'],
+                )
+        finally:
+            log_instrumentacao.disabled = False
+            connection.creation.destroy_test_db(nome_original, verbosity=0)
+            teardown_test_environment()
+
+    def _imprimir(self, resultados):
+        self.stdout.write(
+            f"{'jornada':<16} {'req':>5} {'erros':>6} {'p50 ms':>8} {'p95 ms':>8} {'p99 ms':>8} "
+            f"{'req/s':>8} {'consultas':>10}"
+        )
+        for nome, r in resultados.items():
+            consultas = '-' if r['consultas'] is None else f"{r['consultas']:.1f}"
+            self.stdout.write(
+                f"{nome:<16} {r['requisicoes']:>5} {r['erros']:>6} {r['p50_ms']:>8.1f} {r['p95_ms']:>8.1f} "
+                f"{r['p99_ms']:>8.1f} {r['req_s']:>8.1f} {consultas:>10}"
+            )
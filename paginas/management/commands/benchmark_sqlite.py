@@ -0,0 +1,187 @@
+"""
+Compara o SQLite com a configuração padrão do Django e com o perfil
+SQLITE_TUNING sob escritas e leituras concorrentes.
+
+Cada escritor simula um check-in/salvamento de formulário: abre uma transação,
+lê o histórico do usuário, insere um registro e atualiza um contador. Os
+leitores simulam as listagens, com agregações sobre a mesma tabela. O banco é
+um arquivo temporário; o banco do projeto não é tocado.
+"""
+import random
+import sqlite3
+import statistics
+import tempfile
+import threading
+import time
+from pathlib import Path
+
+from django.conf import settings
+from django.core.management.base import BaseCommand, CommandError
+
+# Timeout padrão do módulo sqlite3 (o Django não o altera)
+TIMEOUT_PADRAO = 5.0
+
+
+def _perfis():
+    return {
+        'padrao': {
+            'pragmas': (),
+            'begin': 'BEGIN',
+            'timeout': TIMEOUT_PADRAO,
+        },
+        'otimizado': {
+            'pragmas': settings.SQLITE_PRAGMAS,
+            'begin': 'BEGIN IMMEDIATE',
+            'timeout': settings.SQLITE_BUSY_TIMEOUT,
+        },
+    }
+
+
+def _conectar(caminho, perfil):
+    conexao = sqlite3.connect(caminho, timeout=perfil['timeout'], isolation_level=None)
+    for pragma in perfil['pragmas']:
+        conexao.execute(f'PRAGMA {pragma}')
+    return conexao
+
+
+def _criar_banco(caminho, perfil, usuarios, linhas):
+    conexao = _conectar(caminho, perfil)
+    conexao.executescript('''
+        CREATE TABLE checkin (id INTEGER PRIMARY KEY, usuario INTEGER NOT NULL, criado_em REAL NOT NULL);
+        CREATE INDEX checkin_usuario_idx ON checkin (usuario);
+        CREATE TABLE resumo (usuario INTEGER PRIMARY KEY, total INTEGER NOT NULL);
+    ''')
+    aleatorio = random.Random(0)
+    conexao.execute('BEGIN')
+    conexao.executemany(
+        'INSERT INTO checkin (usuario, criado_em) VALUES (?, ?)',
+        ((aleatorio.randrange(usuarios), time.time()) for _ in range(linhas)),
+    )
+    conexao.executemany('INSERT INTO resumo (usuario, total) VALUES (?, 0)', ((u,) for u in range(usuarios)))
+    conexao.execute('COMMIT')
+    conexao.close()
+
+
+def _percentil(valores, p):
+    if len(valores) < 2:
+        return valores[0] if valores else 0.0
+    return statistics.quantiles(valores, n=100, method='inclusive')[p - 1]
+
+
+class Command(BaseCommand):
+    help = (
+        'Mede vazão, latência e erros "database is locked" do SQLite com a '
+        'configuração padrão e com o perfil SQLITE_TUNING, sob concorrência.'
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument('--escritores', type=int, default=8, help='Threads escrevendo (padrão: 8).')
+        parser.add_argument('--leitores', type=int, default=4, help='Threads lendo (padrão: 4).')
+        parser.add_argument(
+            '--operacoes', type=int, default=200,
+            help='Transações de escrita por escritor (padrão: 200).',
+        )
+        parser.add_argument('--usuarios', type=int, default=500, help='Usuários distintos (padrão: 500).')
+        parser.add_argument(
+            '--linhas', type=int, default=50000,
+            help='Registros existentes antes da medição (padrão: 50000).',
+        )
+        parser.add_argument(
+            '--perfil', choices=['padrao', 'otimizado', 'ambos'], default='ambos',
+            help='Perfil medido (padrão: ambos).',
+        )
+
+    def handle(self, *args, **options):
+        if options['escritores'] < 1 or options['operacoes'] < 1 or options['usuarios'] < 1:
+            raise CommandError('--escritores, --operacoes e --usuarios devem ser maiores que zero.')
+
+        perfis = _perfis()
+        nomes = list(perfis) if options['perfil'] == 'ambos' else [options['perfil']]
+        self.stdout.write(
+            f"{options['escritores']} escritor(es) x {options['operacoes']} transações, "
+            f"{options['leitores']} leitor(es), {options['linhas']} registros iniciais."
+        )
+        self.stdout.write(
+            f"{'perfil':<10} {'escritas/s':>11} {'erros':>6} {'p50 ms':>8} {'p95 ms':>8} "
+            f"{'p99 ms':>8} {'leituras/s':>11}"
+        )
+        for nome in nomes:
+            with tempfile.TemporaryDirectory() as diretorio:
+                resultado = self._medir(str(Path(diretorio) / 'benchmark.sqlite3'), perfis[nome], options)
+            self.stdout.write(
+                f"{nome:<10} {resultado['escritas_s']:>11.1f} {resultado['erros']:>6} "
+                f"{resultado['p50']:>8.1f} {resultado['p95']:>8.1f} {resultado['p99']:>8.1f} "
+                f"{resultado['leituras_s']:>11.1f}"
+            )
+
+    def _medir(self, caminho, perfil, options):
+        _criar_banco(caminho, perfil, options['usuarios'], options['linhas'])
+        latencias = []
+        erros = []
+        leituras = []
+        fim_escritas = threading.Event()
+        largada = threading.Barrier(options['escritores'] + options['leitores'] + 1)
+
+        def escritor(semente):
+            aleatorio = random.Random(semente)
+            conexao = _conectar(caminho, perfil)
+            minhas_latencias, meus_erros = [], 0
+            largada.wait()
+            for _ in range(options['operacoes']):
+                usuario = aleatorio.randrange(options['usuarios'])
+                inicio = time.perf_counter()
+                try:
+                    conexao.execute(perfil['begin'])
+                    conexao.execute('SELECT COUNT(*) FROM checkin WHERE usuario = ?', (usuario,)).fetchone()
+                    conexao.execute('INSERT INTO checkin (usuario, criado_em) VALUES (?, ?)', (usuario, time.time()))
+                    conexao.execute('UPDATE resumo SET total = total + 1 WHERE usuario = ?', (usuario,))
+                    conexao.execute('COMMIT')
+                except sqlite3.OperationalError:
+                    meus_erros += 1
+                    if conexao.in_transaction:
+                        conexao.execute('ROLLBACK')
+                    continue
+                minhas_latencias.append((time.perf_counter() - inicio) * 1000)
+            conexao.close()
+            latencias.extend(minhas_latencias)
+            erros.append(meus_erros)
+
+        def leitor(semente):
+            aleatorio = random.Random(semente)
+            conexao = _conectar(caminho, perfil)
+            total = 0
+            largada.wait()
+            while not fim_escritas.is_set():
+                inicio = aleatorio.randrange(options['usuarios'])
+                try:
+                    conexao.execute(
+                        'SELECT usuario, COUNT(*) FROM checkin WHERE usuario BETWEEN ? AND ? GROUP BY usuario',
+                        (inicio, inicio + 50),
+                    ).fetchall()
+                except sqlite3.OperationalError:
+                    continue
+                total += 1
+            conexao.close()
+            leituras.append(total)
+
+        escritores = [threading.Thread(target=escritor, args=(i,)) for i in range(options['escritores'])]
+        leitores = [threading.Thread(target=leitor, args=(1000 + i,)) for i in range(options['leitores'])]
+        for thread in escritores + leitores:
+            thread.start()
+        largada.wait()
+        inicio = time.perf_counter()
+        for thread in escritores:
+            thread.join()
+        duracao = time.perf_counter() - inicio
+        fim_escritas.set()
+        for thread in leitores:
+            thread.join()
+
+        return {
+            'escritas_s': len(latencias) / duracao,
+            'erros': sum(erros),
+            'p50': _percentil(latencias, 50),
+            'p95': _percentil(latencias, 95),
+            'p99': _percentil(latencias, 99),
+            'leituras_s': sum(leituras) / duracao,
+        }
@@ -0,0 +1,80 @@
+import time
+
+from django.core.management.base import BaseCommand, CommandError
+from django.utils.dateparse import parse_date
+
+from paginas.dados_sinteticos import SENHA_PADRAO, GeradorAcademia
+
+
+class Command(BaseCommand):
+    help = (
+        'Gera uma academia sintética (usuários com perfil e matrícula, histórico de IMC, '
+        'avaliações, programas de treino e eventos) para testes de desempenho. '
+        'Os dados são determinísticos a partir de --semente e --data-referencia.'
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument('--usuarios', type=int, default=1000, help='Quantidade de membros (padrão: 1000).')
+        parser.add_argument('--anos', type=int, default=2, help='Anos de histórico (padrão: 2).')
+        parser.add_argument(
+            '--imc-por-mes', type=int, default=1,
+            help='Registros de IMC por membro por mês (padrão: 1).',
+        )
+        parser.add_argument('--avaliacoes', type=int, default=2, help='Avaliações por membro (padrão: 2).')
+        parser.add_argument('--programas', type=int, default=3, help='Programas de treino por membro (padrão: 3).')
+        parser.add_argument('--eventos', type=int, default=200, help='Eventos no calendário (padrão: 200).')
+        parser.add_argument('--staff', type=int, default=5, help='Usuários staff que criam os eventos (padrão: 5).')
+        parser.add_argument('--semente', type=int, default=0, help='Semente do gerador (padrão: 0).')
+        parser.add_argument(
+            '--prefixo', default='membro',
+            help='Prefixo dos usernames gerados (padrão: membro). Não pode já estar em uso.',
+        )
+        parser.add_argument(
+            '--data-referencia',
+            help='Data considerada "hoje" (AAAA-MM-DD; padrão: hoje). Fixe-a para repetir os mesmos dados.',
+        )
+        parser.add_argument(
+            '--lote', type=int, default=1000,
+            help='Membros gravados por transação (padrão: 1000).',
+        )
+
+    def handle(self, *args, **options):
+        numericos = ('usuarios', 'anos', 'imc_por_mes', 'avaliacoes', 'programas', 'eventos', 'staff')
+        if any(options[nome] < 0 for nome in numericos) or options['lote'] < 1:
+            raise CommandError('As quantidades não podem ser negativas e --lote deve ser maior que zero.')
+        data_referencia = None
+        if options['data_referencia']:
+            data_referencia = parse_date(options['data_referencia'])
+            if data_referencia is None:
+                raise CommandError('--data-referencia deve estar no formato AAAA-MM-DD.')
+
+        gerador = GeradorAcademia(
+            usuarios=options['usuarios'],
+            anos=options['anos'],
+            imc_por_mes=options['imc_por_mes'],
+            avaliacoes=options['avaliacoes'],
+            programas=options['programas'],
+            eventos=options['eventos'],
+            staff=options['staff'],
+            semente=options['semente'],
+            prefixo=options['prefixo'],
+            data_referencia=data_referencia,
+            lote=options['lote'],
+        )
+        if gerador.usuarios_existem():
+            raise CommandError(
+                f"Já existem usuários com o prefixo '{options['prefixo']}'. Use outro --prefixo."
+            )
+
+        inicio = time.monotonic()
+
+        def progresso(gerados):
+            self.stdout.write(f"{gerados}/{options['usuarios']} membros ({time.monotonic() - inicio:.0f}s)")
+
+        totais = gerador.gerar(progresso=progresso if options['verbosity'] >= 1 else None)
+        self.stdout.write(self.style.SUCCESS(
+            f"Gerados em {time.monotonic() - inicio:.1f}s: {totais['usuarios']} membros, "
+            f"{totais['imc']} registros de IMC, {totais['avaliacoes']} avaliações, "
+            f"{totais['programas']} programas e {totais['eventos']} eventos. "
+            f"Senha de todos os usuários: {SENHA_PADRAO}"
+        ))
@@ -0,0 +1,21 @@
+from django.core.management.base import BaseCommand
+from django.db import DEFAULT_DB_ALIAS
+
+from paginas import busca
+
+
+class Command(BaseCommand):
+    help = (
+        'Recalcula o texto de busca de todos os registros pesquisáveis e recria os '
+        'índices de busca. Use após importações ou alterações em massa.'
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument('--database', default=DEFAULT_DB_ALIAS, help='Banco de dados (padrão: default).')
+
+    def handle(self, *args, **options):
+        for model in busca.models_pesquisaveis():
+            total = busca.preencher_texto_busca(model, model.campos_busca, using=options['database'])
+            self.stdout.write(f'{model._meta.label}: {total} registro(s) atualizado(s).')
+        busca.preparar_indices(using=options['database'])
+        self.stdout.write(self.style.SUCCESS('Índices de busca prontos.'))
@@ -0,0 +1,227 @@
+"""
+Paginação por cursor (keyset) para as listagens.
+
+Em vez de OFFSET + COUNT(*), cada página é buscada a partir da chave de
+ordenação do último (ou primeiro) registro exibido, com uma consulta que usa
+o índice da ordenação e lê apenas ``paginate_by + 1`` linhas. O custo de uma
+página não depende de quantas páginas existem antes dela.
+
+Os cursores são assinados com ``django.core.signing`` para que não possam ser
+forjados, e continuam válidos mesmo que registros sejam inseridos ou
+removidos entre uma página e outra.
+"""
+from django.core import signing
+from django.core.exceptions import FieldDoesNotExist
+from django.db import connections
+from django.db.models import Q
+from django.http import Http404
+from django.utils.functional import cached_property
+
+SALT_CURSOR = 'paginas.paginacao.cursor'
+
+PROXIMA = 'n'
+ANTERIOR = 'p'
+
+# Valor especial do parâmetro de cursor que abre a última página
+ULTIMA = 'ultima'
+
+
+class CursorInvalido(Exception):
+    pass
+
+
+class CursorPage:
+    """
+    Página de resultados de um CursorPaginator. Expõe a mesma interface
+    básica de ``django.core.paginator.Page`` usada pelos templates.
+    """
+
+    def __init__(self, object_list, paginator, has_next, has_previous):
+        self.object_list = object_list
+        self.paginator = paginator
+        self._has_next = has_next
+        self._has_previous = has_previous
+
+    def __repr__(self):
+        return f'<CursorPage ({len(self.object_list)} itens)>'
+
+    def __len__(self):
+        return len(self.object_list)
+
+    def __iter__(self):
+        return iter(self.object_list)
+
+    def __getitem__(self, index):
+        return self.object_list[index]
+
+    def has_next(self):
+        return self._has_next
+
+    def has_previous(self):
+        return self._has_previous
+
+    def has_other_pages(self):
+        return self._has_next or self._has_previous
+
+    @property
+    def next_cursor(self):
+        if not (self._has_next and self.object_list):
+            return None
+        return self.paginator.codificar(PROXIMA, self.object_list[-1])
+
+    @property
+    def previous_cursor(self):
+        if not (self._has_previous and self.object_list):
+            return None
+        return self.paginator.codificar(ANTERIOR, self.object_list[0])
+
+
+class CursorPaginator:
+    """
+    Pagina um queryset pela sua chave de ordenação. ``ordering`` deve ser
+    única (inclua ``id`` como desempate) e composta por campos não nulos.
+    Além de campos do model, aceita anotações numéricas (ex.: a relevância
+    da busca).
+    """
+
+    # Acima deste valor a contagem aproximada deixa de ser exata
+    limite_contagem = 1000
+
+    def __init__(self, queryset, per_page, ordering):
+        self.queryset = queryset
+        self.per_page = int(per_page)
+        self.ordering = list(ordering)
+        self.campos = [
+            (campo.lstrip('-'), campo.startswith('-'))
+            for campo in self.ordering
+        ]
+
+    def _ordenacao_invertida(self):
+        return [campo[1:] if campo.startswith('-') else f'-{campo}' for campo in self.ordering]
+
+    def _filtro(self, valores, direcao):
+        """
+        Monta a condição "depois do cursor" na direção pedida:
+        (a > x) OR (a = x AND b > y) OR (a = x AND b = y AND c > z) ...
+        """
+        condicao = Q()
+        iguais = {}
+        for (campo, decrescente), valor in zip(self.campos, valores):
+            avancar_para_menores = decrescente == (direcao == PROXIMA)
+            lookup = 'lt' if avancar_para_menores else 'gt'
+            condicao |= Q(**iguais, **{f'{campo}__{lookup}': valor})
+            iguais[campo] = valor
+        return condicao
+
+    def _campo_modelo(self, campo):
+        try:
+            return self.queryset.model._meta.get_field(campo)
+        except FieldDoesNotExist:
+            # Anotação do queryset
+            return None
+
+    def codificar(self, direcao, obj):
+        """Gera o cursor assinado que aponta para ``obj`` na direção informada."""
+        valores = []
+        for campo, _ in self.campos:
+            field = self._campo_modelo(campo)
+            valores.append(field.value_to_string(obj) if field else getattr(obj, campo))
+        return signing.dumps([direcao, valores], salt=SALT_CURSOR, compress=True)
+
+    def _converter(self, campo, valor):
+        field = self._campo_modelo(campo)
+        if field is not None:
+            return field.to_python(valor)
+        if isinstance(valor, bool) or not isinstance(valor, (int, float)):
+            raise ValueError(valor)
+        return valor
+
+    def decodificar(self, cursor):
+        try:
+            direcao, valores = signing.loads(cursor, salt=SALT_CURSOR)
+        except (signing.BadSignature, TypeError, ValueError):
+            raise CursorInvalido(cursor)
+        if direcao not in (PROXIMA, ANTERIOR) or len(valores) != len(self.campos):
+            raise CursorInvalido(cursor)
+
+        try:
+            valores = [self._converter(campo, valor) for (campo, _), valor in zip(self.campos, valores)]
+        except Exception:
+            raise CursorInvalido(cursor)
+        return direcao, valores
+
+    def page(self, cursor=None):
+        """Retorna a página indicada pelo cursor (ou a primeira, se vazio)."""
+        limite = self.per_page + 1
+
+        if not cursor:
+            itens = list(self.queryset.order_by(*self.ordering)[:limite])
+            return CursorPage(itens[:self.per_page], self, len(itens) > self.per_page, False)
+
+        if cursor == ULTIMA:
+            itens = list(self.queryset.order_by(*self._ordenacao_invertida())[:limite])
+            pagina = itens[:self.per_page][::-1]
+            return CursorPage(pagina, self, False, len(itens) > self.per_page)
+
+        direcao, valores = self.decodificar(cursor)
+        filtrado = self.queryset.filter(self._filtro(valores, direcao))
+        if direcao == PROXIMA:
+            itens = list(filtrado.order_by(*self.ordering)[:limite])
+            return CursorPage(itens[:self.per_page], self, len(itens) > self.per_page, True)
+
+        itens = list(filtrado.order_by(*self._ordenacao_invertida())[:limite])
+        pagina = itens[:self.per_page][::-1]
+        return CursorPage(pagina, self, True, len(itens) > self.per_page)
+
+    @cached_property
+    def total_aproximado(self):
+        """
+        Total aproximado de registros, calculado apenas quando exibido.
+        No PostgreSQL, listagens sem filtro usam a estimativa do catálogo
+        (pg_class.reltuples); nos demais casos a contagem para em
+        ``limite_contagem`` + 1.
+        """
+        queryset = self.queryset
+        connection = connections[queryset.db]
+        if connection.vendor == 'postgresql' and not queryset.query.where:
+            with connection.cursor() as cursor:
+                cursor.execute(
+                    'SELECT reltuples::bigint FROM pg_class WHERE oid = %s::regclass',
+                    [queryset.model._meta.db_table],
+                )
+                linha = cursor.fetchone()
+            if linha and linha[0] >= 0:
+                return linha[0]
+        return queryset.order_by()[:self.limite_contagem + 1].count()
+
+    @property
+    def total_excede_limite(self):
+        return self.total_aproximado > self.limite_contagem
+
+
+class CursorPaginationMixin:
+    """
+    Mixin para ListView que troca a paginação por OFFSET pela paginação por
+    cursor. Defina ``cursor_ordering`` com a ordenação da listagem,
+    terminando em um campo único (normalmente ``-id``).
+    """
+    cursor_ordering = ('-id',)
+    cursor_query_param = 'cursor'
+    # Exibe o total aproximado de registros nos controles de paginação
+    cursor_mostrar_total = True
+
+    def get_cursor_ordering(self):
+        return self.cursor_ordering
+
+    def paginate_queryset(self, queryset, page_size):
+        paginator = CursorPaginator(queryset, page_size, self.get_cursor_ordering())
+        try:
+            page = paginator.page(self.request.GET.get(self.cursor_query_param))
+        except CursorInvalido:
+            raise Http404('Cursor de paginação inválido.')
+        return paginator, page, page.object_list, page.has_other_pages()
+
+    def get_context_data(self, **kwargs):
+        context = super().get_context_data(**kwargs)
+        context['mostrar_total'] = self.cursor_mostrar_total
+        return context
@@ -1,3 +1,21 @@
-from django.test import TestCase
+import datetime
+from decimal import Decimal
 
-# Create your tests here.
+from django.test import SimpleTestCase
+
+from .exportacao import formatar_valor
+
+
+class FormatarValorTests(SimpleTestCase):
+
+    def test_textos_que_parecem_formula_sao_escapados(self):
+        for texto in ('=HYPERLINK("http://x")', '+55 84', '-2+3', '@SUM(A1)', '\t=1'):
+            with self.subTest(texto=texto):
+                self.assertEqual(formatar_valor(texto), "'" + texto)
+        self.assertEqual(formatar_valor('Treino A'), 'Treino A')
+
+    def test_numeros_continuam_numeros(self):
+        self.assertEqual(formatar_valor(Decimal('-1.50')), '-1,50')
+        self.assertEqual(formatar_valor(-2.0), '-2,00')
+        self.assertEqual(formatar_valor(-3), -3)
+        self.assertEqual(formatar_valor(datetime.date(2026, 3, 4)), '04/03/2026')
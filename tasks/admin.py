@@ -1,5 +1,22 @@
 from django.contrib import admin
 
-from .models import Task
+from .models import Task, TaskExcecao, Inscricao
 
-admin.site.register(Task)
\ No newline at end of file
+
+class TaskExcecaoInline(admin.TabularInline):
+    model = TaskExcecao
+    extra = 0
+
+
+@admin.register(Task)
+class TaskAdmin(admin.ModelAdmin):
+    list_display = ['title', 'start_date', 'end_date', 'recorrencia', 'recorrencia_fim', 'subs', 'total_subs', 'usuario']
+    list_filter = ['recorrencia']
+    inlines = [TaskExcecaoInline]
+
+
+@admin.register(Inscricao)
+class InscricaoAdmin(admin.ModelAdmin):
+    list_display = ['task', 'usuario', 'status', 'solicitada_em']
+    list_filter = ['status']
+    list_select_related = ['task', 'usuario']
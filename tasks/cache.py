@@ -0,0 +1,139 @@
+"""
+Cache do calendário de tarefas/eventos.
+
+Cada classe de visibilidade (staff, membro, anônimo) possui uma versão de
+conteúdo armazenada no cache. Os sinais de Task (e as mudanças de is_staff
+de um usuário, que alteram o que os membros veem) incrementam essas versões e
+as chaves dos payloads incluem a versão atual, de modo que qualquer escrita
+torna os dados anteriores obsoletos sem precisar apagá-los um a um.
+"""
+import time
+from datetime import datetime, timezone as dt_timezone
+
+from django.conf import settings
+from django.core.cache import cache
+
+CLASSE_STAFF = 'staff'
+CLASSE_MEMBRO = 'membro'
+CLASSE_ANONIMO = 'anonimo'
+
+# Classes cujo conteúdo muda quando uma Task é criada, alterada ou removida
+CLASSES_INVALIDAVEIS = (CLASSE_STAFF, CLASSE_MEMBRO)
+
+TIMEOUT = getattr(settings, 'TASKS_CACHE_TIMEOUT', 60 * 60)
+TIMEOUT_CONTADORES = getattr(settings, 'TASKS_CONTADORES_CACHE_TIMEOUT', 60)
+
+
+def classe_visibilidade(user):
+    """Retorna a classe de visibilidade usada por Task.objects.visiveis_para."""
+    if user.is_superuser or user.is_staff:
+        return CLASSE_STAFF
+    if not user.is_authenticated:
+        return CLASSE_ANONIMO
+    return CLASSE_MEMBRO
+
+
+def _chave_versao(classe):
+    return f'tasks:versao:{classe}'
+
+
+def versao(classe):
+    """
+    Retorna a versão atual (nanossegundos desde a época) da classe informada,
+    inicializando-a se ainda não existir no cache.
+    """
+    chave = _chave_versao(classe)
+    atual = cache.get(chave)
+    if atual is None:
+        atual = time.time_ns()
+        if not cache.add(chave, atual, timeout=None):
+            atual = cache.get(chave, atual)
+    return atual
+
+
+def invalidar(classes=CLASSES_INVALIDAVEIS):
+    """Avança a versão das classes informadas."""
+    agora = time.time_ns()
+    cache.set_many({_chave_versao(classe): agora for classe in classes}, timeout=None)
+
+
+def versao_para(user):
+    return versao(classe_visibilidade(user))
+
+
+def _montar_etag(classe, versao_atual, partes):
+    sufixo = ':'.join(str(parte) for parte in partes)
+    return f'{classe}-{versao_atual}-{sufixo}' if sufixo else f'{classe}-{versao_atual}'
+
+
+def _montar_chave(prefixo, classe, versao_atual, partes):
+    sufixo = ':'.join('' if parte is None else str(parte) for parte in partes)
+    return f'tasks:{prefixo}:{classe}:{versao_atual}:{sufixo}'
+
+
+def _como_datahora(versao_atual):
+    return datetime.fromtimestamp(versao_atual / 1_000_000_000, tz=dt_timezone.utc)
+
+
+def etag_para(user, *partes):
+    """ETag forte derivada da classe de visibilidade, da versão e de partes extras."""
+    classe = classe_visibilidade(user)
+    return _montar_etag(classe, versao(classe), partes)
+
+
+def ultima_modificacao_para(user):
+    return _como_datahora(versao_para(user))
+
+
+def chave_payload(prefixo, user, *partes):
+    """Chave de cache de um payload que muda junto com a versão da classe."""
+    classe = classe_visibilidade(user)
+    return _montar_chave(prefixo, classe, versao(classe), partes)
+
+
+def obter_ou_calcular(chave, calcular, timeout=TIMEOUT):
+    """Retorna o valor em cache ou o calcula e armazena."""
+    valor = cache.get(chave)
+    if valor is None:
+        valor = calcular()
+        cache.set(chave, valor, timeout=timeout)
+    return valor
+
+
+# Equivalentes assíncronos, usados pelas views async (servidor ASGI)
+
+async def aversao(classe):
+    chave = _chave_versao(classe)
+    atual = await cache.aget(chave)
+    if atual is None:
+        atual = time.time_ns()
+        if not await cache.aadd(chave, atual, timeout=None):
+            atual = await cache.aget(chave, atual)
+    return atual
+
+
+async def aversao_para(user):
+    return await aversao(classe_visibilidade(user))
+
+
+async def aetag_para(user, *partes):
+    classe = classe_visibilidade(user)
+    return _montar_etag(classe, await aversao(classe), partes)
+
+
+async def aultima_modificacao_para(user):
+    return _como_datahora(await aversao_para(user))
+
+
+async def achave_payload(prefixo, user, *partes):
+    classe = classe_visibilidade(user)
+    return _montar_chave(prefixo, classe, await aversao(classe), partes)
+
+
+async def aobter_ou_calcular(chave, calcular, timeout=TIMEOUT):
+    """Como ``obter_ou_calcular``, mas ``calcular`` é uma função assíncrona."""
+    valor = await cache.aget(chave)
+    if valor is None:
+        valor = await calcular()
+        await cache.aset(chave, valor, timeout=timeout)
+    return valor
@@ -1,7 +1,10 @@
+from datetime import datetime
 from django import forms
 from django.core.exceptions import ValidationError
+from django.db import transaction
 from django.utils import timezone
-from .models import Task
+from .models import Task, TaskExcecao
+from . import inscricoes
 from django.forms import DateInput
 from django.contrib.auth.models import User
 from cadastros.models import TrainingExercicio
@@ -9,8 +12,15 @@ from cadastros.models import TrainingExercicio
 class TaskForm(forms.ModelForm):
     """
     Formulário para criação e edição de tarefas/eventos.
-    Inclui validações para datas e horários.
+    Inclui validações para datas e horários e a configuração de repetição.
     """
+    excecoes = forms.CharField(
+        required=False,
+        widget=forms.TextInput(attrs={"class": "form-control", "placeholder": "Ex.: 21/04/2025, 01/05/2025"}),
+        label="Datas sem aula",
+        help_text="Datas de ocorrências canceladas, separadas por vírgula (dd/mm/aaaa).",
+    )
+
     class Meta:
         model = Task
         fields = [
@@ -21,6 +31,10 @@ class TaskForm(forms.ModelForm):
             "end_date",
             "start_time",
             "end_time",
+            "total_subs",
+            "recorrencia",
+            "intervalo",
+            "recorrencia_fim",
         ]
 
         widgets = {
@@ -34,6 +48,10 @@ class TaskForm(forms.ModelForm):
             "end_date": DateInput(attrs={"class": "form-control", "type": "date"}),
             "start_time": DateInput(attrs={"class": "form-control", "type": "time"}),
             "end_time": DateInput(attrs={"class": "form-control", "type": "time"}),
+            "total_subs": forms.NumberInput(attrs={"class": "form-control", "min": 0}),
+            "recorrencia": forms.Select(attrs={"class": "form-control"}),
+            "intervalo": forms.NumberInput(attrs={"class": "form-control", "min": 1}),
+            "recorrencia_fim": DateInput(attrs={"class": "form-control", "type": "date"}),
         }
         labels = {
             "title": "Título do Evento",
@@ -42,6 +60,13 @@ class TaskForm(forms.ModelForm):
             "end_date": "Data de Término",
             "start_time": "Hora de Início",
             "end_time": "Hora de Término",
+            "total_subs": "Vagas",
+            "recorrencia": "Repetição",
+            "intervalo": "Repetir a cada",
+            "recorrencia_fim": "Repetir até",
+        }
+        help_texts = {
+            "total_subs": "Deixe 0 para não limitar as inscrições. Em eventos que se repetem, as vagas valem para a série inteira.",
         }
 
     def __init__(self, *args, **kwargs):
@@ -49,6 +74,9 @@ class TaskForm(forms.ModelForm):
         # Hide usuario field - it will be set automatically to the current staff user
         if 'usuario' in self.fields:
             del self.fields['usuario']
+        if self.instance.pk and not self.is_bound:
+            datas = self.instance.excecoes.values_list('data', flat=True)
+            self.fields['excecoes'].initial = ', '.join(data.strftime('%d/%m/%Y') for data in datas)
 
     def clean_title(self):
         """Valida que o título não esteja vazio."""
@@ -59,8 +87,31 @@ class TaskForm(forms.ModelForm):
                 raise ValidationError('O título deve ter pelo menos 3 caracteres.')
         return title
 
+    def clean_total_subs(self):
+        """Impede reduzir as vagas abaixo das inscrições já confirmadas."""
+        total_subs = self.cleaned_data.get('total_subs')
+        subs = self.instance.subs if self.instance.pk else 0
+        if total_subs and total_subs < subs:
+            raise ValidationError(f'Já existem {subs} inscrições confirmadas; as vagas não podem ser menores que isso.')
+        return total_subs
+
+    def clean_excecoes(self):
+        """Converte a lista de datas separadas por vírgula em um conjunto de datas."""
+        valor = self.cleaned_data.get('excecoes') or ''
+        datas = set()
+        for texto in filter(None, (parte.strip() for parte in valor.split(','))):
+            for formato in ('%d/%m/%Y', '%Y-%m-%d'):
+                try:
+                    datas.add(datetime.strptime(texto, formato).date())
+                    break
+                except ValueError:
+                    continue
+            else:
+                raise ValidationError(f'Data inválida: {texto}. Use o formato dd/mm/aaaa.')
+        return datas
+
     def clean(self):
-        """Validações cruzadas entre datas e horários."""
+        """Validações cruzadas entre datas, horários e repetição."""
         cleaned_data = super().clean()
         start_date = cleaned_data.get('start_date')
         end_date = cleaned_data.get('end_date')
@@ -82,4 +133,43 @@ class TaskForm(forms.ModelForm):
                         'end_time': 'Quando a data de início e término são iguais, a hora de término deve ser posterior à hora de início.'
                     })
 
+        # Validar a configuração de repetição
+        recorrencia = cleaned_data.get('recorrencia')
+        recorrencia_fim = cleaned_data.get('recorrencia_fim')
+        if recorrencia:
+            if not recorrencia_fim:
+                raise ValidationError({
+                    'recorrencia_fim': 'Informe até quando o evento se repete.'
+                })
+            if start_date and recorrencia_fim < start_date:
+                raise ValidationError({
+                    'recorrencia_fim': 'A data final da repetição não pode ser anterior à data de início.'
+                })
+            if not cleaned_data.get('intervalo'):
+                raise ValidationError({
+                    'intervalo': 'O intervalo de repetição deve ser maior que zero.'
+                })
+
         return cleaned_data
+
+    def save(self, commit=True):
+        """Salva a tarefa e sincroniza as exceções de repetição na mesma transação."""
+        if not commit:
+            return super().save(commit=False)
+        with transaction.atomic():
+            task = super().save(commit=True)
+            self._salvar_excecoes(task)
+            if 'total_subs' in self.changed_data:
+                # Novas vagas são ocupadas pela lista de espera
+                inscricoes.preencher_vagas(task)
+        return task
+
+    def _salvar_excecoes(self, task):
+        datas = self.cleaned_data.get('excecoes', set()) if task.recorrencia else set()
+        existentes = set(task.excecoes.values_list('data', flat=True))
+        removidas = existentes - datas
+        if removidas:
+            task.excecoes.filter(data__in=removidas).delete()
+        TaskExcecao.objects.bulk_create(
+            [TaskExcecao(task=task, data=data) for data in sorted(datas - existentes)]
+        )
@@ -0,0 +1,116 @@
+"""
+Inscrições em tarefas/eventos.
+
+A reserva de vaga é feita com um UPDATE condicional sobre ``Task.subs``
+(``subs < total_subs``), sem ler-modificar-gravar: sob uma rajada de
+inscrições, cada requisição só ocupa uma vaga se o próprio banco confirmar que
+ainda há lugar. O UPDATE bloqueia a linha do evento até o commit, então as
+inscrições no mesmo evento ainda são serializadas; por isso a transação de
+inscrição é curta (poucas consultas, nenhum trabalho fora do banco). Quem não
+consegue vaga entra na lista de espera. Os cancelamentos promovem o primeiro
+da fila; esse caminho é raro e bloqueia a linha do evento com SELECT FOR
+UPDATE para manter a fila em ordem.
+
+Em eventos recorrentes a inscrição é na série inteira (todas as ocorrências
+compartilham as mesmas vagas e a mesma lista de espera). Não é possível se
+inscrever em eventos já encerrados (``EventoEncerrado``); numa série, isso
+vale após a última ocorrência.
+
+Todas as operações são idempotentes: repetir uma inscrição ou um cancelamento
+devolve o estado atual sem alterar contadores.
+"""
+from django.db import transaction
+from django.db.models import F, Q
+from django.utils import timezone
+
+from .models import Task, Inscricao
+
+ATIVAS = (Inscricao.CONFIRMADA, Inscricao.ESPERA)
+
+
+class EventoEncerrado(Exception):
+    """O evento (ou a última ocorrência da série) já terminou."""
+
+
+
+def _reservar_vaga(task_id):
+    """Ocupa uma vaga do evento se houver; retorna True em caso de sucesso."""
+    return Task.objects.filter(pk=task_id).filter(
+        Q(total_subs=0) | Q(subs__lt=F('total_subs'))
+    ).update(subs=F('subs') + 1) == 1
+
+
+def _liberar_vaga(task_id):
+    Task.objects.filter(pk=task_id, subs__gt=0).update(subs=F('subs') - 1)
+
+
+def inscrever(task, usuario):
+    """
+    Inscreve o usuário no evento. Retorna a inscrição com status
+    ``confirmada`` (vaga garantida) ou ``espera`` (evento lotado).
+    Levanta EventoEncerrado se o evento já terminou.
+    """
+    if task.encerrado():
+        raise EventoEncerrado(task.pk)
+    with transaction.atomic():
+        inscricao, criada = Inscricao.objects.get_or_create(task=task, usuario=usuario)
+        if not criada:
+            # Reativa uma inscrição cancelada; inscrições ativas ficam como estão
+            reativada = Inscricao.objects.filter(pk=inscricao.pk, status=Inscricao.CANCELADA).update(
+                status=Inscricao.ESPERA, solicitada_em=timezone.now()
+            )
+            if not reativada:
+                inscricao.refresh_from_db(fields=['status', 'solicitada_em'])
+                return inscricao
+
+        if _reservar_vaga(task.pk):
+            Inscricao.objects.filter(pk=inscricao.pk).update(status=Inscricao.CONFIRMADA)
+        inscricao.refresh_from_db(fields=['status', 'solicitada_em'])
+        return inscricao
+
+
+def cancelar_inscricao(task, usuario):
+    """
+    Cancela a inscrição ativa do usuário, liberando a vaga para o próximo da
+    lista de espera. Retorna a inscrição cancelada ou None se não havia
+    inscrição ativa.
+    """
+    with transaction.atomic():
+        inscricao = Inscricao.objects.filter(task=task, usuario=usuario, status__in=ATIVAS).first()
+        if inscricao is None:
+            return None
+
+        # Só quem efetivamente mudou o status libera a vaga (evita decrementos duplos)
+        era_confirmada = Inscricao.objects.filter(pk=inscricao.pk, status=Inscricao.CONFIRMADA).update(
+            status=Inscricao.CANCELADA
+        )
+        if era_confirmada:
+            _liberar_vaga(task.pk)
+            preencher_vagas(task)
+        else:
+            Inscricao.objects.filter(pk=inscricao.pk, status=Inscricao.ESPERA).update(status=Inscricao.CANCELADA)
+
+        inscricao.refresh_from_db(fields=['status'])
+        return inscricao
+
+
+def preencher_vagas(task):
+    """
+    Promove inscrições da lista de espera, em ordem de solicitação, enquanto
+    houver vagas. Usado após cancelamentos e quando a capacidade aumenta.
+    Retorna a quantidade de inscrições promovidas.
+    """
+    promovidas = 0
+    with transaction.atomic():
+        # Serializa promoções do mesmo evento para manter a ordem da fila
+        Task.objects.select_for_update().only('id').get(pk=task.pk)
+        fila = Inscricao.objects.filter(task=task, status=Inscricao.ESPERA).order_by('solicitada_em', 'id')
+        for inscricao_id in list(fila.values_list('id', flat=True)):
+            if not _reservar_vaga(task.pk):
+                break
+            if Inscricao.objects.filter(pk=inscricao_id, status=Inscricao.ESPERA).update(status=Inscricao.CONFIRMADA):
+                promovidas += 1
+            else:
+                # A inscrição saiu da fila nesse meio tempo; devolve a vaga
+                _liberar_vaga(task.pk)
+    return promovidas
@@ -0,0 +1,23 @@
+# Generated by Django 5.2.7 on 2026-10-17 21:09
+
+from django.conf import settings
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('tasks', '0004_alter_task_options_alter_task_created_at_and_more'),
+        migrations.swappable_dependency(settings.AUTH_USER_MODEL),
+    ]
+
+    operations = [
+        migrations.AddIndex(
+            model_name='task',
+            index=models.Index(fields=['start_date', 'end_date'], name='task_periodo_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='task',
+            index=models.Index(fields=['usuario', 'start_date', 'end_date'], name='task_usuario_periodo_idx'),
+        ),
+    ]
@@ -0,0 +1,48 @@
+# Generated by Django 5.2.7 on 2026-10-17 21:13
+
+import django.db.models.deletion
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('tasks', '0005_task_periodo_indexes'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='task',
+            name='fim_serie',
+            field=models.DateField(blank=True, editable=False, null=True),
+        ),
+        migrations.AddField(
+            model_name='task',
+            name='intervalo',
+            field=models.PositiveIntegerField(default=1, verbose_name='Repetir a cada'),
+        ),
+        migrations.AddField(
+            model_name='task',
+            name='recorrencia',
+            field=models.CharField(blank=True, choices=[('', 'Não se repete'), ('daily', 'Diária'), ('weekly', 'Semanal'), ('monthly', 'Mensal')], default='', max_length=10, verbose_name='Repetição'),
+        ),
+        migrations.AddField(
+            model_name='task',
+            name='recorrencia_fim',
+            field=models.DateField(blank=True, null=True, verbose_name='Repetir até'),
+        ),
+        migrations.CreateModel(
+            name='TaskExcecao',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('data', models.DateField(verbose_name='Data da Ocorrência')),
+                ('task', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='excecoes', to='tasks.task', verbose_name='Tarefa/Evento')),
+            ],
+            options={
+                'verbose_name': 'Exceção de Repetição',
+                'verbose_name_plural': 'Exceções de Repetição',
+                'ordering': ['data'],
+                'constraints': [models.UniqueConstraint(fields=('task', 'data'), name='task_excecao_unica')],
+            },
+        ),
+    ]
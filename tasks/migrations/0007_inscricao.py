@@ -0,0 +1,35 @@
+# Generated by Django 5.2.7 on 2026-10-17 21:14
+
+import django.db.models.deletion
+import django.utils.timezone
+from django.conf import settings
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('tasks', '0006_task_recorrencia'),
+        migrations.swappable_dependency(settings.AUTH_USER_MODEL),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='Inscricao',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('status', models.CharField(choices=[('confirmada', 'Confirmada'), ('espera', 'Lista de espera'), ('cancelada', 'Cancelada')], default='espera', max_length=10, verbose_name='Situação')),
+                ('solicitada_em', models.DateTimeField(default=django.utils.timezone.now, verbose_name='Solicitada em')),
+                ('atualizada_em', models.DateTimeField(auto_now=True, verbose_name='Última Atualização')),
+                ('task', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='inscricoes', to='tasks.task', verbose_name='Tarefa/Evento')),
+                ('usuario', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='inscricoes', to=settings.AUTH_USER_MODEL, verbose_name='Usuário')),
+            ],
+            options={
+                'verbose_name': 'Inscrição',
+                'verbose_name_plural': 'Inscrições',
+                'ordering': ['solicitada_em', 'id'],
+                'indexes': [models.Index(fields=['task', 'status', 'solicitada_em'], name='inscricao_fila_idx')],
+                'constraints': [models.UniqueConstraint(fields=('task', 'usuario'), name='inscricao_unica_por_task')],
+            },
+        ),
+    ]
@@ -0,0 +1,31 @@
+# Generated by Django 5.2.7 on 2026-10-17 22:04
+
+from django.conf import settings
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('tasks', '0008_cursor_pagination_indexes'),
+        migrations.swappable_dependency(settings.AUTH_USER_MODEL),
+    ]
+
+    operations = [
+        migrations.RemoveIndex(
+            model_name='task',
+            name='task_periodo_idx',
+        ),
+        migrations.RemoveIndex(
+            model_name='task',
+            name='task_usuario_periodo_idx',
+        ),
+        migrations.AddIndex(
+            model_name='task',
+            index=models.Index(fields=['end_date', 'start_date'], name='task_periodo_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='task',
+            index=models.Index(fields=['usuario', 'end_date', 'start_date'], name='task_usuario_periodo_idx'),
+        ),
+    ]
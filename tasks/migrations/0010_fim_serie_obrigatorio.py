@@ -0,0 +1,48 @@
+# Generated by Django 5.2.7 on 2026-10-18 09:10
+
+from django.db import migrations, models
+from django.db.models import F
+
+
+def preencher_fim_serie(apps, schema_editor):
+    """Tarefas simples passam a ter fim_serie = end_date."""
+    Task = apps.get_model('tasks', 'Task')
+    Task.objects.filter(fim_serie__isnull=True).update(fim_serie=F('end_date'))
+
+
+def limpar_fim_serie(apps, schema_editor):
+    """Ao desfazer: tarefas simples voltam a ter fim_serie nulo."""
+    Task = apps.get_model('tasks', 'Task')
+    Task.objects.filter(recorrencia='').update(fim_serie=None)
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('tasks', '0009_periodo_idx_end_date'),
+    ]
+
+    operations = [
+        migrations.RunPython(preencher_fim_serie, limpar_fim_serie),
+        migrations.AlterField(
+            model_name='task',
+            name='fim_serie',
+            field=models.DateField(editable=False),
+        ),
+        migrations.RemoveIndex(
+            model_name='task',
+            name='task_periodo_idx',
+        ),
+        migrations.RemoveIndex(
+            model_name='task',
+            name='task_usuario_periodo_idx',
+        ),
+        migrations.AddIndex(
+            model_name='task',
+            index=models.Index(fields=['fim_serie', 'start_date'], name='task_periodo_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='task',
+            index=models.Index(fields=['usuario', 'fim_serie', 'start_date'], name='task_usuario_periodo_idx'),
+        ),
+    ]
@@ -1,7 +1,49 @@
+import datetime
+
 from django.db import models
 from django.core.exceptions import ValidationError
 from django.contrib.auth.models import User
+from django.utils import timezone
 from cadastros.models import TrainingExercicio
+from . import recorrencia
+
+
+class TaskQuerySet(models.QuerySet):
+    """
+    Consultas reutilizáveis para tarefas/eventos do calendário.
+    """
+
+    def visiveis_para(self, user):
+        """
+        Staff vê todas as tarefas, usuários regulares veem apenas tarefas
+        criadas por staff e visitantes não veem nenhuma.
+        """
+        if user.is_superuser or user.is_staff:
+            return self.all()
+        if not user.is_authenticated:
+            return self.none()
+        return self.filter(usuario__is_staff=True)
+
+    def no_periodo(self, inicio=None, fim=None):
+        """
+        Retorna as tarefas que se sobrepõem ao intervalo [inicio, fim].
+        Tarefas recorrentes entram se alguma parte da série cair no intervalo.
+        Qualquer um dos limites pode ser omitido.
+        """
+        queryset = self
+        if fim is not None:
+            queryset = queryset.filter(start_date__lte=fim)
+        if inicio is not None:
+            # fim_serie é o último dia ocupado (end_date nas tarefas simples)
+            queryset = queryset.filter(fim_serie__gte=inicio)
+        return queryset
+
+    def simples(self):
+        return self.filter(recorrencia='')
+
+    def recorrentes(self):
+        return self.exclude(recorrencia='')
+
 
 class Task(models.Model):
     """
@@ -15,19 +57,45 @@ class Task(models.Model):
     description = models.TextField(verbose_name="Descrição")
     start_date = models.DateField(verbose_name="Data de Início")
     end_date = models.DateField(verbose_name="Data de Término")
+    # Capacidade do evento (0 = sem limite de vagas) e inscrições confirmadas
     total_subs = models.PositiveIntegerField(default=0, verbose_name="Total de Inscrições")
     subs = models.PositiveIntegerField(default=0, verbose_name="Inscrições Atuais")
     start_time = models.TimeField(verbose_name="Hora de Início")
     end_time = models.TimeField(verbose_name="Hora de Término")
+    recorrencia = models.CharField(
+        max_length=10,
+        choices=recorrencia.RECORRENCIA_CHOICES,
+        default='',
+        blank=True,
+        verbose_name="Repetição"
+    )
+    intervalo = models.PositiveIntegerField(default=1, verbose_name="Repetir a cada")
+    recorrencia_fim = models.DateField(null=True, blank=True, verbose_name="Repetir até")
+    # Último dia ocupado pela tarefa (end_date, ou o fim da última ocorrência
+    # da série); calculado no save e usado no filtro por período
+    fim_serie = models.DateField(editable=False)
 
     usuario = models.ForeignKey(User, on_delete=models.CASCADE, verbose_name="Criado por")
     created_at = models.DateTimeField(auto_now_add=True, verbose_name="Data de Criação")
     updated_at = models.DateTimeField(auto_now=True, verbose_name="Última Atualização")
 
+    objects = TaskQuerySet.as_manager()
+
     class Meta:
         verbose_name = "Tarefa/Evento"
         verbose_name_plural = "Tarefas/Eventos"
         ordering = ['-created_at']
+        indexes = [
+            # Consultas por janela de datas (calendário, contadores). fim_serie
+            # vem primeiro: em "fim_serie >= início" o intervalo percorrido só
+            # tem os eventos (e séries) que ainda não terminaram, enquanto um
+            # intervalo em "start_date <= fim" cobriria quase todo o histórico
+            models.Index(fields=['fim_serie', 'start_date'], name='task_periodo_idx'),
+            # Mesma janela restrita aos eventos de um criador (filtro usuario__is_staff)
+            models.Index(fields=['usuario', 'fim_serie', 'start_date'], name='task_usuario_periodo_idx'),
+            # Paginação por cursor da lista de eventos
+            models.Index(fields=['-created_at', '-id'], name='task_criacao_idx'),
+        ]
 
     def __str__(self):
         return self.title
@@ -42,9 +110,108 @@ class Task(models.Model):
         elif self.start_date is None or self.end_date is None:
             raise ValidationError('Ambas as datas de início e fim devem ser fornecidas.')
 
+        if self.recorrencia:
+            if not self.recorrencia_fim:
+                raise ValidationError('Informe até quando o evento se repete.')
+            if self.recorrencia_fim < self.start_date:
+                raise ValidationError('A data final da repetição não pode ser anterior à data de início.')
+            if not self.intervalo:
+                raise ValidationError('O intervalo de repetição deve ser maior que zero.')
+
+    @property
+    def eh_recorrente(self):
+        return bool(self.recorrencia)
+
+    @property
+    def vagas_disponiveis(self):
+        """Vagas ainda livres, ou None quando o evento não tem limite."""
+        if not self.total_subs:
+            return None
+        return max(0, self.total_subs - self.subs)
+
+    def encerrado(self, agora=None):
+        """Indica se o evento (ou a última ocorrência da série) já terminou."""
+        termino = datetime.datetime.combine(self.fim_serie, self.end_time)
+        return termino < timezone.localtime(agora).replace(tzinfo=None)
+
+    def ocorrencias(self, inicio=None, fim=None, excecoes=frozenset()):
+        """Ocorrências (data_inicio, data_fim) da tarefa dentro do intervalo."""
+        return recorrencia.ocorrencias(self, inicio, fim, excecoes)
+
     def save(self, *args, **kwargs):
         """
-        Sobrescreve o método save para validar os dados antes de salvar.
+        Sobrescreve o método save para validar os dados antes de salvar
+        e atualizar o último dia ocupado pela tarefa (fim_serie).
         """
         self.clean()
-        super().save(*args, **kwargs)
\ No newline at end of file
+        if not self.recorrencia:
+            self.recorrencia_fim = None
+        self.fim_serie = recorrencia.fim_serie(self)
+        if not self._state.adding and kwargs.get('update_fields') is None and not kwargs.get('force_insert'):
+            # subs é mantido pelas inscrições com UPDATEs atômicos; gravar o valor
+            # carregado em memória desfaria inscrições concorrentes
+            kwargs['update_fields'] = [
+                field.name for field in self._meta.concrete_fields
+                if not field.primary_key and field.name != 'subs'
+            ]
+        super().save(*args, **kwargs)
+
+
+class TaskExcecao(models.Model):
+    """
+    Ocorrência cancelada de uma tarefa recorrente (ex.: feriado).
+    A data corresponde ao dia de início da ocorrência que não acontecerá.
+    """
+    task = models.ForeignKey(Task, on_delete=models.CASCADE, related_name='excecoes', verbose_name="Tarefa/Evento")
+    data = models.DateField(verbose_name="Data da Ocorrência")
+
+    class Meta:
+        verbose_name = "Exceção de Repetição"
+        verbose_name_plural = "Exceções de Repetição"
+        ordering = ['data']
+        constraints = [
+            models.UniqueConstraint(fields=['task', 'data'], name='task_excecao_unica'),
+        ]
+
+    def __str__(self):
+        return f"{self.task.title} - {self.data.strftime('%d/%m/%Y')}"
+
+
+class Inscricao(models.Model):
+    """
+    Inscrição de um usuário em uma tarefa/evento.
+    Existe no máximo uma inscrição por usuário e evento; cancelar e se
+    inscrever de novo reaproveita o mesmo registro. Em tarefas recorrentes a
+    inscrição é na série: vale para todas as ocorrências, e ``total_subs``
+    limita os inscritos da série, não de cada ocorrência.
+    """
+    CONFIRMADA = 'confirmada'
+    ESPERA = 'espera'
+    CANCELADA = 'cancelada'
+    STATUS_CHOICES = [
+        (CONFIRMADA, 'Confirmada'),
+        (ESPERA, 'Lista de espera'),
+        (CANCELADA, 'Cancelada'),
+    ]
+
+    task = models.ForeignKey(Task, on_delete=models.CASCADE, related_name='inscricoes', verbose_name="Tarefa/Evento")
+    usuario = models.ForeignKey(User, on_delete=models.CASCADE, related_name='inscricoes', verbose_name="Usuário")
+    status = models.CharField(max_length=10, choices=STATUS_CHOICES, default=ESPERA, verbose_name="Situação")
+    # Ordem na lista de espera: atualizada a cada nova tentativa de inscrição
+    solicitada_em = models.DateTimeField(default=timezone.now, verbose_name="Solicitada em")
+    atualizada_em = models.DateTimeField(auto_now=True, verbose_name="Última Atualização")
+
+    class Meta:
+        verbose_name = "Inscrição"
+        verbose_name_plural = "Inscrições"
+        ordering = ['solicitada_em', 'id']
+        constraints = [
+            models.UniqueConstraint(fields=['task', 'usuario'], name='inscricao_unica_por_task'),
+        ]
+        indexes = [
+            # Próximo da lista de espera de um evento
+            models.Index(fields=['task', 'status', 'solicitada_em'], name='inscricao_fila_idx'),
+        ]
+
+    def __str__(self):
+        return f"{self.usuario.username} - {self.task.title} ({self.get_status_display()})"
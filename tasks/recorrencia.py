@@ -0,0 +1,129 @@
+"""
+Expansão de recorrências de Task.
+
+Uma tarefa recorrente é gravada uma única vez: ``start_date``/``end_date``
+descrevem a primeira ocorrência e ``recorrencia``, ``intervalo`` e
+``recorrencia_fim`` definem como ela se repete. As ocorrências nunca são
+materializadas no banco; são calculadas sob demanda apenas para a janela
+pedida, e as contagens usam aritmética de datas em vez de percorrer a série.
+"""
+import calendar
+from datetime import timedelta
+
+DIARIA = 'daily'
+SEMANAL = 'weekly'
+MENSAL = 'monthly'
+
+RECORRENCIA_CHOICES = [
+    ('', 'Não se repete'),
+    (DIARIA, 'Diária'),
+    (SEMANAL, 'Semanal'),
+    (MENSAL, 'Mensal'),
+]
+
+UM_DIA = timedelta(days=1)
+
+
+def _somar_meses(data, meses):
+    """Soma meses a uma data, ajustando para o último dia do mês quando necessário."""
+    mes = data.month - 1 + meses
+    ano = data.year + mes // 12
+    mes = mes % 12 + 1
+    dia = min(data.day, calendar.monthrange(ano, mes)[1])
+    return data.replace(year=ano, month=mes, day=dia)
+
+
+def _passo_dias(task):
+    return task.intervalo * (7 if task.recorrencia == SEMANAL else 1)
+
+
+def duracao(task):
+    """Duração (em dias) de cada ocorrência."""
+    return task.end_date - task.start_date
+
+
+def data_ocorrencia(task, indice):
+    """Data de início da ocorrência de número ``indice`` (a primeira é 0)."""
+    if task.recorrencia == MENSAL:
+        return _somar_meses(task.start_date, indice * task.intervalo)
+    return task.start_date + timedelta(days=indice * _passo_dias(task))
+
+
+def indice_inicial(task, data):
+    """Menor índice cuja ocorrência começa em ``data`` ou depois."""
+    if data <= task.start_date:
+        return 0
+    if task.recorrencia == MENSAL:
+        meses = (data.year - task.start_date.year) * 12 + data.month - task.start_date.month
+        indice = meses // task.intervalo
+        while data_ocorrencia(task, indice) < data:
+            indice += 1
+        return indice
+    return -(-(data - task.start_date).days // _passo_dias(task))
+
+
+def total_ocorrencias(task):
+    """Quantidade de ocorrências da série, sem descontar exceções."""
+    if not task.recorrencia:
+        return 1
+    return indice_inicial(task, task.recorrencia_fim + UM_DIA)
+
+
+def fim_serie(task):
+    """
+    Último dia ocupado pela tarefa: término da última ocorrência da série,
+    ou ``end_date`` se a tarefa não se repete.
+    """
+    if not task.recorrencia:
+        return task.end_date
+    ultima = data_ocorrencia(task, total_ocorrencias(task) - 1)
+    return ultima + duracao(task)
+
+
+def eh_ocorrencia(task, data):
+    """Indica se alguma ocorrência da série começa exatamente em ``data``."""
+    if not task.recorrencia:
+        return data == task.start_date
+    if data < task.start_date or data > task.recorrencia_fim:
+        return False
+    return data_ocorrencia(task, indice_inicial(task, data)) == data
+
+
+def ocorrencias(task, inicio=None, fim=None, excecoes=frozenset()):
+    """
+    Gera pares (data_inicio, data_fim) das ocorrências que se sobrepõem ao
+    intervalo [inicio, fim], pulando as datas em ``excecoes``. A geração
+    começa diretamente na primeira ocorrência relevante da janela.
+    """
+    dias = duracao(task)
+    if not task.recorrencia:
+        if (fim is None or task.start_date <= fim) and (inicio is None or task.end_date >= inicio):
+            yield task.start_date, task.end_date
+        return
+
+    indice = 0 if inicio is None else indice_inicial(task, inicio - dias)
+    total = total_ocorrencias(task)
+    while indice < total:
+        data = data_ocorrencia(task, indice)
+        if fim is not None and data > fim:
+            break
+        if data not in excecoes:
+            yield data, data + dias
+        indice += 1
+
+
+def contar_inicios(task, inicio, fim, excecoes=frozenset()):
+    """
+    Conta as ocorrências que começam entre ``inicio`` e ``fim`` (inclusive)
+    sem gerá-las, descontando as exceções que caem em datas de ocorrência.
+    """
+    if fim < inicio:
+        return 0
+    if not task.recorrencia:
+        return int(inicio <= task.start_date <= fim and task.start_date not in excecoes)
+
+    primeiro = indice_inicial(task, inicio)
+    ultimo = min(total_ocorrencias(task), indice_inicial(task, fim + UM_DIA))
+    quantidade = max(0, ultimo - primeiro)
+    quantidade -= sum(1 for data in excecoes if inicio <= data <= fim and eh_ocorrencia(task, data))
+    return quantidade
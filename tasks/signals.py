@@ -0,0 +1,45 @@
+from django.contrib.auth.models import User
+from django.db import transaction
+from django.db.models.signals import pre_save, post_save, post_delete
+from django.dispatch import receiver
+from .models import Task, TaskExcecao
+from . import cache as tasks_cache
+
+
+@receiver(post_save, sender=Task)
+@receiver(post_delete, sender=Task)
+@receiver(post_save, sender=TaskExcecao)
+@receiver(post_delete, sender=TaskExcecao)
+def invalidar_cache_tasks(sender, instance, **kwargs):
+    """
+    Avança a versão do calendário sempre que uma tarefa (ou uma exceção de
+    repetição) é gravada ou removida, invalidando payloads em cache e ETags
+    já enviados aos navegadores.
+    A versão só avança após o commit, para que nenhuma leitura concorrente
+    grave dados antigos sob a nova versão.
+    """
+    transaction.on_commit(tasks_cache.invalidar)
+
+
+@receiver(pre_save, sender=User)
+def guardar_is_staff_original(sender, instance, update_fields=None, raw=False, **kwargs):
+    """
+    Guarda o is_staff gravado no banco antes do save. A comparação fica para
+    o post_save, depois de todos os pre_save (ex.: grant_staff_permissions)
+    terem ajustado a instância.
+    """
+    instance._is_staff_original = None
+    if raw or instance._state.adding or (update_fields is not None and 'is_staff' not in update_fields):
+        return
+    instance._is_staff_original = User.objects.filter(pk=instance.pk).values_list('is_staff', flat=True).first()
+
+
+@receiver(post_save, sender=User)
+def invalidar_cache_tasks_staff(sender, instance, created, **kwargs):
+    """
+    Os usuários regulares veem as tarefas criadas por staff: promover ou
+    rebaixar alguém muda o calendário de todos e invalida o cache.
+    """
+    original = getattr(instance, '_is_staff_original', None)
+    if original is not None and original != instance.is_staff:
+        transaction.on_commit(tasks_cache.invalidar)
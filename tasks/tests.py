@@ -1 +1,403 @@
-from django.test import TestCase
+import datetime
+import threading
+import unittest
+from unittest import mock
+
+from django.contrib.auth.models import User
+from django.core.cache import cache
+from django.db import connection
+from django.test import SimpleTestCase, TestCase, TransactionTestCase
+from django.urls import reverse
+
+from . import cache as tasks_cache, inscricoes, recorrencia
+from .models import Inscricao, Task, TaskExcecao
+
+
+def _criar_evento(criador, total_subs=2, dias=1):
+    hoje = datetime.date.today()
+    return Task.objects.create(
+        title='Aula de spinning', description='Turma da manhã', usuario=criador,
+        start_date=hoje + datetime.timedelta(days=dias), end_date=hoje + datetime.timedelta(days=dias),
+        start_time=datetime.time(8), end_time=datetime.time(9), total_subs=total_subs,
+    )
+
+
+class InscricoesTests(TestCase):
+
+    def setUp(self):
+        self.staff = User.objects.create_user('professor', is_staff=True)
+        self.membros = [User.objects.create_user(f'membro{n}') for n in range(4)]
+        self.task = _criar_evento(self.staff, total_subs=2)
+
+    def _status(self, usuario):
+        return Inscricao.objects.get(task=self.task, usuario=usuario).status
+
+    def test_evento_lotado_vai_para_lista_de_espera(self):
+        status = [inscricoes.inscrever(self.task, membro).status for membro in self.membros[:3]]
+        self.assertEqual(status, [Inscricao.CONFIRMADA, Inscricao.CONFIRMADA, Inscricao.ESPERA])
+        self.task.refresh_from_db()
+        self.assertEqual(self.task.subs, 2)
+
+    def test_cancelamento_promove_o_primeiro_da_fila(self):
+        for membro in self.membros:
+            inscricoes.inscrever(self.task, membro)
+        inscricoes.cancelar_inscricao(self.task, self.membros[0])
+
+        self.assertEqual(self._status(self.membros[0]), Inscricao.CANCELADA)
+        self.assertEqual(self._status(self.membros[2]), Inscricao.CONFIRMADA)
+        self.assertEqual(self._status(self.membros[3]), Inscricao.ESPERA)
+        self.task.refresh_from_db()
+        self.assertEqual(self.task.subs, 2)
+
+    def test_reinscricao_e_cancelamento_sao_idempotentes(self):
+        primeira = inscricoes.inscrever(self.task, self.membros[0])
+        segunda = inscricoes.inscrever(self.task, self.membros[0])
+        self.assertEqual((primeira.pk, segunda.status), (segunda.pk, Inscricao.CONFIRMADA))
+        self.task.refresh_from_db()
+        self.assertEqual(self.task.subs, 1)
+
+        self.assertIsNotNone(inscricoes.cancelar_inscricao(self.task, self.membros[0]))
+        self.assertIsNone(inscricoes.cancelar_inscricao(self.task, self.membros[0]))
+        self.task.refresh_from_db()
+        self.assertEqual(self.task.subs, 0)
+
+    def test_inscricoes_nunca_excedem_as_vagas(self):
+        for rodada in range(3):
+            for membro in self.membros:
+                inscricoes.inscrever(self.task, membro)
+                self.task.refresh_from_db()
+                self.assertLessEqual(self.task.subs, self.task.total_subs)
+            for membro in self.membros[rodada:]:
+                inscricoes.cancelar_inscricao(self.task, membro)
+                self.task.refresh_from_db()
+                self.assertLessEqual(self.task.subs, self.task.total_subs)
+        confirmadas = self.task.inscricoes.filter(status=Inscricao.CONFIRMADA).count()
+        self.assertEqual(self.task.subs, confirmadas)
+
+    def test_serie_tem_uma_inscricao_para_todas_as_ocorrencias(self):
+        self.task.recorrencia = recorrencia.SEMANAL
+        self.task.recorrencia_fim = self.task.start_date + datetime.timedelta(weeks=4)
+        self.task.save()
+        self.client.force_login(self.membros[0])
+
+        self.assertContains(self.client.get(reverse('task-view', args=[self.task.pk])), 'Inscrição na série')
+        self.client.post(reverse('inscrever-task', args=[self.task.pk]))
+        self.assertEqual(self.task.inscricoes.get().status, Inscricao.CONFIRMADA)
+        self.task.refresh_from_db()
+        self.assertEqual(self.task.subs, 1)
+
+    def test_evento_encerrado_nao_aceita_inscricoes(self):
+        encerrado = _criar_evento(self.staff, dias=-1)
+        with self.assertRaises(inscricoes.EventoEncerrado):
+            inscricoes.inscrever(encerrado, self.membros[0])
+        self.assertFalse(encerrado.inscricoes.exists())
+
+
+def _serie(inicio, ate, tipo=recorrencia.SEMANAL, intervalo=1, dias=0):
+    """Tarefa recorrente em memória, para testar a aritmética de datas."""
+    return Task(
+        start_date=inicio, end_date=inicio + datetime.timedelta(days=dias),
+        recorrencia=tipo, intervalo=intervalo, recorrencia_fim=ate,
+    )
+
+
+class RecorrenciaTests(SimpleTestCase):
+
+    def _inicios(self, task, inicio=None, fim=None, excecoes=frozenset()):
+        return [data for data, _ in recorrencia.ocorrencias(task, inicio, fim, excecoes)]
+
+    def test_mensal_ajusta_ao_fim_do_mes(self):
+        task = _serie(datetime.date(2026, 1, 31), datetime.date(2026, 5, 31), recorrencia.MENSAL)
+        self.assertEqual(self._inicios(task), [
+            datetime.date(2026, 1, 31), datetime.date(2026, 2, 28), datetime.date(2026, 3, 31),
+            datetime.date(2026, 4, 30), datetime.date(2026, 5, 31),
+        ])
+
+    def test_mensal_em_ano_bissexto(self):
+        task = _serie(datetime.date(2024, 1, 31), datetime.date(2024, 3, 31), recorrencia.MENSAL)
+        self.assertEqual(self._inicios(task)[1], datetime.date(2024, 2, 29))
+        self.assertTrue(recorrencia.eh_ocorrencia(task, datetime.date(2024, 2, 29)))
+        self.assertFalse(recorrencia.eh_ocorrencia(task, datetime.date(2024, 2, 28)))
+
+    def test_intervalo_maior_que_um(self):
+        quinzenal = _serie(datetime.date(2026, 1, 5), datetime.date(2026, 2, 28), intervalo=2)
+        self.assertEqual(self._inicios(quinzenal), [
+            datetime.date(2026, 1, 5), datetime.date(2026, 1, 19),
+            datetime.date(2026, 2, 2), datetime.date(2026, 2, 16),
+        ])
+        trimestral = _serie(datetime.date(2026, 1, 15), datetime.date(2026, 12, 31), recorrencia.MENSAL, intervalo=3)
+        self.assertEqual([data.month for data in self._inicios(trimestral)], [1, 4, 7, 10])
+
+    def test_excecoes_sao_puladas_e_descontadas(self):
+        task = _serie(datetime.date(2026, 3, 1), datetime.date(2026, 3, 10), recorrencia.DIARIA)
+        excecoes = {datetime.date(2026, 3, 3), datetime.date(2026, 3, 20)}
+        inicios = self._inicios(task, excecoes=excecoes)
+        self.assertEqual(len(inicios), 9)
+        self.assertNotIn(datetime.date(2026, 3, 3), inicios)
+        # A exceção fora da série não é descontada
+        self.assertEqual(
+            recorrencia.contar_inicios(task, datetime.date(2026, 3, 1), datetime.date(2026, 3, 31), excecoes), 9,
+        )
+
+    def test_fim_da_serie(self):
+        # recorrencia_fim numa quarta: a última ocorrência semanal é a segunda anterior
+        task = _serie(datetime.date(2026, 1, 5), datetime.date(2026, 2, 4), dias=1)
+        self.assertEqual(recorrencia.total_ocorrencias(task), 5)
+        self.assertEqual(self._inicios(task)[-1], datetime.date(2026, 2, 2))
+        self.assertEqual(recorrencia.fim_serie(task), datetime.date(2026, 2, 3))
+        simples = Task(start_date=datetime.date(2026, 1, 5), end_date=datetime.date(2026, 1, 6), recorrencia='')
+        self.assertEqual(recorrencia.fim_serie(simples), datetime.date(2026, 1, 6))
+
+    def test_janela_comeca_no_meio_da_serie(self):
+        # Ocorrências de dois dias: a que começa antes da janela e termina nela entra
+        task = _serie(datetime.date(2026, 1, 4), datetime.date(2026, 12, 31), dias=1)
+        ocorrencias = list(recorrencia.ocorrencias(task, datetime.date(2026, 6, 1), datetime.date(2026, 6, 14)))
+        self.assertEqual(ocorrencias, [
+            (datetime.date(2026, 5, 31), datetime.date(2026, 6, 1)),
+            (datetime.date(2026, 6, 7), datetime.date(2026, 6, 8)),
+            (datetime.date(2026, 6, 14), datetime.date(2026, 6, 15)),
+        ])
+
+
+class FeedRecorrenteTests(TestCase):
+
+    def setUp(self):
+        cache.clear()
+        self.staff = User.objects.create_user('professor', is_staff=True)
+        self.client.force_login(self.staff)
+
+    def test_tarefa_recorrente_aparece_em_mes_posterior(self):
+        task = Task.objects.create(
+            title='Funcional', description='Toda segunda', usuario=self.staff,
+            start_date=datetime.date(2026, 1, 5), end_date=datetime.date(2026, 1, 5),
+            start_time=datetime.time(7), end_time=datetime.time(8),
+            recorrencia=recorrencia.SEMANAL, recorrencia_fim=datetime.date(2026, 6, 30),
+        )
+        TaskExcecao.objects.create(task=task, data=datetime.date(2026, 3, 16))
+
+        resposta = self.client.get(reverse('task_events'), {'start': '2026-03-01', 'end': '2026-03-31'})
+        self.assertEqual(resposta.status_code, 200)
+        inicios = [evento['start'] for evento in resposta.json()]
+        self.assertEqual(inicios, [
+            '2026-03-02T07:00:00', '2026-03-09T07:00:00', '2026-03-23T07:00:00', '2026-03-30T07:00:00',
+        ])
+
+
+class FeedJanelaTests(TestCase):
+
+    def setUp(self):
+        cache.clear()
+        self.staff = User.objects.create_user('professor', is_staff=True)
+        self.client.force_login(self.staff)
+        for titulo, inicio, fim in (
+            ('Janeiro', datetime.date(2026, 1, 10), datetime.date(2026, 1, 10)),
+            ('Fevereiro a março', datetime.date(2026, 2, 27), datetime.date(2026, 3, 2)),
+            ('Março', datetime.date(2026, 3, 15), datetime.date(2026, 3, 15)),
+            ('Maio', datetime.date(2026, 5, 1), datetime.date(2026, 5, 1)),
+        ):
+            Task.objects.create(
+                title=titulo, description='-', usuario=self.staff, start_date=inicio, end_date=fim,
+                start_time=datetime.time(10), end_time=datetime.time(11),
+            )
+
+    def _titulos(self, **parametros):
+        resposta = self.client.get(reverse('task_events'), parametros)
+        self.assertEqual(resposta.status_code, 200)
+        return [evento['title'] for evento in resposta.json()]
+
+    def test_janela_retorna_so_eventos_que_se_sobrepoem(self):
+        # Limites no formato enviado pelo FullCalendar (data/hora com fuso)
+        self.assertEqual(
+            self._titulos(start='2026-03-01T00:00:00-03:00', end='2026-04-01T00:00:00-03:00'),
+            ['Fevereiro a março', 'Março'],
+        )
+
+    def test_sem_janela_retorna_todos(self):
+        self.assertEqual(len(self._titulos()), 4)
+
+    def test_limite_invalido(self):
+        resposta = self.client.get(reverse('task_events'), {'start': 'ontem'})
+        self.assertEqual(resposta.status_code, 400)
+
+
+class FeedCondicionalTests(TestCase):
+
+    def setUp(self):
+        cache.clear()
+        self.staff = User.objects.create_user('professor', is_staff=True)
+        self.client.force_login(self.staff)
+        self.task = _criar_evento(self.staff)
+        self.url = reverse('task_events')
+
+    def test_if_none_match_responde_304(self):
+        resposta = self.client.get(self.url)
+        self.assertEqual(resposta.status_code, 200)
+        self.assertTrue(resposta.has_header('Last-Modified'))
+
+        repetida = self.client.get(self.url, headers={'If-None-Match': resposta['ETag']})
+        self.assertEqual(repetida.status_code, 304)
+        self.assertEqual(repetida.content, b'')
+        self.assertEqual(repetida['ETag'], resposta['ETag'])
+
+    def test_if_modified_since_responde_304(self):
+        resposta = self.client.get(self.url)
+        repetida = self.client.get(self.url, headers={'If-Modified-Since': resposta['Last-Modified']})
+        self.assertEqual(repetida.status_code, 304)
+
+    def test_editar_tarefa_muda_o_etag(self):
+        etag = self.client.get(self.url)['ETag']
+        self.task.title = 'Aula remarcada'
+        with self.captureOnCommitCallbacks(execute=True):
+            self.task.save()
+
+        resposta = self.client.get(self.url, headers={'If-None-Match': etag})
+        self.assertEqual(resposta.status_code, 200)
+        self.assertNotEqual(resposta['ETag'], etag)
+        self.assertEqual(resposta.json()[0]['title'], 'Aula remarcada')
+
+
+class ChartYearTests(TestCase):
+
+    def setUp(self):
+        cache.clear()
+        self.staff = User.objects.create_user('professor', is_staff=True)
+        self.client.force_login(self.staff)
+        for inicio in (datetime.date(2025, 1, 6), datetime.date(2025, 1, 20), datetime.date(2025, 3, 3),
+                       datetime.date(2024, 12, 30), datetime.date(2026, 1, 5)):
+            Task.objects.create(
+                title='Avaliação', description='-', usuario=self.staff, start_date=inicio, end_date=inicio,
+                start_time=datetime.time(9), end_time=datetime.time(10),
+            )
+        # Semanal de 2025-02-03 a 2025-02-24 (quatro segundas), sem a do dia 17
+        serie = Task.objects.create(
+            title='Funcional', description='-', usuario=self.staff,
+            start_date=datetime.date(2025, 2, 3), end_date=datetime.date(2025, 2, 3),
+            start_time=datetime.time(7), end_time=datetime.time(8),
+            recorrencia=recorrencia.SEMANAL, recorrencia_fim=datetime.date(2025, 2, 24),
+        )
+        TaskExcecao.objects.create(task=serie, data=datetime.date(2025, 2, 17))
+
+    def _grafico(self, **parametros):
+        return self.client.get(reverse('chart-year'), parametros)
+
+    def test_contagem_por_mes(self):
+        resposta = self._grafico(year=2025)
+        self.assertEqual(resposta.status_code, 200)
+        self.assertEqual(resposta.json(), [2, 3, 1, 0, 0, 0, 0, 0, 0, 0, 0, 0])
+
+    def test_contagem_por_semana_iso(self):
+        dados = self._grafico(year=2025, group='week').json()
+        self.assertEqual(len(dados), 52)
+        # 2024-12-30 pertence à semana 1 do ano ISO 2025
+        self.assertEqual(dados[:9], [1, 1, 0, 1, 0, 1, 1, 0, 1])
+        self.assertEqual(dados[9], 1)
+        self.assertEqual(len(self._grafico(year=2026, group='week').json()), 53)
+
+    def test_parametros_invalidos(self):
+        for parametros in ({'group': 'day'}, {'year': 'abc'}, {'year': 0}, {'year': 10000}):
+            with self.subTest(**parametros):
+                self.assertEqual(self._grafico(**parametros).status_code, 400)
+
+
+@mock.patch('tasks.views.timezone.localdate', return_value=datetime.date(2026, 3, 4))
+class ContadoresDashboardTests(TestCase):
+
+    def setUp(self):
+        cache.clear()
+        self.staff = User.objects.create_user('professor', is_staff=True)
+        # Quarta-feira 2026-03-04: a semana do dashboard vai até domingo, dia 8
+        for inicio, fim in (
+            (datetime.date(2026, 3, 4), datetime.date(2026, 3, 4)),
+            (datetime.date(2026, 3, 3), datetime.date(2026, 3, 5)),
+            (datetime.date(2026, 3, 6), datetime.date(2026, 3, 6)),
+            (datetime.date(2026, 3, 20), datetime.date(2026, 3, 20)),
+        ):
+            Task.objects.create(
+                title='Evento', description='-', usuario=self.staff, start_date=inicio, end_date=fim,
+                start_time=datetime.time(9), end_time=datetime.time(10),
+            )
+        # Diária de 1 a 10 de março, sem o dia 5
+        serie = Task.objects.create(
+            title='Alongamento', description='-', usuario=self.staff,
+            start_date=datetime.date(2026, 3, 1), end_date=datetime.date(2026, 3, 1),
+            start_time=datetime.time(6), end_time=datetime.time(7),
+            recorrencia=recorrencia.DIARIA, recorrencia_fim=datetime.date(2026, 3, 10),
+        )
+        TaskExcecao.objects.create(task=serie, data=datetime.date(2026, 3, 5))
+
+    def test_contadores(self, localdate):
+        self.client.force_login(User.objects.create_user('membro'))
+        resposta = self.client.get(reverse('dashboard-counters'))
+        self.assertEqual(resposta.status_code, 200)
+        self.assertEqual(resposta.json(), {
+            # Hoje: o evento do dia, o de 3 a 5 e a ocorrência do dia 4
+            'tasks_today_count': 3,
+            # Semana (4 a 8): os eventos dos dias 4 e 6 e as ocorrências 4, 6, 7 e 8
+            'tasks_week_count': 6,
+            # Total: quatro eventos simples e nove ocorrências
+            'total_tasks_count': 13,
+        })
+
+    def test_pagina_usa_os_mesmos_contadores(self, localdate):
+        self.client.force_login(self.staff)
+        resposta = self.client.get(reverse('dashboard'))
+        self.assertEqual(resposta.status_code, 200)
+        self.assertEqual(
+            (resposta.context['tasks_today_count'], resposta.context['tasks_week_count']), (3, 6),
+        )
+
+    def test_visitante_e_redirecionado(self, localdate):
+        self.assertEqual(self.client.get(reverse('dashboard-counters')).status_code, 302)
+
+
+class CacheStaffTests(TestCase):
+
+    def _versao_apos(self, acao):
+        antes = tasks_cache.versao(tasks_cache.CLASSE_MEMBRO)
+        with self.captureOnCommitCallbacks(execute=True):
+            acao()
+        return antes, tasks_cache.versao(tasks_cache.CLASSE_MEMBRO)
+
+    def test_mudar_is_staff_invalida_o_cache(self):
+        usuario = User.objects.create_user('professor')
+        usuario.is_staff = True
+        antes, depois = self._versao_apos(usuario.save)
+        self.assertNotEqual(antes, depois)
+
+    def test_promocao_por_email_institucional_invalida_o_cache(self):
+        usuario = User.objects.create_user('professor')
+        usuario.email = 'professor@escolar.ifrn.edu.br'
+        antes, depois = self._versao_apos(usuario.save)
+        self.assertNotEqual(antes, depois)
+
+    def test_outros_saves_nao_invalidam(self):
+        usuario = User.objects.create_user('membro')
+        usuario.first_name = 'Ana'
+        antes, depois = self._versao_apos(usuario.save)
+        self.assertEqual(antes, depois)
+
+
+@unittest.skipUnless(connection.vendor == 'postgresql', 'requer bloqueio de linha do PostgreSQL')
+class InscricoesConcorrentesTests(TransactionTestCase):
+
+    def test_rajada_de_inscricoes_respeita_as_vagas(self):
+        staff = User.objects.create_user('professor', is_staff=True)
+        membros = [User.objects.create_user(f'membro{n}') for n in range(12)]
+        task = _criar_evento(staff, total_subs=5)
+
+        def inscrever(membro):
+            try:
+                inscricoes.inscrever(task, membro)
+            finally:
+                connection.close()
+
+        threads = [threading.Thread(target=inscrever, args=(membro,)) for membro in membros]
+        for thread in threads:
+            thread.start()
+        for thread in threads:
+            thread.join()
+
+        task.refresh_from_db()
+        self.assertEqual(task.subs, 5)
+        self.assertEqual(task.inscricoes.filter(status=Inscricao.CONFIRMADA).count(), 5)
+        self.assertEqual(task.inscricoes.filter(status=Inscricao.ESPERA).count(), 7)
@@ -1,6 +1,6 @@
 from django.urls import path
 from . import views
-from .views import TaskListView, TaskDetailView, TaskCreateView, TaskUpdateView, TaskDeleteView, TaskEventsView, CalendarView, EventCountView, ChartYear
+from .views import TaskListView, TaskDetailView, TaskInscricaoView, TaskCancelarInscricaoView, TaskCreateView, TaskUpdateView, TaskDeleteView, TaskEventsView, CalendarView, EventCountView, EventCountApiView, ChartYear
 
 urlpatterns = [
     path('dashboard/', EventCountView.as_view(), name='dashboard'),
@@ -8,8 +8,11 @@ urlpatterns = [
     path('list/', TaskListView.as_view(), name='task-list'),
     path('chart-year/', ChartYear.as_view(), name='chart-year'),
     path('task/<int:pk>/', TaskDetailView.as_view(), name='task-view'),
+    path('task/<int:pk>/inscrever/', TaskInscricaoView.as_view(), name='inscrever-task'),
+    path('task/<int:pk>/cancelar-inscricao/', TaskCancelarInscricaoView.as_view(), name='cancelar-inscricao-task'),
     path('newtask/', TaskCreateView.as_view(), name='new-task'),
     path('list/edit/<int:pk>/', TaskUpdateView.as_view(), name='edit-task'),
     path('list/delete/<int:pk>/', TaskDeleteView.as_view(), name='delete-task'),
     path('api/tasks/', TaskEventsView.as_view(), name='task_events'),
+    path('api/dashboard/', EventCountApiView.as_view(), name='dashboard-counters'),
 ]
\ No newline at end of file
@@ -1,9 +1,12 @@
+import calendar
+import json
+from collections import defaultdict
 from django.shortcuts import render, get_object_or_404, redirect
 from django.http import HttpResponse
 from .forms import TaskForm
 from django.contrib import messages
 from django.http import JsonResponse
-from .models import Task
+from .models import Task, TaskExcecao, Inscricao
 from datetime import datetime, date, timedelta
 from django.views.generic import ListView, DetailView, CreateView, UpdateView, DeleteView
 from django.urls import reverse_lazy
@@ -11,15 +14,28 @@ from django.views import View
 from braces.views import LoginRequiredMixin
 from django.views.generic import TemplateView
 from django.utils import timezone
+from django.utils.dateparse import parse_date, parse_datetime
 from django.core.exceptions import PermissionDenied
+from django.core.serializers.json import DjangoJSONEncoder
+from django.db.models import Count, Q
+from django.db.models.functions import ExtractMonth, ExtractWeek
+from django.contrib.auth.decorators import login_required
+from django.utils.cache import get_conditional_response, patch_cache_control
+from django.utils.decorators import method_decorator
+from django.utils.http import http_date, quote_etag
+from paginas.paginacao import CursorPaginationMixin
+from . import cache as tasks_cache
+from . import recorrencia
+from . import inscricoes
 
 
-class TaskListView(LoginRequiredMixin, ListView):
+class TaskListView(LoginRequiredMixin, CursorPaginationMixin, ListView):
     login_url = reverse_lazy('login')
     model = Task
     template_name = 'tasks/list.html'
     context_object_name = 'tasks'
     ordering = '-created_at'
+    cursor_ordering = ('-created_at', '-id')
     paginate_by = 3
 
     def get_queryset(self):
@@ -40,6 +56,59 @@ class TaskDetailView(DetailView):
     template_name = 'tasks/task.html'
     context_object_name = 'task'
 
+    def get_context_data(self, **kwargs):
+        context = super().get_context_data(**kwargs)
+        user = self.request.user
+        if user.is_authenticated:
+            context['inscricao'] = Inscricao.objects.filter(
+                task=self.object, usuario=user, status__in=inscricoes.ATIVAS
+            ).first()
+        if user.is_staff:
+            context['lista_espera'] = self.object.inscricoes.filter(
+                status=Inscricao.ESPERA
+            ).select_related('usuario').order_by('solicitada_em', 'id')
+        return context
+
+
+class TaskInscricaoView(LoginRequiredMixin, View):
+    login_url = reverse_lazy('login')
+
+    def post(self, request, pk, *args, **kwargs):
+        """
+        Inscreve o usuário logado no evento. Reenvios da mesma inscrição são
+        seguros: o usuário continua com a vaga (ou posição) que já tinha.
+        """
+        task = get_object_or_404(
+            Task.objects.visiveis_para(request.user).only('id', 'title', 'end_date', 'end_time', 'fim_serie', 'recorrencia'),
+            pk=pk,
+        )
+        try:
+            inscricao = inscricoes.inscrever(task, request.user)
+        except inscricoes.EventoEncerrado:
+            messages.error(request, 'Este evento já foi encerrado e não aceita novas inscrições.')
+            return redirect('task-view', pk=task.pk)
+        if inscricao.status == Inscricao.CONFIRMADA:
+            if task.eh_recorrente:
+                messages.success(request, 'Inscrição na série confirmada: vale para todas as ocorrências.')
+            else:
+                messages.success(request, 'Inscrição confirmada!')
+        else:
+            messages.warning(request, 'Evento lotado. Você entrou na lista de espera.')
+        return redirect('task-view', pk=task.pk)
+
+
+class TaskCancelarInscricaoView(LoginRequiredMixin, View):
+    login_url = reverse_lazy('login')
+
+    def post(self, request, pk, *args, **kwargs):
+        """Cancela a inscrição do usuário logado, liberando a vaga para a lista de espera."""
+        task = get_object_or_404(Task.objects.visiveis_para(request.user).only('id', 'title'), pk=pk)
+        if inscricoes.cancelar_inscricao(task, request.user):
+            messages.info(request, 'Inscrição cancelada.')
+        else:
+            messages.info(request, 'Você não possui inscrição ativa neste evento.')
+        return redirect('task-view', pk=task.pk)
+
 class TaskCreateView(LoginRequiredMixin, CreateView):
     login_url = reverse_lazy('login')
     model = Task
@@ -106,45 +175,214 @@ class CalendarView(TemplateView):
     def get_context_data(self, **kwargs):
         context = super().get_context_data(**kwargs)
         today = timezone.localdate()
-        user = self.request.user
-        is_authenticated = user.is_authenticated
 
-        if user.is_superuser or user.is_staff:
-            events_today = Task.objects.select_related('usuario').filter(start_date__lte=today, end_date__gte=today)
-        elif not is_authenticated:
-            events_today = Task.objects.none()
-        else:
-            # Regular users see events created by staff
-            events_today = Task.objects.select_related('usuario').filter(usuario__is_staff=True, start_date__lte=today, end_date__gte=today)
+        # Staff vê todos os eventos; usuários regulares veem eventos criados por staff
+        candidatos = Task.objects.visiveis_para(self.request.user).select_related('usuario').no_periodo(today, today)
+        excecoes = excecoes_por_task(candidatos)
+        # Tarefas recorrentes só entram se houver uma ocorrência hoje
+        events_today = [
+            task for task in candidatos
+            if any(task.ocorrencias(today, today, excecoes.get(task.id, frozenset())))
+        ]
 
         context['events_today'] = events_today
         return context
 
+def parse_limite_periodo(valor):
+    """
+    Converte um limite enviado pelo FullCalendar (``start``/``end``) em data.
+    Aceita datas ISO simples ou data/hora com fuso. Retorna None se vazio
+    e levanta ValueError se o valor for inválido.
+    """
+    if not valor:
+        return None
+    data = parse_date(valor)
+    if data is not None:
+        return data
+    data_hora = parse_datetime(valor)
+    if data_hora is None:
+        raise ValueError(valor)
+    return data_hora.date()
+
+
+def excecoes_por_task(tasks):
+    """
+    Retorna um dicionário {task_id: set(datas)} com as exceções das tarefas
+    recorrentes informadas, usando uma única consulta (ou nenhuma, se não
+    houver tarefas recorrentes).
+    """
+    ids = [task.id for task in tasks if task.recorrencia]
+    excecoes = defaultdict(set)
+    if ids:
+        for task_id, data in TaskExcecao.objects.filter(task_id__in=ids).values_list('task_id', 'data'):
+            excecoes[task_id].add(data)
+    return excecoes
+
+
+async def aexcecoes_por_task(tasks):
+    """Versão assíncrona de ``excecoes_por_task``."""
+    ids = [task.id for task in tasks if task.recorrencia]
+    excecoes = defaultdict(set)
+    if ids:
+        async for task_id, data in TaskExcecao.objects.filter(task_id__in=ids).values_list('task_id', 'data'):
+            excecoes[task_id].add(data)
+    return excecoes
+
+
+async def _eventos_calendario(user, inicio, fim):
+    """
+    Serializa em JSON os eventos visíveis ao usuário dentro da janela.
+    Tarefas recorrentes são expandidas apenas nas ocorrências da janela.
+    """
+    tasks = [
+        task async for task in
+        Task.objects.visiveis_para(user)
+        .no_periodo(inicio, fim)
+        .order_by('start_date', 'start_time')
+        .only(
+            'id', 'title', 'description', 'start_date', 'start_time', 'end_date', 'end_time',
+            'recorrencia', 'intervalo', 'recorrencia_fim',
+        )
+    ]
+    excecoes = await aexcecoes_por_task(tasks)
+
+    events = []
+    for task in tasks:
+        if not (task.start_date and task.start_time and task.end_date and task.end_time):
+            continue
+        for start_date, end_date in task.ocorrencias(inicio, fim, excecoes.get(task.id, frozenset())):
+            start_datetime = datetime.combine(start_date, task.start_time)
+            end_datetime = datetime.combine(end_date, task.end_time)
+            events.append({
+                'id': task.id,
+                'title': task.title,
+                'start': start_datetime.isoformat(),
+                'end': end_datetime.isoformat(),
+                'description': task.description,
+            })
+
+    return json.dumps(events, cls=DjangoJSONEncoder)
+
+
+def _consulta_recorrentes(user, inicio, fim):
+    return (
+        Task.objects.visiveis_para(user).recorrentes().no_periodo(inicio, fim)
+        .only('id', 'start_date', 'end_date', 'recorrencia', 'intervalo', 'recorrencia_fim')
+    )
+
+
+def _tasks_recorrentes(user, inicio, fim):
+    """Tarefas recorrentes visíveis cuja série se sobrepõe ao intervalo, com suas exceções."""
+    tasks = list(_consulta_recorrentes(user, inicio, fim))
+    return tasks, excecoes_por_task(tasks)
+
+
+async def _atasks_recorrentes(user, inicio, fim):
+    """Versão assíncrona de ``_tasks_recorrentes``."""
+    tasks = [task async for task in _consulta_recorrentes(user, inicio, fim)]
+    return tasks, await aexcecoes_por_task(tasks)
+
+
 class TaskEventsView(View):
-    def get(self, request, *args, **kwargs):
-        is_authenticated = request.user.is_authenticated
-        if request.user.is_superuser or request.user.is_staff:  
-            tasks = Task.objects.select_related('usuario').all()
-        elif not is_authenticated:
-            tasks = Task.objects.none()
-        else:
-            # Regular users see events created by staff
-            tasks = Task.objects.select_related('usuario').filter(usuario__is_staff=True)
-
-        events = []
-        for task in tasks:
-            if task.start_date and task.start_time and task.end_date and task.end_time:
-                start_datetime = datetime.combine(task.start_date, task.start_time)
-                end_datetime = datetime.combine(task.end_date, task.end_time)
-                events.append({
-                    'id': task.id,
-                    'title': task.title,
-                    'start': start_datetime.isoformat(),
-                    'end': end_datetime.isoformat(),
-                    'description': task.description,
-                })
-
-        return JsonResponse(events, safe=False)
+    async def get(self, request, *args, **kwargs):
+        """
+        Retorna os eventos visíveis ao usuário no formato do FullCalendar.
+        Quando os parâmetros ``start``/``end`` são enviados, apenas os eventos
+        que se sobrepõem à janela visível do calendário são retornados.
+
+        O JSON é mantido em cache por classe de visibilidade e janela, e as
+        respostas trazem ETag/Last-Modified para permitir respostas 304.
+        A view é assíncrona: sob ASGI, o polling do calendário não ocupa
+        um worker síncrono.
+        """
+        user = await request.auser()
+        # Equivalente ao decorator condition(), que não aceita funções async
+        etag = quote_etag(await tasks_cache.aetag_para(
+            user, request.GET.get('start', ''), request.GET.get('end', '')
+        ))
+        ultima_modificacao = int((await tasks_cache.aultima_modificacao_para(user)).timestamp())
+        response = get_conditional_response(request, etag=etag, last_modified=ultima_modificacao)
+        if response is None:
+            response = await self._eventos(request, user)
+        if request.method in ('GET', 'HEAD'):
+            if not response.has_header('Last-Modified'):
+                response.headers['Last-Modified'] = http_date(ultima_modificacao)
+            response.headers.setdefault('ETag', etag)
+        return response
+
+    async def _eventos(self, request, user):
+        try:
+            inicio = parse_limite_periodo(request.GET.get('start'))
+            fim = parse_limite_periodo(request.GET.get('end'))
+        except ValueError:
+            return JsonResponse({'erro': 'Parâmetros start/end inválidos.'}, status=400)
+
+        chave = await tasks_cache.achave_payload('eventos', user, inicio, fim)
+        payload = await tasks_cache.aobter_ou_calcular(chave, lambda: _eventos_calendario(user, inicio, fim))
+
+        response = HttpResponse(payload, content_type='application/json')
+        # Obriga o navegador a revalidar a cada carga, respondendo 304 quando nada mudou
+        patch_cache_control(response, private=True, no_cache=True)
+        return response
+
+
+def _semana_dashboard():
+    today = timezone.localdate()
+    return today, today, today + timedelta(days=(6 - today.weekday()))
+
+
+def _agregacoes_dashboard(today, start_of_week, end_of_week):
+    return {
+        'tasks_today_count': Count('id', filter=Q(start_date__lte=today, end_date__gte=today)),
+        'tasks_week_count': Count('id', filter=Q(start_date__gte=start_of_week, end_date__lte=end_of_week)),
+        'total_tasks_count': Count('id'),
+    }
+
+
+def _somar_recorrentes_dashboard(contadores, tasks, excecoes, today, start_of_week, end_of_week):
+    """Ocorrências de tarefas recorrentes são contadas sem serem geradas."""
+    for task in tasks:
+        datas_excecao = excecoes.get(task.id, frozenset())
+        dias = recorrencia.duracao(task)
+        contadores['tasks_today_count'] += recorrencia.contar_inicios(task, today - dias, today, datas_excecao)
+        contadores['tasks_week_count'] += recorrencia.contar_inicios(task, start_of_week, end_of_week - dias, datas_excecao)
+        contadores['total_tasks_count'] += recorrencia.contar_inicios(
+            task, task.start_date, task.recorrencia_fim, datas_excecao
+        )
+    return contadores
+
+
+def contadores_dashboard(user):
+    """
+    Retorna as contagens de eventos de hoje, da semana e o total visíveis ao
+    usuário. As três contagens de tarefas simples são feitas em uma única
+    consulta com agregação condicional; as recorrentes são somadas por
+    aritmética de datas. O resultado fica em cache por data e classe de
+    visibilidade.
+    """
+    semana = _semana_dashboard()
+
+    def calcular():
+        contadores = Task.objects.visiveis_para(user).simples().aggregate(**_agregacoes_dashboard(*semana))
+        tasks, excecoes = _tasks_recorrentes(user, None, None)
+        return _somar_recorrentes_dashboard(contadores, tasks, excecoes, *semana)
+
+    chave = tasks_cache.chave_payload('contadores', user, semana[0])
+    return tasks_cache.obter_ou_calcular(chave, calcular, timeout=tasks_cache.TIMEOUT_CONTADORES)
+
+
+async def acontadores_dashboard(user):
+    """Versão assíncrona de ``contadores_dashboard`` (mesmo cache)."""
+    semana = _semana_dashboard()
+
+    async def calcular():
+        contadores = await Task.objects.visiveis_para(user).simples().aaggregate(**_agregacoes_dashboard(*semana))
+        tasks, excecoes = await _atasks_recorrentes(user, None, None)
+        return _somar_recorrentes_dashboard(contadores, tasks, excecoes, *semana)
+
+    chave = await tasks_cache.achave_payload('contadores', user, semana[0])
+    return await tasks_cache.aobter_ou_calcular(chave, calcular, timeout=tasks_cache.TIMEOUT_CONTADORES)
+
 
 class EventCountView(LoginRequiredMixin, TemplateView):
     login_url = reverse_lazy('login')
@@ -152,44 +390,73 @@ class EventCountView(LoginRequiredMixin, TemplateView):
 
     def get_context_data(self, **kwargs):
         context = super().get_context_data(**kwargs)
-        user = self.request.user
-        today = timezone.localdate()
-        start_of_week = today
-        end_of_week = today + timedelta(days=(6 - today.weekday()))
-        tasks_today = Task.objects.none()
-        tasks_week = Task.objects.none()
-        total_tasks = Task.objects.none()
-
-        if user.is_superuser or user.is_staff:
-            tasks_today = Task.objects.select_related('usuario').filter(start_date__lte=today, end_date__gte=today)
-            tasks_week = Task.objects.select_related('usuario').filter(start_date__gte=start_of_week, end_date__lte=end_of_week)
-            total_tasks = Task.objects.select_related('usuario').all()
-        else:
-            # Regular users see events created by staff
-            tasks_today = Task.objects.select_related('usuario').filter(usuario__is_staff=True, start_date__lte=today, end_date__gte=today)
-            tasks_week = Task.objects.select_related('usuario').filter(usuario__is_staff=True, start_date__gte=start_of_week, end_date__lte=end_of_week)
-            total_tasks = Task.objects.select_related('usuario').filter(usuario__is_staff=True)
+        context.update(contadores_dashboard(self.request.user))
+        return context
 
-        context['tasks_today_count'] = tasks_today.count()
-        context['tasks_week_count'] = tasks_week.count()
-        context['total_tasks_count'] = total_tasks.count()
 
-        return context
+class EventCountApiView(View):
+    @method_decorator(login_required(login_url=reverse_lazy('login')))
+    async def get(self, request, *args, **kwargs):
+        """Versão JSON dos contadores do dashboard, para carregamento assíncrono."""
+        return JsonResponse(await acontadores_dashboard(await request.auser()))
 
-class ChartYear(LoginRequiredMixin, View):
-    def get(self, request, *args, **kwargs):
-        year_data = [0] * 12
-        user = request.user
-        
-        if user.is_superuser or user.is_staff:
-            tasks = Task.objects.select_related('usuario').all()
-        else:
-            # Regular users see events created by staff
-            tasks = Task.objects.select_related('usuario').filter(usuario__is_staff=True)
 
-        for task in tasks:
-            if task.start_date:
-                month = task.start_date.month - 1
-                year_data[month] += 1
+async def _contagem_por_periodo(user, year, group):
+    """
+    Conta os eventos visíveis ao usuário em cada mês (ou semana ISO) do ano,
+    com um único GROUP BY sobre start_date no banco de dados. Ocorrências de
+    tarefas recorrentes são somadas a cada período sem serem geradas.
+    """
+    tasks = Task.objects.visiveis_para(user).simples()
+    if group == 'week':
+        # Semanas ISO: o ano ISO mantém as semanas 1..52/53 consistentes
+        total_buckets = date(year, 12, 28).isocalendar()[1]
+        tasks = tasks.filter(start_date__iso_year=year).annotate(periodo=ExtractWeek('start_date'))
+        periodos = [
+            (date.fromisocalendar(year, semana, 1), date.fromisocalendar(year, semana, 7))
+            for semana in range(1, total_buckets + 1)
+        ]
+    else:
+        total_buckets = 12
+        tasks = tasks.filter(start_date__year=year).annotate(periodo=ExtractMonth('start_date'))
+        periodos = [
+            (date(year, mes, 1), date(year, mes, calendar.monthrange(year, mes)[1]))
+            for mes in range(1, 13)
+        ]
+
+    data = [0] * total_buckets
+    contagens = tasks.order_by().values('periodo').annotate(total=Count('id')).values_list('periodo', 'total')
+    async for periodo, total in contagens:
+        data[periodo - 1] = total
+
+    recorrentes, excecoes = await _atasks_recorrentes(user, periodos[0][0], periodos[-1][1])
+    for task in recorrentes:
+        datas_excecao = excecoes.get(task.id, frozenset())
+        for indice, (inicio, fim) in enumerate(periodos):
+            data[indice] += recorrencia.contar_inicios(task, inicio, fim, datas_excecao)
+    return data
+
+
+class ChartYear(View):
+    @method_decorator(login_required)
+    async def get(self, request, *args, **kwargs):
+        """
+        Retorna a quantidade de eventos por mês do ano informado em ``?year=``
+        (padrão: ano atual). Com ``?group=week`` retorna a contagem por semana ISO.
+        O resultado é mantido em cache por ano, agrupamento e classe de visibilidade.
+        """
+        group = request.GET.get('group', 'month')
+        if group not in ('month', 'week'):
+            return JsonResponse({'erro': 'Parâmetro group deve ser "month" ou "week".'}, status=400)
+        try:
+            year = int(request.GET.get('year') or timezone.localdate().year)
+        except ValueError:
+            return JsonResponse({'erro': 'Parâmetro year inválido.'}, status=400)
+        if not 1 <= year <= 9999:
+            return JsonResponse({'erro': 'Parâmetro year inválido.'}, status=400)
+
+        user = await request.auser()
+        chave = await tasks_cache.achave_payload('grafico', user, year, group)
+        year_data = await tasks_cache.aobter_ou_calcular(chave, lambda: _contagem_por_periodo(user, year, group))
 
-        return JsonResponse(year_data, safe=False)
\ No newline at end of file
+        return JsonResponse(year_data, safe=False)
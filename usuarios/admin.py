@@ -1,5 +1,11 @@
 from django.contrib import admin
-from .models import Perfil, MatriculaDisponivel
+from .models import Perfil, MatriculaDisponivel, ResumoIMC
 # Register your models here.
 admin.site.register(Perfil)
-admin.site.register(MatriculaDisponivel)
\ No newline at end of file
+admin.site.register(MatriculaDisponivel)
+
+@admin.register(ResumoIMC)
+class ResumoIMCAdmin(admin.ModelAdmin):
+    list_display = ('user', 'total_registros', 'ultimo_imc', 'atualizado_em')
+    search_fields = ('user__username',)
+    readonly_fields = [campo.name for campo in ResumoIMC._meta.fields]
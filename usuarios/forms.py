@@ -3,6 +3,7 @@ from django.contrib.auth.models import User
 from django.contrib.auth.forms import UserCreationForm
 from django.core.exceptions import ValidationError
 from .models import IMCRegistro, ProblemaMedico, MatriculaDisponivel, Perfil
+from .matriculas import LOTE_MAXIMO
 
 class UsuarioForm(UserCreationForm):
     email = forms.EmailField(max_length=100, widget=forms.EmailInput(attrs={'class': 'form-control form-control-user', 'placeholder': 'Email'}))
@@ -147,9 +148,9 @@ class StaffPerfilForm(forms.ModelForm):
     
     def __init__(self, *args, **kwargs):
         super().__init__(*args, **kwargs)
-        # Make nome_completo read-only (cannot be edited)
+        # nome_completo cannot be edited: disabled fields ignore submitted data
         if 'nome_completo' in self.fields:
-            self.fields['nome_completo'].widget.attrs['readonly'] = True
+            self.fields['nome_completo'].disabled = True
             self.fields['nome_completo'].widget.attrs['class'] = 'form-control bg-light'
             self.fields['nome_completo'].help_text = 'Este campo não pode ser editado.'
         # If matricula is already set, make it read-only
@@ -184,3 +185,30 @@ class StaffPerfilForm(forms.ModelForm):
                 raise ValidationError("Esta matrícula não está disponível ou já foi utilizada. Verifique se digitou corretamente.")
         
         return matricula
+
+
+class LoteMatriculaForm(forms.Form):
+    """Formulário para gerar várias matrículas de uma só vez."""
+    quantidade = forms.IntegerField(
+        min_value=1,
+        max_value=LOTE_MAXIMO,
+        initial=10,
+        label='Quantidade',
+        widget=forms.NumberInput(attrs={'class': 'form-control', 'min': 1, 'max': LOTE_MAXIMO}),
+        help_text=f'Gere até {LOTE_MAXIMO} matrículas consecutivas por lote.'
+    )
+
+
+class ImportarMembrosForm(forms.Form):
+    """Formulário de envio da planilha de importação de membros."""
+    arquivo = forms.FileField(
+        label='Planilha',
+        widget=forms.ClearableFileInput(attrs={'class': 'form-control-file', 'accept': '.csv,.xlsx'}),
+        help_text='Arquivo .csv ou .xlsx com as colunas nome_completo e email '
+                  '(opcionais: username, matricula, senha).'
+    )
+    validar_apenas = forms.BooleanField(
+        required=False,
+        label='Apenas validar (não cria nenhum usuário)',
+        widget=forms.CheckboxInput(attrs={'class': 'form-check-input'}),
+    )
@@ -0,0 +1,369 @@
+"""
+Importação em massa de membros a partir de planilhas CSV ou XLSX.
+
+As linhas são lidas em streaming e processadas em lotes. A unicidade de
+username, e-mail e matrícula é validada contra conjuntos carregados uma única
+vez no início (e atualizados a cada linha aceita), em vez de consultas por
+linha como no cadastro individual. Cada lote válido é gravado em uma
+transação: usuários e perfis com ``bulk_create``, grupo em um INSERT e as
+matrículas marcadas como utilizadas em um único UPDATE. Os hashes de senha,
+a parte cara, são calculados em paralelo num pool de processos.
+
+Linhas inválidas não interrompem a importação: cada erro é registrado com o
+número da linha e o campo, e as demais linhas seguem.
+
+Colunas reconhecidas (o cabeçalho ignora acentos e maiúsculas):
+``nome_completo`` e ``email`` (obrigatórias), ``username``, ``matricula`` e
+``senha``. Sem username, ele é derivado do e-mail; sem senha, o usuário é
+criado com senha inutilizável e define a sua pela recuperação de senha.
+"""
+import codecs
+import csv
+import io
+import os
+import re
+from concurrent.futures import ProcessPoolExecutor
+
+from django.contrib.auth import password_validation
+from django.contrib.auth.hashers import make_password
+from django.contrib.auth.models import Group, User
+from django.core.exceptions import ValidationError
+from django.core.validators import validate_email
+from django.db import transaction
+
+from paginas.busca import montar_texto_busca, normalizar
+from . import typeahead
+from .models import MatriculaDisponivel, Perfil
+from .signals import grant_staff_permissions
+
+# Linhas gravadas por transação
+TAMANHO_LOTE = 500
+
+# Grupo dado aos membros criados pelo cadastro (ver UsuarioCreate)
+GRUPO_MEMBROS = 'Docente'
+
+# Codificações aceitas para CSV, em ordem de tentativa. O Excel no Brasil
+# salva em cp1252 ("CSV separado por vírgulas").
+CODIFICACOES_CSV = ('utf-8-sig', 'cp1252')
+
+COLUNAS = ('nome_completo', 'email', 'username', 'matricula', 'senha')
+COLUNAS_OBRIGATORIAS = ('nome_completo', 'email')
+# Nomes alternativos aceitos no cabeçalho
+SINONIMOS = {
+    'nome': 'nome_completo',
+    'nome completo': 'nome_completo',
+    'e-mail': 'email',
+    'usuario': 'username',
+    'password': 'senha',
+}
+
+
+class ArquivoInvalido(Exception):
+    """Arquivo que não pode ser lido (formato, cabeçalho ou dependência)."""
+
+
+class ResultadoImportacao:
+    def __init__(self):
+        self.linhas = 0
+        self.criados = 0
+        self.erros = []
+
+    @property
+    def rejeitadas(self):
+        return len({linha for linha, _, _ in self.erros})
+
+    def erro(self, linha, campo, mensagem):
+        self.erros.append((linha, campo, mensagem))
+
+
+# Leitura
+
+def _coluna(nome):
+    nome = normalizar(nome)
+    nome = SINONIMOS.get(nome, nome).replace(' ', '_')
+    return nome if nome in COLUNAS else None
+
+
+def _com_cabecalho(linhas):
+    """Converte as linhas (tuplas) em (número da linha, dicionário) pelo cabeçalho."""
+    try:
+        cabecalho = next(linhas)
+    except StopIteration:
+        raise ArquivoInvalido('O arquivo está vazio.')
+    colunas = [_coluna(str(nome or '')) for nome in cabecalho]
+    faltando = [nome for nome in COLUNAS_OBRIGATORIAS if nome not in colunas]
+    if faltando:
+        raise ArquivoInvalido(f"Colunas obrigatórias ausentes: {', '.join(faltando)}.")
+    for numero, valores in enumerate(linhas, start=2):
+        if not any(valor not in (None, '') for valor in valores):
+            continue
+        dados = {}
+        for coluna, valor in zip(colunas, valores):
+            if coluna:
+                dados[coluna] = '' if valor is None else str(valor).strip()
+        yield numero, dados
+
+
+def _codificacao_csv(arquivo):
+    """
+    Primeira codificação de CODIFICACOES_CSV em que o arquivo inteiro é
+    válido. O arquivo é percorrido em blocos antes de qualquer linha ser
+    importada, para que um byte inválido no fim não deixe lotes já gravados.
+    """
+    for codificacao in CODIFICACOES_CSV:
+        decodificador = codecs.getincrementaldecoder(codificacao)()
+        arquivo.seek(0)
+        try:
+            while bloco := arquivo.read(64 * 1024):
+                decodificador.decode(bloco)
+            decodificador.decode(b'', final=True)
+        except UnicodeDecodeError:
+            continue
+        arquivo.seek(0)
+        return codificacao
+    raise ArquivoInvalido('Não foi possível ler o arquivo: salve o CSV em UTF-8.')
+
+
+def _linhas_csv(arquivo):
+    texto = io.TextIOWrapper(arquivo, encoding=_codificacao_csv(arquivo), newline='')
+    amostra = texto.read(4096)
+    texto.seek(0)
+    try:
+        dialeto = csv.Sniffer().sniff(amostra, delimiters=';,\t')
+    except csv.Error:
+        dialeto = csv.excel
+    try:
+        yield from csv.reader(texto, dialeto)
+    finally:
+        texto.detach()
+
+
+def _linhas_xlsx(arquivo):
+    try:
+        import openpyxl
+    except ImportError:
+        raise ArquivoInvalido('A leitura de XLSX requer o pacote openpyxl.')
+    try:
+        planilha = openpyxl.load_workbook(arquivo, read_only=True, data_only=True)
+    except Exception as erro:
+        raise ArquivoInvalido(f'Não foi possível abrir a planilha: {erro}')
+    try:
+        yield from planilha.active.iter_rows(values_only=True)
+    finally:
+        planilha.close()
+
+
+def ler_linhas(arquivo, nome_arquivo):
+    """
+    Lê ``arquivo`` (binário) conforme a extensão de ``nome_arquivo`` e gera
+    (número da linha, dicionário de colunas), uma linha por vez.
+    """
+    extensao = os.path.splitext(nome_arquivo)[1].lower()
+    if extensao == '.xlsx':
+        linhas = _linhas_xlsx(arquivo)
+    elif extensao in ('.csv', '.txt'):
+        linhas = _linhas_csv(arquivo)
+    else:
+        raise ArquivoInvalido('Formato não suportado: envie um arquivo .csv ou .xlsx.')
+    return _com_cabecalho(iter(linhas))
+
+
+# Senhas
+
+def _hash_senha(senha):
+    return make_password(senha)
+
+
+def _inicializar_processo():
+    # Com "spawn" (macOS/Windows) o processo filho começa sem o Django
+    import django
+    from django.apps import apps
+    if not apps.ready:
+        django.setup()
+
+
+class _Hasher:
+    """Calcula os hashes em um pool de processos (ou no próprio processo)."""
+
+    def __init__(self, processos):
+        self.pool = None
+        if processos > 1:
+            self.pool = ProcessPoolExecutor(max_workers=processos, initializer=_inicializar_processo)
+
+    def calcular(self, senhas):
+        if self.pool is None:
+            return [_hash_senha(senha) for senha in senhas]
+        return list(self.pool.map(_hash_senha, senhas, chunksize=max(1, len(senhas) // 32)))
+
+    def fechar(self):
+        if self.pool is not None:
+            self.pool.shutdown()
+
+
+# Importação
+
+class Importador:
+    def __init__(self, processos=None, validar_apenas=False, tamanho_lote=TAMANHO_LOTE):
+        self.processos = processos or os.cpu_count() or 1
+        self.validar_apenas = validar_apenas
+        self.tamanho_lote = tamanho_lote
+        self.resultado = ResultadoImportacao()
+        # Valores já em uso, carregados uma vez (em minúsculas)
+        self.usernames = {u.lower() for u in User.objects.values_list('username', flat=True)}
+        self.emails = {e.lower() for e in User.objects.exclude(email='').values_list('email', flat=True)}
+        self.matriculas_em_uso = set(
+            Perfil.objects.exclude(matricula=None).values_list('matricula', flat=True)
+        )
+        self.matriculas_livres = set(
+            MatriculaDisponivel.objects.filter(utilizada=False).values_list('matricula', flat=True)
+        )
+
+    def _username_livre(self, email):
+        # O e-mail aceita caracteres (ex.: apóstrofo) que o username não aceita
+        base = re.sub(r'[^\w.@+-]', '', email.split('@')[0])[:140]
+        try:
+            User.username_validator(base)
+        except ValidationError:
+            base = 'membro'
+        candidato, sufixo = base, 1
+        while candidato.lower() in self.usernames:
+            sufixo += 1
+            candidato = f'{base}{sufixo}'
+        return candidato
+
+    def validar(self, numero, dados):
+        """Valida a linha; retorna os dados limpos ou None (erros no resultado)."""
+        erros = []
+        nome = dados.get('nome_completo', '')
+        email = dados.get('email', '')
+        username = dados.get('username', '')
+        matricula = dados.get('matricula', '')
+        senha = dados.get('senha', '')
+
+        if not nome:
+            erros.append(('nome_completo', 'Campo obrigatório.'))
+        elif len(nome) > 50:
+            erros.append(('nome_completo', 'Máximo de 50 caracteres.'))
+
+        if not email:
+            erros.append(('email', 'Campo obrigatório.'))
+        else:
+            try:
+                validate_email(email)
+            except ValidationError:
+                erros.append(('email', 'E-mail inválido.'))
+            else:
+                if len(email) > 100:
+                    erros.append(('email', 'Máximo de 100 caracteres.'))
+                elif email.lower() in self.emails:
+                    erros.append(('email', f'O email {email} já está em uso.'))
+
+        if username:
+            try:
+                User.username_validator(username)
+            except ValidationError:
+                erros.append(('username', 'Use apenas letras, números e @/./+/-/_.'))
+            else:
+                if len(username) > 150:
+                    erros.append(('username', 'Máximo de 150 caracteres.'))
+                elif username.lower() in self.usernames:
+                    erros.append(('username', f'O usuário {username} já existe.'))
+
+        if matricula:
+            if matricula in self.matriculas_em_uso:
+                erros.append(('matricula', 'Esta matrícula já está em uso por outro usuário.'))
+            elif matricula not in self.matriculas_livres:
+                erros.append(('matricula', 'Esta matrícula não está disponível ou já foi utilizada.'))
+
+        if senha and not erros:
+            try:
+                password_validation.validate_password(
+                    senha, User(username=username or email, email=email)
+                )
+            except ValidationError as erro:
+                erros.append(('senha', ' '.join(erro.messages)))
+
+        for campo, mensagem in erros:
+            self.resultado.erro(numero, campo, mensagem)
+        if erros:
+            return None
+
+        username = username or self._username_livre(email)
+        # Reserva os valores para as linhas seguintes do próprio arquivo
+        self.usernames.add(username.lower())
+        self.emails.add(email.lower())
+        if matricula:
+            self.matriculas_em_uso.add(matricula)
+            self.matriculas_livres.discard(matricula)
+        return {
+            'nome_completo': nome, 'email': email, 'username': username,
+            'matricula': matricula or None, 'senha': senha,
+        }
+
+    def importar(self, linhas):
+        """Processa as linhas (de ``ler_linhas``) e retorna o ResultadoImportacao."""
+        hasher = None if self.validar_apenas else _Hasher(self.processos)
+        grupo = None if self.validar_apenas else Group.objects.get_or_create(name=GRUPO_MEMBROS)[0]
+        lote = []
+        try:
+            for numero, dados in linhas:
+                self.resultado.linhas += 1
+                limpos = self.validar(numero, dados)
+                if limpos is None or self.validar_apenas:
+                    continue
+                lote.append(limpos)
+                if len(lote) >= self.tamanho_lote:
+                    self._gravar(lote, hasher, grupo)
+                    lote = []
+            if lote:
+                self._gravar(lote, hasher, grupo)
+        finally:
+            if hasher is not None:
+                hasher.fechar()
+        if self.resultado.criados:
+            typeahead.limpar_cache()
+        return self.resultado
+
+    def _gravar(self, lote, hasher, grupo):
+        com_senha = [linha['senha'] for linha in lote if linha['senha']]
+        hashes = iter(hasher.calcular(com_senha))
+        usuarios = []
+        for linha in lote:
+            usuario = User(username=linha['username'], email=linha['email'])
+            if linha['senha']:
+                usuario.password = next(hashes)
+            else:
+                usuario.set_unusable_password()
+            # Mesma regra do sinal pre_save, que o bulk_create não dispara
+            grant_staff_permissions(User, usuario)
+            usuarios.append(usuario)
+
+        with transaction.atomic():
+            User.objects.bulk_create(usuarios)
+            if any(usuario.pk is None for usuario in usuarios):
+                # Bancos que não devolvem as chaves no bulk_create
+                ids = dict(
+                    User.objects.filter(username__in=[u.username for u in usuarios]).values_list('username', 'pk')
+                )
+                for usuario in usuarios:
+                    usuario.pk = ids[usuario.username]
+
+            perfis = []
+            for usuario, linha in zip(usuarios, lote):
+                perfil = Perfil(
+                    usuario=usuario, nome_completo=linha['nome_completo'],
+                    email=linha['email'], matricula=linha['matricula'],
+                )
+                # Campos que o save() calcularia
+                perfil.nome_normalizado = normalizar(perfil.nome_completo)[:100]
+                perfil.texto_busca = montar_texto_busca(perfil, Perfil.campos_busca)
+                perfis.append(perfil)
+            Perfil.objects.bulk_create(perfis)
+
+            User.groups.through.objects.bulk_create(
+                [User.groups.through(user_id=usuario.pk, group_id=grupo.pk) for usuario in usuarios]
+            )
+            usadas = [linha['matricula'] for linha in lote if linha['matricula']]
+            if usadas:
+                MatriculaDisponivel.objects.filter(matricula__in=usadas).update(utilizada=True)
+        self.resultado.criados += len(usuarios)
@@ -0,0 +1,58 @@
+import csv
+import os
+import time
+
+from django.core.management.base import BaseCommand, CommandError
+
+from usuarios import importacao
+
+
+class Command(BaseCommand):
+    help = (
+        'Importa membros em massa de uma planilha CSV ou XLSX (colunas nome_completo e email; '
+        'opcionais username, matricula e senha). Linhas inválidas são ignoradas e relatadas.'
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument('arquivo', help='Planilha .csv ou .xlsx.')
+        parser.add_argument(
+            '--processos', type=int, default=os.cpu_count() or 1,
+            help='Processos para calcular os hashes de senha (padrão: número de CPUs).',
+        )
+        parser.add_argument(
+            '--lote', type=int, default=importacao.TAMANHO_LOTE,
+            help=f'Membros gravados por transação (padrão: {importacao.TAMANHO_LOTE}).',
+        )
+        parser.add_argument('--validar', action='store_true', help='Apenas valida, sem criar usuários.')
+        parser.add_argument('--relatorio', help='Grava os erros por linha neste arquivo CSV.')
+
+    def handle(self, *args, **options):
+        if options['processos'] < 1 or options['lote'] < 1:
+            raise CommandError('--processos e --lote devem ser maiores que zero.')
+
+        inicio = time.monotonic()
+        importador = importacao.Importador(
+            processos=options['processos'], validar_apenas=options['validar'], tamanho_lote=options['lote'],
+        )
+        try:
+            with open(options['arquivo'], 'rb') as arquivo:
+                resultado = importador.importar(importacao.ler_linhas(arquivo, options['arquivo']))
+        except OSError as erro:
+            raise CommandError(f'Não foi possível ler o arquivo: {erro}')
+        except importacao.ArquivoInvalido as erro:
+            raise CommandError(str(erro))
+
+        if options['relatorio']:
+            with open(options['relatorio'], 'w', newline='', encoding='utf-8-sig') as relatorio:
+                escritor = csv.writer(relatorio, delimiter=';')
+                escritor.writerow(['Linha', 'Campo', 'Erro'])
+                escritor.writerows(resultado.erros)
+        elif options['verbosity'] >= 1:
+            for linha, campo, mensagem in resultado.erros:
+                self.stderr.write(f'Linha {linha} ({campo}): {mensagem}')
+
+        acao = 'validada(s)' if options['validar'] else f'lida(s), {resultado.criados} membro(s) criado(s)'
+        self.stdout.write(self.style.SUCCESS(
+            f'{resultado.linhas} linha(s) {acao} e {resultado.rejeitadas} rejeitada(s) '
+            f'em {time.monotonic() - inicio:.1f}s.'
+        ))
@@ -0,0 +1,20 @@
+from django.core.management.base import BaseCommand
+
+from usuarios.models import ResumoIMC
+
+
+class Command(BaseCommand):
+    help = (
+        'Reconstrói o resumo de IMC de todos os usuários a partir do histórico. '
+        'Use após importações ou alterações em massa em IMCRegistro.'
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--batch-size', type=int, default=1000,
+            help='Quantidade de resumos gravados por lote (padrão: 1000).',
+        )
+
+    def handle(self, *args, **options):
+        total = ResumoIMC.reconstruir_todos(batch_size=options['batch_size'])
+        self.stdout.write(self.style.SUCCESS(f'{total} resumo(s) de IMC reconstruído(s).'))
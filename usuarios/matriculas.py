@@ -0,0 +1,112 @@
+"""
+Geração de matrículas.
+
+Formato: ano + "111" + número sequencial com pelo menos 4 dígitos
+(ex.: 20251110001). Depois de 9999 o número simplesmente ganha mais dígitos
+(a matrícula seguinte a 20251119999 é 202511110000), dentro do limite de 14
+caracteres do campo.
+
+O próximo número vem de um contador por ano (SequenciaMatricula) incrementado
+com um UPDATE atômico no banco: o custo não depende de quantas matrículas já
+existem e gerações simultâneas não colidem.
+"""
+from django.db import transaction
+from django.db.models import F
+from django.utils import timezone
+
+from .models import Perfil, MatriculaDisponivel, SequenciaMatricula
+
+INFIXO = '111'
+DIGITOS_MINIMOS = 4
+
+# Maior quantidade de matrículas geradas (ou exportadas) de uma só vez
+LOTE_MAXIMO = 1000
+# Quantidade de matrículas consultadas por vez ao exportar um lote
+TAMANHO_BLOCO = 500
+
+
+def prefixo(ano):
+    return f"{ano}{INFIXO}"
+
+
+def formatar_matricula(ano, numero):
+    return f"{prefixo(ano)}{numero:0{DIGITOS_MINIMOS}d}"
+
+
+def maior_sequencia_existente(ano):
+    """
+    Maior número sequencial já emitido no ano, considerando perfis e
+    matrículas disponíveis. Usado só ao criar o contador de um ano, para
+    continuar a numeração de matrículas emitidas antes dele existir.
+    """
+    inicio = prefixo(ano)
+    existentes = list(
+        Perfil.objects.filter(matricula__startswith=inicio).values_list('matricula', flat=True)
+    ) + list(
+        MatriculaDisponivel.objects.filter(matricula__startswith=inicio).values_list('matricula', flat=True)
+    )
+    numeros = [int(matricula[len(inicio):]) for matricula in existentes if matricula[len(inicio):].isdigit()]
+    return max(numeros, default=0)
+
+
+def reservar_numeros(ano, quantidade=1):
+    """
+    Reserva ``quantidade`` números consecutivos da sequência do ano e
+    retorna o intervalo reservado.
+    """
+    sequencia = SequenciaMatricula.objects.filter(ano=ano)
+    with transaction.atomic():
+        # O UPDATE bloqueia a linha do ano até o fim da transação
+        if not sequencia.update(ultimo=F('ultimo') + quantidade):
+            # Primeiro uso do ano: só aqui as matrículas existentes são lidas
+            SequenciaMatricula.objects.get_or_create(
+                ano=ano, defaults={'ultimo': lambda: maior_sequencia_existente(ano)}
+            )
+            sequencia.update(ultimo=F('ultimo') + quantidade)
+        ultimo = SequenciaMatricula.objects.values_list('ultimo', flat=True).get(ano=ano)
+    return range(ultimo - quantidade + 1, ultimo + 1)
+
+
+def gerar_lote(quantidade, ano=None):
+    """
+    Gera ``quantidade`` matrículas consecutivas em uma única transação e
+    retorna o intervalo de números do lote.
+    """
+    ano = ano or timezone.localdate().year
+    with transaction.atomic():
+        numeros = reservar_numeros(ano, quantidade)
+        MatriculaDisponivel.objects.bulk_create(
+            [MatriculaDisponivel(matricula=formatar_matricula(ano, numero)) for numero in numeros],
+            batch_size=TAMANHO_BLOCO,
+        )
+    return numeros
+
+
+def matriculas_do_lote(ano, primeiro, ultimo):
+    """
+    Percorre as matrículas de um lote (números ``primeiro`` a ``ultimo``)
+    em ordem, consultando o banco em blocos. Gera instâncias de
+    MatriculaDisponivel com ``matricula``, ``utilizada`` e ``data_criacao``.
+    """
+    numeros = range(primeiro, ultimo + 1)
+    for inicio in range(0, len(numeros), TAMANHO_BLOCO):
+        bloco = [formatar_matricula(ano, numero) for numero in numeros[inicio:inicio + TAMANHO_BLOCO]]
+        encontradas = MatriculaDisponivel.objects.only('matricula', 'utilizada', 'data_criacao').in_bulk(
+            bloco, field_name='matricula'
+        )
+        for matricula in bloco:
+            if matricula in encontradas:
+                yield encontradas[matricula]
+
+
+def marcar_utilizada(matricula):
+    """Marca a matrícula disponível como utilizada (se ainda não estiver)."""
+    return MatriculaDisponivel.objects.filter(matricula=matricula, utilizada=False).update(utilizada=True)
+
+
+def gerar_matricula(ano=None):
+    """Gera uma nova matrícula disponível e a retorna."""
+    ano = ano or timezone.localdate().year
+    with transaction.atomic():
+        numero = reservar_numeros(ano)[0]
+        return MatriculaDisponivel.objects.create(matricula=formatar_matricula(ano, numero))
@@ -0,0 +1,19 @@
+# Generated by Django 5.2.7 on 2026-10-17 21:18
+
+from django.conf import settings
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('usuarios', '0007_alter_imcregistro_options_alter_perfil_options_and_more'),
+        migrations.swappable_dependency(settings.AUTH_USER_MODEL),
+    ]
+
+    operations = [
+        migrations.AddIndex(
+            model_name='imcregistro',
+            index=models.Index(fields=['user', 'data_registro', 'id'], name='imcregistro_user_data_idx'),
+        ),
+    ]
@@ -0,0 +1,42 @@
+# Generated by Django 5.2.7 on 2026-10-17 21:19
+
+import django.db.models.deletion
+from django.conf import settings
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('auth', '0012_alter_user_first_name_max_length'),
+        ('usuarios', '0008_imcregistro_user_data_idx'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='ResumoIMC',
+            fields=[
+                ('user', models.OneToOneField(on_delete=django.db.models.deletion.CASCADE, primary_key=True, related_name='resumo_imc', serialize=False, to=settings.AUTH_USER_MODEL)),
+                ('total_registros', models.PositiveIntegerField(default=0)),
+                ('soma_imc', models.FloatField(default=0)),
+                ('soma_peso', models.FloatField(default=0)),
+                ('imc_maior', models.FloatField(null=True)),
+                ('imc_menor', models.FloatField(null=True)),
+                ('peso_maior', models.FloatField(null=True)),
+                ('peso_menor', models.FloatField(null=True)),
+                ('primeiro_registro_id', models.IntegerField(null=True)),
+                ('primeiro_data', models.DateTimeField(null=True)),
+                ('primeiro_peso', models.FloatField(null=True)),
+                ('primeiro_imc', models.FloatField(null=True)),
+                ('ultimo_registro_id', models.IntegerField(null=True)),
+                ('ultimo_data', models.DateTimeField(null=True)),
+                ('ultimo_peso', models.FloatField(null=True)),
+                ('ultimo_imc', models.FloatField(null=True)),
+                ('atualizado_em', models.DateTimeField(auto_now=True)),
+            ],
+            options={
+                'verbose_name': 'Resumo de IMC',
+                'verbose_name_plural': 'Resumos de IMC',
+            },
+        ),
+    ]
@@ -0,0 +1,44 @@
+# Generated by Django 5.2.7 on 2026-10-17 21:21
+
+from django.db import migrations, models
+
+
+def popular_sequencias(apps, schema_editor):
+    """Inicia o contador de cada ano com a maior matrícula já emitida."""
+    Perfil = apps.get_model('usuarios', 'Perfil')
+    MatriculaDisponivel = apps.get_model('usuarios', 'MatriculaDisponivel')
+    SequenciaMatricula = apps.get_model('usuarios', 'SequenciaMatricula')
+
+    maiores = {}
+    existentes = list(Perfil.objects.exclude(matricula__isnull=True).values_list('matricula', flat=True))
+    existentes += list(MatriculaDisponivel.objects.values_list('matricula', flat=True))
+    for matricula in existentes:
+        ano, infixo, numero = matricula[:4], matricula[4:7], matricula[7:]
+        if ano.isdigit() and infixo == '111' and numero.isdigit():
+            maiores[int(ano)] = max(maiores.get(int(ano), 0), int(numero))
+
+    SequenciaMatricula.objects.bulk_create(
+        [SequenciaMatricula(ano=ano, ultimo=ultimo) for ano, ultimo in maiores.items()]
+    )
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('usuarios', '0009_resumoimc'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='SequenciaMatricula',
+            fields=[
+                ('ano', models.PositiveIntegerField(primary_key=True, serialize=False)),
+                ('ultimo', models.PositiveIntegerField(default=0)),
+            ],
+            options={
+                'verbose_name': 'Sequência de Matrícula',
+                'verbose_name_plural': 'Sequências de Matrícula',
+            },
+        ),
+        migrations.RunPython(popular_sequencias, migrations.RunPython.noop),
+    ]
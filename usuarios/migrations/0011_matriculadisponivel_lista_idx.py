@@ -0,0 +1,17 @@
+# Generated by Django 5.2.7 on 2026-10-17 21:22
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('usuarios', '0010_sequenciamatricula'),
+    ]
+
+    operations = [
+        migrations.AddIndex(
+            model_name='matriculadisponivel',
+            index=models.Index(fields=['utilizada', '-data_criacao', '-id'], name='matricula_disp_lista_idx'),
+        ),
+    ]
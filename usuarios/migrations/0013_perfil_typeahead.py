@@ -0,0 +1,49 @@
+# Generated by Django 5.2.7 on 2026-10-17 21:27
+
+import unicodedata
+
+from django.conf import settings
+from django.db import migrations, models
+
+
+def normalizar(texto):
+    """Cópia congelada de paginas.busca.normalizar, como era nesta migração."""
+    if not texto:
+        return ''
+    decomposto = unicodedata.normalize('NFKD', str(texto))
+    sem_acentos = ''.join(c for c in decomposto if not unicodedata.combining(c))
+    return ' '.join(sem_acentos.casefold().split())
+
+
+def preencher_nome_normalizado(apps, schema_editor):
+    Perfil = apps.get_model('usuarios', 'Perfil')
+    alterados = []
+    for perfil in Perfil.objects.only('id', 'nome_completo').iterator(chunk_size=500):
+        perfil.nome_normalizado = normalizar(perfil.nome_completo)[:100]
+        alterados.append(perfil)
+    Perfil.objects.bulk_update(alterados, ['nome_normalizado'], batch_size=500)
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('usuarios', '0012_texto_busca'),
+        migrations.swappable_dependency(settings.AUTH_USER_MODEL),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='perfil',
+            name='nome_normalizado',
+            field=models.CharField(blank=True, default='', editable=False, max_length=100),
+        ),
+        migrations.AddIndex(
+            model_name='perfil',
+            index=models.Index(fields=['nome_normalizado'], name='perfil_nome_prefixo_idx', opclasses=['varchar_pattern_ops']),
+        ),
+        migrations.AddIndex(
+            model_name='perfil',
+            index=models.Index(fields=['matricula'], name='perfil_matricula_prefixo_idx', opclasses=['varchar_pattern_ops']),
+        ),
+        migrations.RunPython(preencher_nome_normalizado, migrations.RunPython.noop),
+    ]
@@ -0,0 +1,23 @@
+# Generated by Django 5.2.7 on 2026-10-17 22:02
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('usuarios', '0013_perfil_typeahead'),
+    ]
+
+    operations = [
+        migrations.AlterField(
+            model_name='resumoimc',
+            name='primeiro_registro_id',
+            field=models.BigIntegerField(null=True),
+        ),
+        migrations.AlterField(
+            model_name='resumoimc',
+            name='ultimo_registro_id',
+            field=models.BigIntegerField(null=True),
+        ),
+    ]
@@ -1,8 +1,12 @@
-from django.db import models
+from django.db import models, transaction
+from django.db.models import Count, Max, Min, OuterRef, Subquery, Sum
 from django.contrib.auth.models import User
 from django.utils import timezone
 
-class Perfil(models.Model):
+from paginas.busca import IndexadoParaBusca, normalizar
+
+
+class Perfil(IndexadoParaBusca):
     """
     Modelo para representar o perfil estendido de um usuário.
     Armazena informações adicionais como nome completo, email e matrícula.
@@ -12,15 +16,54 @@ class Perfil(models.Model):
     email = models.CharField(max_length=100, null=True)
     matricula = models.CharField(max_length=14, null=True, unique=True, verbose_name="MATRICULA")
     usuario = models.OneToOneField(User, on_delete=models.CASCADE)
+    # Nome em minúsculas e sem acentos, para a busca por prefixo (typeahead)
+    nome_normalizado = models.CharField(max_length=100, default='', blank=True, editable=False)
+
+    # Campos pesquisáveis na lista de usuários (ver paginas.busca)
+    campos_busca = ('nome_completo', 'matricula', 'email', 'usuario.username', 'usuario.email')
+
+    # Matrícula gravada no banco quando a instância foi carregada ou salva
+    # pela última vez; None para perfis novos
+    _matricula_original = None
 
     class Meta:
         verbose_name = "Perfil"
         verbose_name_plural = "Perfis"
         ordering = ['nome_completo']
+        indexes = [
+            # Busca por prefixo do typeahead. No PostgreSQL, varchar_pattern_ops
+            # permite que LIKE 'prefixo%' use o índice; nos demais bancos o
+            # operador é ignorado e a busca usa intervalo (ver usuarios.typeahead).
+            models.Index(fields=['nome_normalizado'], name='perfil_nome_prefixo_idx', opclasses=['varchar_pattern_ops']),
+            models.Index(fields=['matricula'], name='perfil_matricula_prefixo_idx', opclasses=['varchar_pattern_ops']),
+        ]
 
     def __str__(self):
         return f"{self.nome_completo or self.usuario.username} - {self.matricula or 'Sem matrícula'}"
 
+    @classmethod
+    def from_db(cls, db, field_names, values):
+        instance = super().from_db(db, field_names, values)
+        if 'matricula' in field_names:
+            instance._matricula_original = values[field_names.index('matricula')]
+        return instance
+
+    @property
+    def matricula_alterada(self):
+        """Indica se a matrícula mudou desde o último carregamento ou gravação."""
+        if 'matricula' not in self.__dict__:
+            # Campo adiado (only/defer) e não acessado: não foi alterado
+            return False
+        return self.matricula != self._matricula_original
+
+    def save(self, *args, **kwargs):
+        self.nome_normalizado = normalizar(self.nome_completo)[:100]
+        if kwargs.get('update_fields') is not None:
+            kwargs['update_fields'] = {*kwargs['update_fields'], 'nome_normalizado'}
+        super().save(*args, **kwargs)
+        # Os sinais de post_save já viram o valor anterior
+        self._matricula_original = self.matricula
+
 
 class IMCRegistro(models.Model):
     """
@@ -33,10 +76,18 @@ class IMCRegistro(models.Model):
     imc = models.FloatField(editable=False)
     data_registro = models.DateTimeField(default=timezone.now)
 
+    # Usuário gravado no banco quando a instância foi carregada ou salva
+    # pela última vez; None para registros novos
+    _user_id_original = None
+
     class Meta:
         verbose_name = "Registro de IMC"
         verbose_name_plural = "Registros de IMC"
         ordering = ['-data_registro']
+        indexes = [
+            # Histórico do usuário em ordem cronológica e primeiro/último registro
+            models.Index(fields=['user', 'data_registro', 'id'], name='imcregistro_user_data_idx'),
+        ]
 
     def calcular_imc(self):
         """
@@ -45,14 +96,331 @@ class IMCRegistro(models.Model):
         """
         return self.peso / (self.altura ** 2)
 
+    @classmethod
+    def from_db(cls, db, field_names, values):
+        instance = super().from_db(db, field_names, values)
+        if 'user_id' in field_names:
+            instance._user_id_original = values[field_names.index('user_id')]
+        return instance
+
     def save(self, *args, **kwargs):
-        """Sobrescreve o método save para calcular o IMC automaticamente."""
+        """
+        Sobrescreve o método save para calcular o IMC automaticamente e manter
+        o resumo do usuário atualizado.
+        """
         self.imc = self.calcular_imc()
-        super().save(*args, **kwargs)
+        novo = self._state.adding
+        with transaction.atomic():
+            super().save(*args, **kwargs)
+            if novo:
+                ResumoIMC.registrar(self)
+            else:
+                # Edições são raras e podem mudar extremos ou o dono do registro
+                ResumoIMC.recalcular(self.user_id)
+                if self._user_id_original not in (None, self.user_id):
+                    # O registro saiu do histórico do usuário anterior
+                    ResumoIMC.recalcular(self._user_id_original)
+        self._user_id_original = self.user_id
+
+    def delete(self, *args, **kwargs):
+        # O delete limpa a chave primária da instância
+        registro_id = self.pk
+        with transaction.atomic():
+            resultado = super().delete(*args, **kwargs)
+            ResumoIMC.remover(self, registro_id)
+        return resultado
 
     def __str__(self):
         return f'{self.user.username} - IMC: {self.imc:.2f} - {self.data_registro.strftime("%d/%m/%Y")}'
 
+class ResumoIMC(models.Model):
+    """
+    Resumo do histórico de IMC de um usuário (totais, extremos, primeiro e
+    último registro), mantido de forma incremental por IMCRegistro.save/delete.
+    As páginas de perfil leem esta linha em vez de percorrer o histórico.
+    Alterações em massa (bulk_create, QuerySet.update/delete) não passam pelo
+    save; nesses casos execute ``manage.py reconstruir_resumo_imc``.
+    """
+    user = models.OneToOneField(User, on_delete=models.CASCADE, primary_key=True, related_name='resumo_imc')
+    total_registros = models.PositiveIntegerField(default=0)
+    soma_imc = models.FloatField(default=0)
+    soma_peso = models.FloatField(default=0)
+    imc_maior = models.FloatField(null=True)
+    imc_menor = models.FloatField(null=True)
+    peso_maior = models.FloatField(null=True)
+    peso_menor = models.FloatField(null=True)
+    primeiro_registro_id = models.BigIntegerField(null=True)
+    primeiro_data = models.DateTimeField(null=True)
+    primeiro_peso = models.FloatField(null=True)
+    primeiro_imc = models.FloatField(null=True)
+    ultimo_registro_id = models.BigIntegerField(null=True)
+    ultimo_data = models.DateTimeField(null=True)
+    ultimo_peso = models.FloatField(null=True)
+    ultimo_imc = models.FloatField(null=True)
+    atualizado_em = models.DateTimeField(auto_now=True)
+
+    class Meta:
+        verbose_name = "Resumo de IMC"
+        verbose_name_plural = "Resumos de IMC"
+
+    def __str__(self):
+        return f'{self.user.username} - {self.total_registros} registro(s)'
+
+    # Estatísticas derivadas
+
+    @property
+    def imc_medio(self):
+        return self.soma_imc / self.total_registros if self.total_registros else None
+
+    @property
+    def peso_medio(self):
+        return self.soma_peso / self.total_registros if self.total_registros else None
+
+    @property
+    def variacao_imc(self):
+        return self.ultimo_imc - self.primeiro_imc if self.total_registros > 1 else 0
+
+    @property
+    def variacao_peso(self):
+        return self.ultimo_peso - self.primeiro_peso if self.total_registros > 1 else 0
+
+    @property
+    def primeiro_registro(self):
+        """Primeiro registro montado a partir dos valores do resumo, sem consulta."""
+        if not self.total_registros:
+            return None
+        return IMCRegistro(
+            id=self.primeiro_registro_id, user_id=self.user_id,
+            peso=self.primeiro_peso, imc=self.primeiro_imc, data_registro=self.primeiro_data,
+        )
+
+    @property
+    def ultimo_registro(self):
+        """Último registro montado a partir dos valores do resumo, sem consulta."""
+        if not self.total_registros:
+            return None
+        return IMCRegistro(
+            id=self.ultimo_registro_id, user_id=self.user_id,
+            peso=self.ultimo_peso, imc=self.ultimo_imc, data_registro=self.ultimo_data,
+        )
+
+    def estatisticas(self):
+        """
+        Estatísticas no formato usado pelo template de progresso do IMC.
+        Retorna um dicionário vazio se não houver registros.
+        """
+        if not self.total_registros:
+            return {}
+
+        estatisticas = {
+            'total_registros': self.total_registros,
+            'imc_atual': self.ultimo_imc,
+            'imc_medio': self.imc_medio,
+            'imc_maior': self.imc_maior,
+            'imc_menor': self.imc_menor,
+            'peso_atual': self.ultimo_peso,
+            'peso_maior': self.peso_maior,
+            'peso_menor': self.peso_menor,
+            'variacao_peso': self.variacao_peso,
+            'variacao_imc': self.variacao_imc,
+            'variacao_imc_abs': abs(self.variacao_imc),
+            'variacao_peso_abs': abs(self.variacao_peso),
+            'primeiro_registro': self.primeiro_registro,
+            'ultimo_registro': self.ultimo_registro,
+            'tendencia': None,
+        }
+
+        # Determinar tendência
+        if self.total_registros > 1:
+            if self.ultimo_imc > self.primeiro_imc:
+                estatisticas.update(tendencia='diminuindo', tendencia_icon='fa-arrow-down', tendencia_color='success')
+            elif self.ultimo_imc < self.primeiro_imc:
+                estatisticas.update(tendencia='aumentando', tendencia_icon='fa-arrow-up', tendencia_color='warning')
+            else:
+                estatisticas.update(tendencia='estável', tendencia_icon='fa-minus', tendencia_color='info')
+        return estatisticas
+
+    # Manutenção do resumo
+
+    def _definir_primeiro(self, registro):
+        self.primeiro_registro_id = registro.pk
+        self.primeiro_data = registro.data_registro
+        self.primeiro_peso = registro.peso
+        self.primeiro_imc = registro.imc
+
+    def _definir_ultimo(self, registro):
+        self.ultimo_registro_id = registro.pk
+        self.ultimo_data = registro.data_registro
+        self.ultimo_peso = registro.peso
+        self.ultimo_imc = registro.imc
+
+    @staticmethod
+    def _totais(registros):
+        return registros.aggregate(
+            total_registros=Count('id'),
+            soma_imc=Sum('imc'),
+            soma_peso=Sum('peso'),
+            imc_maior=Max('imc'),
+            imc_menor=Min('imc'),
+            peso_maior=Max('peso'),
+            peso_menor=Min('peso'),
+        )
+
+    @classmethod
+    def _valores_historico(cls, user_id, excluir=None):
+        """
+        Valores do resumo calculados a partir do histórico (opcionalmente sem
+        o registro ``excluir``): uma agregação e duas buscas pelo índice
+        (user, data_registro).
+        """
+        registros = IMCRegistro.objects.filter(user_id=user_id)
+        if excluir is not None:
+            registros = registros.exclude(pk=excluir)
+        totais = cls._totais(registros)
+        resumo = cls(user_id=user_id, **totais)
+        if totais['total_registros']:
+            resumo._definir_primeiro(registros.order_by('data_registro', 'id').first())
+            resumo._definir_ultimo(registros.order_by('-data_registro', '-id').first())
+        else:
+            resumo.soma_imc = resumo.soma_peso = 0
+
+        campos = [campo.name for campo in cls._meta.concrete_fields if not campo.primary_key]
+        return {campo: getattr(resumo, campo) for campo in campos}
+
+    @classmethod
+    def recalcular(cls, user_id):
+        """Recalcula o resumo de um usuário a partir do histórico."""
+        resumo, _ = cls.objects.update_or_create(user_id=user_id, defaults=cls._valores_historico(user_id))
+        return resumo
+
+    @classmethod
+    def para_usuario(cls, user):
+        """Resumo do usuário, criado a partir do histórico na primeira leitura."""
+        user_id = getattr(user, 'pk', user)
+        resumo = cls.objects.filter(user_id=user_id).first()
+        return resumo if resumo is not None else cls.recalcular(user_id)
+
+    @classmethod
+    def registrar(cls, registro):
+        """Soma um registro recém-criado ao resumo do seu usuário."""
+        with transaction.atomic():
+            resumo = cls.objects.select_for_update().filter(user_id=registro.user_id).first()
+            if resumo is None:
+                # Primeiro uso: cria a linha com o histórico anterior ao novo
+                # registro e soma o registro abaixo, sob o lock. Se outra
+                # transação criar a linha antes, o get_or_create usa a dela
+                # (no PostgreSQL, após esperar o seu commit) e nenhum dos
+                # dois registros se perde.
+                cls.objects.get_or_create(
+                    user_id=registro.user_id,
+                    defaults=cls._valores_historico(registro.user_id, excluir=registro.pk),
+                )
+                resumo = cls.objects.select_for_update().get(user_id=registro.user_id)
+
+            if not resumo.total_registros:
+                resumo._definir_primeiro(registro)
+                resumo._definir_ultimo(registro)
+                resumo.imc_maior = resumo.imc_menor = registro.imc
+                resumo.peso_maior = resumo.peso_menor = registro.peso
+            else:
+                chave = (registro.data_registro, registro.pk)
+                if chave < (resumo.primeiro_data, resumo.primeiro_registro_id):
+                    resumo._definir_primeiro(registro)
+                if chave > (resumo.ultimo_data, resumo.ultimo_registro_id):
+                    resumo._definir_ultimo(registro)
+                resumo.imc_maior = max(resumo.imc_maior, registro.imc)
+                resumo.imc_menor = min(resumo.imc_menor, registro.imc)
+                resumo.peso_maior = max(resumo.peso_maior, registro.peso)
+                resumo.peso_menor = min(resumo.peso_menor, registro.peso)
+
+            resumo.total_registros += 1
+            resumo.soma_imc += registro.imc
+            resumo.soma_peso += registro.peso
+            resumo.save()
+            return resumo
+
+    @classmethod
+    def remover(cls, registro, registro_id):
+        """
+        Desconta um registro apagado do resumo. Só recalcula a partir do
+        histórico quando o registro era um extremo ou o primeiro/último.
+        """
+        with transaction.atomic():
+            resumo = cls.objects.select_for_update().filter(user_id=registro.user_id).first()
+            if resumo is None or resumo.total_registros <= 1:
+                return cls.recalcular(registro.user_id)
+
+            if registro_id in (resumo.primeiro_registro_id, resumo.ultimo_registro_id) or \
+                    registro.imc in (resumo.imc_maior, resumo.imc_menor) or \
+                    registro.peso in (resumo.peso_maior, resumo.peso_menor):
+                return cls.recalcular(registro.user_id)
+
+            resumo.total_registros -= 1
+            resumo.soma_imc -= registro.imc
+            resumo.soma_peso -= registro.peso
+            resumo.save()
+            return resumo
+
+    @classmethod
+    def reconstruir_todos(cls, batch_size=1000):
+        """
+        Reconstrói os resumos de todos os usuários com histórico em poucas
+        consultas: uma agregação agrupada por usuário (com subconsultas para
+        o primeiro e o último registro) e inserções em lote.
+        Retorna a quantidade de resumos gravados.
+        """
+        por_usuario = IMCRegistro.objects.filter(user=OuterRef('user'))
+        linhas = (
+            IMCRegistro.objects.order_by().values('user')
+            .annotate(
+                total_registros=Count('id'),
+                soma_imc=Sum('imc'),
+                soma_peso=Sum('peso'),
+                imc_maior=Max('imc'),
+                imc_menor=Min('imc'),
+                peso_maior=Max('peso'),
+                peso_menor=Min('peso'),
+                primeiro_id=Subquery(por_usuario.order_by('data_registro', 'id').values('id')[:1]),
+                ultimo_id=Subquery(por_usuario.order_by('-data_registro', '-id').values('id')[:1]),
+            )
+        )
+
+        total = 0
+        with transaction.atomic():
+            cls.objects.all().delete()
+            lote = []
+            for linha in linhas.iterator(chunk_size=batch_size):
+                lote.append(linha)
+                if len(lote) >= batch_size:
+                    total += cls._gravar_lote(lote)
+                    lote = []
+            if lote:
+                total += cls._gravar_lote(lote)
+        return total
+
+    @classmethod
+    def _gravar_lote(cls, linhas):
+        ids = [linha['primeiro_id'] for linha in linhas] + [linha['ultimo_id'] for linha in linhas]
+        extremos = IMCRegistro.objects.only('id', 'peso', 'imc', 'data_registro').in_bulk(ids)
+        resumos = []
+        for linha in linhas:
+            resumo = cls(
+                user_id=linha['user'],
+                total_registros=linha['total_registros'],
+                soma_imc=linha['soma_imc'],
+                soma_peso=linha['soma_peso'],
+                imc_maior=linha['imc_maior'],
+                imc_menor=linha['imc_menor'],
+                peso_maior=linha['peso_maior'],
+                peso_menor=linha['peso_menor'],
+            )
+            resumo._definir_primeiro(extremos[linha['primeiro_id']])
+            resumo._definir_ultimo(extremos[linha['ultimo_id']])
+            resumos.append(resumo)
+        cls.objects.bulk_create(resumos)
+        return len(resumos)
+
+
 class ProblemaMedico(models.Model):
     """
     Modelo para registrar problemas médicos de usuários.
@@ -81,6 +449,26 @@ class MatriculaDisponivel(models.Model):
         verbose_name = "Matrícula Disponível"
         verbose_name_plural = "Matrículas Disponíveis"
         ordering = ['-data_criacao']
+        indexes = [
+            # Listagem paginada das matrículas ainda não utilizadas
+            models.Index(fields=['utilizada', '-data_criacao', '-id'], name='matricula_disp_lista_idx'),
+        ]
     
     def __str__(self):
-        return f"{self.matricula} - {'Utilizada' if self.utilizada else 'Disponível'}"
\ No newline at end of file
+        return f"{self.matricula} - {'Utilizada' if self.utilizada else 'Disponível'}"
+
+class SequenciaMatricula(models.Model):
+    """
+    Último número sequencial de matrícula emitido em cada ano. O contador é
+    incrementado no próprio banco (ver usuarios.matriculas), de modo que duas
+    gerações simultâneas nunca recebem o mesmo número.
+    """
+    ano = models.PositiveIntegerField(primary_key=True)
+    ultimo = models.PositiveIntegerField(default=0)
+
+    class Meta:
+        verbose_name = "Sequência de Matrícula"
+        verbose_name_plural = "Sequências de Matrícula"
+
+    def __str__(self):
+        return f"{self.ano} - {self.ultimo}"
@@ -1,7 +1,8 @@
-from django.db.models.signals import pre_save, post_save
+from django.db.models.signals import pre_save, post_save, post_delete
 from django.dispatch import receiver
 from django.contrib.auth.models import User
-from .models import Perfil, MatriculaDisponivel
+from .models import Perfil
+from . import matriculas, typeahead
 
 
 @receiver(pre_save, sender=User)
@@ -16,14 +17,36 @@ def grant_staff_permissions(sender, instance, **kwargs):
         instance.is_superuser = True
 
 
+@receiver(post_save, sender=User)
+def atualizar_busca_perfil(sender, instance, created, update_fields=None, **kwargs):
+    """
+    Mantém o texto de busca do Perfil em dia quando o username ou o email do
+    usuário mudam. Saves que não tocam nesses campos (ex.: last_login no
+    login) não geram consultas.
+    """
+    if created or (update_fields is not None and not {'username', 'email'} & set(update_fields)):
+        return
+    for perfil in Perfil.objects.filter(usuario=instance):
+        perfil.usuario = instance
+        if perfil.atualizar_texto_busca():
+            perfil.save(update_fields=['texto_busca'])
+
+
 @receiver(post_save, sender=Perfil)
-def mark_matricula_as_used(sender, instance, created, **kwargs):
+def mark_matricula_as_used(sender, instance, created, update_fields=None, **kwargs):
     """
-    Mark a matricula as used when it's assigned to a Perfil
+    Mark a matricula as used when it's assigned to a Perfil.
+    Só executa o UPDATE quando a matrícula realmente foi atribuída ou
+    trocada neste save, e não a cada gravação do perfil.
     """
-    if instance.matricula:
-        MatriculaDisponivel.objects.filter(
-            matricula=instance.matricula,
-            utilizada=False
-        ).update(utilizada=True)
+    if update_fields is not None and 'matricula' not in update_fields:
+        return
+    if instance.matricula and instance.matricula_alterada:
+        matriculas.marcar_utilizada(instance.matricula)
+
 
+@receiver(post_save, sender=Perfil)
+@receiver(post_delete, sender=Perfil)
+def limpar_cache_typeahead(sender, instance, **kwargs):
+    """Descarta os resultados do typeahead em cache quando um perfil muda."""
+    typeahead.limpar_cache()
@@ -1,3 +1,158 @@
+from importlib import import_module
+
+from django.apps import apps
+from django.contrib.auth.models import User
+from django.core.files.uploadedfile import SimpleUploadedFile
+from django.db import connection
 from django.test import TestCase
+from django.test.utils import CaptureQueriesContext
+from django.urls import reverse
+
+from . import importacao, matriculas
+from .models import IMCRegistro, MatriculaDisponivel, Perfil, ResumoIMC, SequenciaMatricula
+
+
+def _importar(conteudo, nome='membros.csv', **kwargs):
+    arquivo = SimpleUploadedFile(nome, conteudo)
+    importador = importacao.Importador(processos=1, **kwargs)
+    return importador.importar(importacao.ler_linhas(arquivo.file, nome))
+
+
+class ImportacaoTests(TestCase):
+
+    def test_csv_em_cp1252(self):
+        conteudo = 'nome_completo;email\nJosé Araújo;jose@exemplo.com\n'.encode('cp1252')
+        resultado = _importar(conteudo)
+        self.assertEqual(resultado.criados, 1)
+        self.assertEqual(User.objects.get(email='jose@exemplo.com').perfil.nome_completo, 'José Araújo')
+
+    def test_csv_em_utf8_com_bom(self):
+        conteudo = '﻿nome_completo;email\nJosé Araújo;jose@exemplo.com\n'.encode('utf-8')
+        self.assertEqual(_importar(conteudo).criados, 1)
+        self.assertEqual(User.objects.get(email='jose@exemplo.com').perfil.nome_completo, 'José Araújo')
+
+    def test_codificacao_invalida_nao_grava_nada(self):
+        # 0x81 não existe em UTF-8 isolado nem em cp1252, e fica depois do primeiro lote
+        linhas = ''.join(f'Membro {i};m{i}@exemplo.com\n' for i in range(10)).encode()
+        conteudo = b'nome_completo;email\n' + linhas + b'Inv\x81lido;x@exemplo.com\n'
+        with self.assertRaises(importacao.ArquivoInvalido):
+            _importar(conteudo, tamanho_lote=2)
+        self.assertFalse(User.objects.exists())
+
+    def test_username_derivado_do_email_e_valido(self):
+        conteudo = "nome_completo;email\nSean O'Brien;o'brien@exemplo.com\nOutro;obrien@exemplo.com\n".encode()
+        resultado = _importar(conteudo)
+        self.assertEqual(resultado.criados, 2)
+        usernames = sorted(User.objects.values_list('username', flat=True))
+        self.assertEqual(usernames, ['obrien', 'obrien2'])
+        for username in usernames:
+            User.username_validator(username)
+
+
+class ResumoIMCTests(TestCase):
+
+    def setUp(self):
+        self.ana = User.objects.create_user('ana')
+        self.bia = User.objects.create_user('bia')
+
+    def test_trocar_dono_atualiza_os_dois_resumos(self):
+        IMCRegistro.objects.create(user=self.ana, peso=60, altura=1.6)
+        registro = IMCRegistro.objects.create(user=self.ana, peso=70, altura=1.6)
+        registro = IMCRegistro.objects.get(pk=registro.pk)
+        registro.user = self.bia
+        registro.save()
+
+        resumo_ana = ResumoIMC.objects.get(user=self.ana)
+        self.assertEqual(resumo_ana.total_registros, 1)
+        self.assertEqual(resumo_ana.peso_maior, 60)
+        resumo_bia = ResumoIMC.objects.get(user=self.bia)
+        self.assertEqual(resumo_bia.total_registros, 1)
+        self.assertEqual(resumo_bia.ultimo_registro_id, registro.pk)
+
+    def test_primeiro_registro_soma_o_historico_existente(self):
+        IMCRegistro.objects.create(user=self.ana, peso=60, altura=1.6)
+        IMCRegistro.objects.create(user=self.ana, peso=80, altura=1.6)
+        ResumoIMC.objects.filter(user=self.ana).delete()
+
+        registro = IMCRegistro.objects.create(user=self.ana, peso=70, altura=1.6)
+        resumo = ResumoIMC.objects.get(user=self.ana)
+        self.assertEqual(resumo.total_registros, 3)
+        self.assertEqual(resumo.soma_peso, 210)
+        self.assertEqual((resumo.peso_menor, resumo.peso_maior), (60, 80))
+        self.assertEqual(resumo.ultimo_registro_id, registro.pk)
+
+
+class MatriculasTests(TestCase):
+
+    def test_contador_independente_por_ano(self):
+        self.assertEqual(list(matriculas.reservar_numeros(2024, 3)), [1, 2, 3])
+        self.assertEqual(list(matriculas.reservar_numeros(2025)), [1])
+        self.assertEqual(list(matriculas.reservar_numeros(2024, 2)), [4, 5])
+
+    def test_contador_existente_nao_percorre_as_matriculas(self):
+        matriculas.reservar_numeros(2025)
+        with CaptureQueriesContext(connection) as consultas:
+            self.assertEqual(list(matriculas.reservar_numeros(2025, 10)), list(range(2, 12)))
+        # UPDATE do contador e leitura do último número (fora os savepoints)
+        sql = [c['sql'] for c in consultas.captured_queries if 'SAVEPOINT' not in c['sql']]
+        self.assertEqual([comando.split()[0] for comando in sql], ['UPDATE', 'SELECT'])
+
+    def test_gerar_lote_cria_matriculas_consecutivas(self):
+        matriculas.gerar_lote(2, ano=2025)
+        numeros = matriculas.gerar_lote(3, ano=2025)
+        self.assertEqual(list(numeros), [3, 4, 5])
+        self.assertEqual(
+            sorted(MatriculaDisponivel.objects.values_list('matricula', flat=True)),
+            [f'20251110{n:03d}' for n in range(1, 6)],
+        )
+        self.assertEqual(SequenciaMatricula.objects.get(ano=2025).ultimo, 5)
+
+    def test_contador_novo_continua_as_matriculas_existentes(self):
+        usuario = User.objects.create_user('antigo')
+        Perfil.objects.create(usuario=usuario, matricula='20251110042')
+        MatriculaDisponivel.objects.create(matricula='20251110007')
+        MatriculaDisponivel.objects.create(matricula='20241119999')
+
+        self.assertEqual(matriculas.maior_sequencia_existente(2025), 42)
+        self.assertEqual(matriculas.gerar_matricula(ano=2025).matricula, '20251110043')
+
+    def test_migracao_inicia_contador_com_a_maior_matricula_do_ano(self):
+        usuario = User.objects.create_user('antigo')
+        Perfil.objects.create(usuario=usuario, matricula='20241110120')
+        MatriculaDisponivel.objects.create(matricula='202411110003')
+        MatriculaDisponivel.objects.create(matricula='20251110009')
+        MatriculaDisponivel.objects.create(matricula='MANUAL-1')
+
+        migracao = import_module('usuarios.migrations.0010_sequenciamatricula')
+        migracao.popular_sequencias(apps, None)
+        self.assertEqual(
+            dict(SequenciaMatricula.objects.values_list('ano', 'ultimo')), {2024: 10003, 2025: 9},
+        )
+
+    def test_depois_de_9999_a_matricula_ganha_um_digito(self):
+        SequenciaMatricula.objects.create(ano=2025, ultimo=9998)
+        numeros = matriculas.gerar_lote(2, ano=2025)
+        self.assertEqual(
+            [matriculas.formatar_matricula(2025, numero) for numero in numeros],
+            ['20251119999', '202511110000'],
+        )
+        self.assertEqual(matriculas.maior_sequencia_existente(2025), 10000)
+
+
+class StaffPerfilUpdateTests(TestCase):
+
+    def test_nome_completo_nao_e_alterado(self):
+        staff = User.objects.create_user('admin', password='senha', is_staff=True)
+        membro = User.objects.create_user('membro')
+        perfil = Perfil.objects.create(usuario=membro, nome_completo='Maria Souza')
+        matricula = matriculas.gerar_matricula(ano=2025).matricula
+        self.client.force_login(staff)
 
-# Create your tests here.
+        resposta = self.client.post(
+            reverse('editar-perfil-staff', args=[perfil.pk]),
+            {'nome_completo': 'Outro Nome', 'matricula': matricula},
+        )
+        self.assertRedirects(resposta, reverse('listar-usersauth'), fetch_redirect_response=False)
+        perfil.refresh_from_db()
+        self.assertEqual((perfil.nome_completo, perfil.matricula), ('Maria Souza', matricula))
+        self.assertTrue(MatriculaDisponivel.objects.get(matricula=matricula).utilizada)
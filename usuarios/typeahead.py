@@ -0,0 +1,71 @@
+"""
+Busca de membros por prefixo para o typeahead do check-in.
+
+Cada tecla digitada vira uma consulta por prefixo em ``matricula`` (quando o
+termo é numérico) ou em ``nome_normalizado``, ambas atendidas por índices e
+limitadas a poucas linhas. As respostas dos prefixos mais usados ficam num
+cache LRU do processo, descartado quando um perfil muda neste processo e
+renovado a cada ``TTL_SEGUNDOS`` para refletir alterações de outros processos.
+"""
+import time
+from functools import lru_cache
+
+from django.db import connection
+
+from paginas.busca import normalizar
+from .models import Perfil
+
+# Quantidade máxima de resultados devolvidos
+LIMITE_RESULTADOS = 10
+# Quantidade de prefixos mantidos no cache LRU
+TAMANHO_CACHE = 2048
+# Tempo máximo (segundos) que um resultado fica no cache
+TTL_SEGUNDOS = 30
+
+# Maior caractere Unicode, usado como limite superior da busca por intervalo
+_FIM_PREFIXO = '\U0010ffff'
+
+
+def _filtro_prefixo(campo, prefixo):
+    """
+    Filtro "começa com" que aproveita o índice do campo. No PostgreSQL o LIKE
+    usa o índice varchar_pattern_ops; nos demais bancos o LIKE não diferencia
+    maiúsculas e ignora o índice, então usamos um intervalo equivalente
+    (os valores já estão normalizados).
+    """
+    if connection.vendor == 'postgresql':
+        return {f'{campo}__startswith': prefixo}
+    return {f'{campo}__gte': prefixo, f'{campo}__lt': prefixo + _FIM_PREFIXO}
+
+
+@lru_cache(maxsize=TAMANHO_CACHE)
+def _consultar(prefixo, limite, _janela):
+    campo = 'matricula' if prefixo.isdigit() else 'nome_normalizado'
+    perfis = (
+        Perfil.objects.filter(**_filtro_prefixo(campo, prefixo))
+        .order_by(campo, 'id')
+        .values('id', 'nome_completo', 'matricula', 'usuario__username')[:limite]
+    )
+    return tuple(
+        {
+            'id': perfil['id'],
+            'nome': perfil['nome_completo'] or perfil['usuario__username'],
+            'matricula': perfil['matricula'],
+            'usuario': perfil['usuario__username'],
+        }
+        for perfil in perfis
+    )
+
+
+def buscar_perfis(termo, limite=LIMITE_RESULTADOS):
+    """Até ``limite`` perfis cujo nome ou matrícula começam com ``termo``."""
+    prefixo = normalizar(termo)
+    if not prefixo:
+        return []
+    limite = max(1, min(int(limite), LIMITE_RESULTADOS))
+    return list(_consultar(prefixo, limite, int(time.monotonic() // TTL_SEGUNDOS)))
+
+
+def limpar_cache():
+    """Descarta os resultados em cache (chamado quando um perfil muda)."""
+    _consultar.cache_clear()
@@ -15,15 +15,19 @@ urlpatterns = [
     path('reset/done/', auth_views.PasswordResetCompleteView.as_view(), name='password_reset_complete'),
 
     path('criar-matricula/', views.gerar_matricula, name='criar-matricula'),
+    path('criar-matricula/lote/exportar/', views.exportar_lote_matriculas, name='exportar-lote-matriculas'),
+    path('importar-membros/', views.importar_membros, name='importar-membros'),
     path('signup/', UsuarioCreate.as_view(), name='signup'),
     path('atualizar-dados/', PerfilUpdate.as_view(), name='atualizar-dados'),
     path('editar-perfil-staff/<int:pk>/', StaffPerfilUpdate.as_view(), name='editar-perfil-staff'),
     path('listar/usersauth/', PerfilList.as_view(), name='listar-usersauth'),
     path('detalhes-usuario/<int:pk>/', PerfilDetailView.as_view(), name='detalhes-usuario'),
     path('mostrar-matricula/<int:user_id>/', views.mostrar_matricula, name='mostrar-matricula'),
+    path('api/perfis/typeahead/', views.typeahead_perfis, name='typeahead-perfis'),
 
     path('calcular-imc/', views.calcular_imc, name='calcular_imc'),
     path('progresso-imc/', views.progresso_imc, name='progresso_imc'),
+    path('exportar-imc/', views.exportar_imc, name='exportar_imc'),
     path('apagar-imc/<int:imc_id>/', views.apagar_imc, name='apagar_imc'),
     path('adicionar-problema/', views.adicionar_problema_medico, name='adicionar_problema'),
     path('excluir/<int:id>/', views.excluir_perfil, name='excluir_perfil'),
@@ -5,15 +5,22 @@ from django.contrib.auth.models import User, Group
 from .forms import UsuarioForm
 from django.urls import reverse_lazy
 from django.shortcuts import get_object_or_404
-from .models import Perfil, IMCRegistro, ProblemaMedico, MatriculaDisponivel
+from .models import Perfil, IMCRegistro, ResumoIMC, ProblemaMedico, MatriculaDisponivel
 from django.shortcuts import render, redirect
 from django.contrib.auth import logout
 from django.contrib.auth.mixins import LoginRequiredMixin
 from django.core.exceptions import PermissionDenied
-from .forms import ProblemaMedicoForm, IMCForm, StaffPerfilForm
+from .forms import ProblemaMedicoForm, IMCForm, StaffPerfilForm, LoteMatriculaForm, ImportarMembrosForm
+from . import importacao, matriculas, typeahead
+from django.conf import settings
 from django.contrib.auth.decorators import login_required
 from django.contrib import messages
-from datetime import datetime
+from datetime import datetime, time, timedelta
+from django.http import Http404, HttpResponseBadRequest, JsonResponse
+from django.utils.timezone import localtime, make_aware
+from paginas.paginacao import CursorPaginationMixin, CursorPaginator, CursorInvalido
+from paginas.exportacao import intervalo_datas, linhas_queryset, resposta_csv
+from paginas.busca import BuscaMixin, buscar
  
 
 class UsuarioCreate(CreateView):
@@ -49,11 +56,7 @@ class UsuarioCreate(CreateView):
         if email:
             perfil.email = email
         if matricula:
-            # Mark the matricula as used
-            MatriculaDisponivel.objects.filter(
-                matricula=matricula,
-                utilizada=False
-            ).update(utilizada=True)
+            # O sinal post_save de Perfil marca a matrícula como utilizada
             perfil.matricula = matricula
         perfil.save()
 
@@ -72,28 +75,29 @@ class UsuarioCreate(CreateView):
         return context
 
 
-class PerfilList(ListView):
+class PerfilList(BuscaMixin, CursorPaginationMixin, ListView):
     """
     Lista de perfis de usuários.
-    Otimizada com select_related para reduzir queries ao banco de dados.
+    Otimizada com select_related e paginação por cursor para reduzir o custo
+    das consultas ao banco de dados.
     """
     login_url = reverse_lazy('login')  
     model = Perfil
     template_name = 'cadastros/listas/userauth.html'
     paginate_by = 3
+    cursor_ordering = ('-id',)
+    busca_param = 'nome_completo'
 
     def get_queryset(self):
         # Se o usuário é staff, ele pode ver todos os perfis
         if self.request.user.is_staff:
-            queryset = Perfil.objects.select_related('usuario').all()
+            queryset = Perfil.objects.select_related('usuario', 'usuario__resumo_imc').all()
         else:
             # Usuário comum só pode ver o próprio perfil
-            queryset = Perfil.objects.select_related('usuario').filter(usuario=self.request.user)
+            queryset = Perfil.objects.select_related('usuario', 'usuario__resumo_imc').filter(usuario=self.request.user)
         
-        # Aplicar o filtro de nome_completo, se existir
-        txt_nome = self.request.GET.get('nome_completo')
-        if txt_nome:
-            queryset = queryset.filter(nome_completo__icontains=txt_nome)
+        # Busca por nome, usuário, matrícula ou email (ver paginas.busca)
+        queryset = self.filtrar_busca(queryset)
         
         return queryset.order_by('-id')
 
@@ -147,22 +151,11 @@ class StaffPerfilUpdate(LoginRequiredMixin, UpdateView):
         return perfil
     
     def form_valid(self, form):
-        """Marca a matrícula como utilizada se estiver sendo atribuída pela primeira vez."""
-        perfil = form.save(commit=False)
-        # Preserve the original nome_completo - it cannot be edited
-        original_nome_completo = self.object.nome_completo
-        perfil.nome_completo = original_nome_completo
-        
-        matricula = form.cleaned_data.get('matricula')
-        
-        # If matricula is being set for the first time, mark it as used
-        if matricula and (not self.object.matricula or self.object.matricula != matricula):
-            MatriculaDisponivel.objects.filter(
-                matricula=matricula,
-                utilizada=False
-            ).update(utilizada=True)
-        
-        perfil.save()
+        """
+        Salva o perfil. O nome completo é um campo desabilitado no formulário
+        e mantém o valor do banco; a matrícula atribuída é marcada como
+        utilizada pelo sinal post_save de Perfil.
+        """
         messages.success(self.request, 'Perfil atualizado com sucesso!')
         return super().form_valid(form)
 
@@ -173,7 +166,7 @@ class StaffPerfilUpdate(LoginRequiredMixin, UpdateView):
 
     def get_context_data(self, *args, **kwargs):
         context = super().get_context_data(*args, **kwargs)
-        perfil = self.get_object()
+        perfil = self.object
         context['titulo'] = f"Editar Perfil de {perfil.usuario.username}"
         context['botao'] = "Salvar Alterações"
         context['usuario'] = perfil.usuario
@@ -204,61 +197,75 @@ def calcular_imc(request):
     
     return render(request, 'calcular_imc.html', {'form': form})
 
+# Quantidade de registros por página no histórico de IMC
+REGISTROS_IMC_POR_PAGINA = 20
+# Quantidade de registros mais recentes exibidos no gráfico de evolução
+REGISTROS_IMC_GRAFICO = 10
+ORDENACAO_IMC = ('-data_registro', '-id')
+
+
 @login_required
 def progresso_imc(request):
     """
     Exibe o histórico de registros de IMC do usuário com estatísticas e análises.
-    Otimizada para reduzir queries ao banco de dados.
+    As estatísticas vêm do resumo de IMC do usuário e o histórico é paginado
+    por cursor, de modo que o custo da página não cresce com o histórico.
     """
-    registros = IMCRegistro.objects.filter(user=request.user).select_related('user').order_by('-data_registro')
-    
-    # Calcular estatísticas
-    estatisticas = {}
-    if registros.exists():
-        imc_values = [r.imc for r in registros]
-        peso_values = [r.peso for r in registros]
-        
-        estatisticas = {
-            'total_registros': registros.count(),
-            'imc_atual': imc_values[0] if imc_values else None,
-            'imc_medio': sum(imc_values) / len(imc_values) if imc_values else None,
-            'imc_maior': max(imc_values) if imc_values else None,
-            'imc_menor': min(imc_values) if imc_values else None,
-            'peso_atual': peso_values[0] if peso_values else None,
-            'peso_maior': max(peso_values) if peso_values else None,
-            'peso_menor': min(peso_values) if peso_values else None,
-            'variacao_peso': peso_values[0] - peso_values[-1] if len(peso_values) > 1 else 0,
-            'variacao_imc': imc_values[0] - imc_values[-1] if len(imc_values) > 1 else 0,
-            'primeiro_registro': registros.last(),
-            'ultimo_registro': registros.first(),
-        }
-        
-        # Calcular valores absolutos para exibição
-        estatisticas['variacao_imc_abs'] = abs(estatisticas['variacao_imc'])
-        estatisticas['variacao_peso_abs'] = abs(estatisticas['variacao_peso'])
-        
-        # Determinar tendência
-        if len(imc_values) >= 2:
-            if imc_values[0] > imc_values[-1]:
-                estatisticas['tendencia'] = 'diminuindo'
-                estatisticas['tendencia_icon'] = 'fa-arrow-down'
-                estatisticas['tendencia_color'] = 'success'
-            elif imc_values[0] < imc_values[-1]:
-                estatisticas['tendencia'] = 'aumentando'
-                estatisticas['tendencia_icon'] = 'fa-arrow-up'
-                estatisticas['tendencia_color'] = 'warning'
-            else:
-                estatisticas['tendencia'] = 'estável'
-                estatisticas['tendencia_icon'] = 'fa-minus'
-                estatisticas['tendencia_color'] = 'info'
-        else:
-            estatisticas['tendencia'] = None
-    
+    registros = IMCRegistro.objects.filter(user=request.user)
+    estatisticas = ResumoIMC.para_usuario(request.user).estatisticas()
+
+    paginator = CursorPaginator(registros, REGISTROS_IMC_POR_PAGINA, ORDENACAO_IMC)
+    try:
+        page_obj = paginator.page(request.GET.get('cursor'))
+    except CursorInvalido:
+        raise Http404('Cursor de paginação inválido.')
+
+    registros_grafico = registros.order_by(*ORDENACAO_IMC)[:REGISTROS_IMC_GRAFICO] if estatisticas else []
+
     return render(request, 'progresso_imc.html', {
-        'registros': registros,
-        'estatisticas': estatisticas
+        'registros': page_obj.object_list,
+        'registros_grafico': registros_grafico,
+        'page_obj': page_obj,
+        'paginator': paginator,
+        'is_paginated': page_obj.has_other_pages(),
+        # O total de registros já é exibido no topo da página
+        'mostrar_total': False,
+        'estatisticas': estatisticas,
     })
 
+@login_required
+def exportar_imc(request):
+    """
+    Exporta o histórico de IMC em CSV, transmitido em streaming. Staff exporta
+    o de todos os membros, filtrando pelo mesmo parâmetro da lista de usuários
+    (nome_completo); os demais, apenas o próprio. Aceita o período de/ate.
+    """
+    try:
+        de, ate = intervalo_datas(request)
+    except ValueError:
+        return HttpResponseBadRequest('Os parâmetros de e ate devem estar no formato AAAA-MM-DD.')
+
+    if request.user.is_staff:
+        registros = IMCRegistro.objects.all()
+        termo = request.GET.get('nome_completo', '').strip()
+        if termo:
+            registros = registros.filter(user__perfil__in=buscar(Perfil.objects.all(), termo))
+    else:
+        registros = IMCRegistro.objects.filter(user=request.user)
+    # Limites como datetimes, para que o índice em data_registro seja usado
+    if de:
+        registros = registros.filter(data_registro__gte=make_aware(datetime.combine(de, time.min)))
+    if ate:
+        registros = registros.filter(data_registro__lt=make_aware(datetime.combine(ate + timedelta(days=1), time.min)))
+
+    linhas = linhas_queryset(
+        registros.order_by('user_id', 'data_registro', 'id'),
+        ('user__username', 'user__perfil__nome_completo', 'data_registro', 'peso', 'altura', 'imc'),
+    )
+    return resposta_csv(
+        'historico_imc.csv', ['Usuário', 'Nome Completo', 'Data', 'Peso', 'Altura', 'IMC'], linhas, request,
+    )
+
 def apagar_imc(request, imc_id):
     """
     View para excluir um registro de IMC.
@@ -278,11 +285,18 @@ class PerfilDetailView(LoginRequiredMixin, DetailView):
     template_name = 'cadastros/detalhes_usuario.html'
     context_object_name = 'perfil'
 
+    # Quantidade de registros de IMC por página no histórico do perfil
+    registros_por_pagina = 10
+
+    def get_queryset(self):
+        # Perfil, usuário e resumo de IMC em uma única consulta
+        return Perfil.objects.select_related('usuario', 'usuario__resumo_imc')
+
     def get_object(self, queryset=None):
-        perfil = get_object_or_404(Perfil, pk=self.kwargs['pk'])
+        perfil = super().get_object(queryset)
         
         # Only staff can view other users' profiles, regular users can only view their own
-        if not self.request.user.is_staff and perfil.usuario != self.request.user:
+        if not self.request.user.is_staff and perfil.usuario_id != self.request.user.pk:
             raise PermissionDenied("Você não tem permissão para visualizar este perfil.")
         
         return perfil
@@ -291,32 +305,42 @@ class PerfilDetailView(LoginRequiredMixin, DetailView):
         """
         Adiciona dados de contexto para a visualização do perfil do usuário.
         Inclui histórico de IMC, estatísticas e problemas médicos.
-        Otimizada com select_related para reduzir queries ao banco de dados.
+        As estatísticas vêm do resumo de IMC e o histórico é paginado por
+        cursor, carregando apenas as colunas exibidas.
         """
         context = super().get_context_data(**kwargs)
-        perfil = self.get_object()
-
-        # Obter histórico de IMC para este usuário (otimizado)
-        imc_history = IMCRegistro.objects.filter(user=perfil.usuario).select_related('user').order_by('-data_registro')
-
-        # Calcular estatísticas de IMC
-        if imc_history:
-            total_registros = imc_history.count()
-            imc_sum = sum(registro.imc for registro in imc_history)
-            imc_medio = imc_sum / total_registros
-            ultimo_imc = imc_history[0].imc if imc_history else None
+        perfil = self.object
+
+        # Estatísticas de IMC lidas do resumo do usuário
+        try:
+            resumo = perfil.usuario.resumo_imc
+        except ResumoIMC.DoesNotExist:
+            resumo = ResumoIMC.recalcular(perfil.usuario_id)
+
+        if resumo.total_registros:
+            registros = IMCRegistro.objects.filter(user_id=perfil.usuario_id).only(
+                'id', 'data_registro', 'peso', 'altura', 'imc'
+            )
+            paginator = CursorPaginator(registros, self.registros_por_pagina, ORDENACAO_IMC)
+            try:
+                page_obj = paginator.page(self.request.GET.get('cursor'))
+            except CursorInvalido:
+                raise Http404('Cursor de paginação inválido.')
+            context.update({
+                'imc_history': page_obj.object_list,
+                'page_obj': page_obj,
+                'paginator': paginator,
+                'is_paginated': page_obj.has_other_pages(),
+                'mostrar_total': False,
+            })
         else:
-            total_registros = 0
-            imc_medio = None
-            ultimo_imc = None
+            context['imc_history'] = []
 
-        # Adicionar dados ao contexto (otimizado)
-        context['imc_history'] = imc_history
         context['titulo'] = f"Perfil de {perfil.nome_completo or perfil.usuario.username}"
-        context['total_registros'] = total_registros
-        context['imc_medio'] = imc_medio
-        context['ultimo_imc'] = ultimo_imc
-        context['meus_problemas'] = ProblemaMedico.objects.filter(usuario=perfil.usuario).select_related('usuario')
+        context['total_registros'] = resumo.total_registros
+        context['imc_medio'] = resumo.imc_medio
+        context['ultimo_imc'] = resumo.ultimo_imc
+        context['meus_problemas'] = ProblemaMedico.objects.filter(usuario_id=perfil.usuario_id).only('descricao')
 
         return context
 
@@ -360,75 +384,166 @@ def mostrar_matricula(request, user_id):
     return render(request, 'usuarios/mostrar_matricula.html', context)
 
 
+# Quantidade de matrículas disponíveis por página na tela de geração
+MATRICULAS_POR_PAGINA = 20
+
+
 def gerar_matricula(request):
-    """View for staff to generate a matrícula only (no user creation)"""
+    """
+    View for staff to generate a matrícula only (no user creation).
+    Gera uma matrícula por vez ou um lote de matrículas consecutivas.
+    """
     if not request.user.is_staff:
         raise PermissionDenied("Apenas administradores podem gerar matrículas.")
     
     current_year = datetime.now().year
-    year_prefix = f"{current_year}111"
-    
-    # Get all available (unused) matriculas
-    matriculas_disponiveis = MatriculaDisponivel.objects.filter(utilizada=False).order_by('-data_criacao')
+    context = {'ano': current_year, 'gerada': False}
+    lote_form = LoteMatriculaForm()
     
     if request.method == 'POST':
-        # Generate new matricula: year + "111" + sequential number (4 digits with leading zeros)
-        # Get all existing matriculas (both used and available)
-        existing_matriculas_perfil = Perfil.objects.filter(
-            matricula__startswith=year_prefix
-        ).exclude(matricula__isnull=True).values_list('matricula', flat=True)
-        
-        existing_matriculas_disponiveis = MatriculaDisponivel.objects.filter(
-            matricula__startswith=year_prefix
-        ).values_list('matricula', flat=True)
-        
-        # Combine all existing matriculas
-        all_existing = list(existing_matriculas_perfil) + list(existing_matriculas_disponiveis)
-        
-        if all_existing:
-            # Extract the sequential numbers and find the maximum
-            sequential_numbers = []
-            for mat in all_existing:
-                try:
-                    # Extract the last 4 digits (sequential number)
-                    seq_num = int(mat[-4:])
-                    sequential_numbers.append(seq_num)
-                except (ValueError, IndexError):
-                    continue
-            
-            if sequential_numbers:
-                next_sequential = max(sequential_numbers) + 1
-            else:
-                next_sequential = 1
+        if 'quantidade' in request.POST:
+            lote_form = LoteMatriculaForm(request.POST)
+            if lote_form.is_valid():
+                numeros = matriculas.gerar_lote(lote_form.cleaned_data['quantidade'], current_year)
+                context.update({
+                    'gerada': True,
+                    'lote': {
+                        'ano': current_year,
+                        'primeiro': numeros[0],
+                        'ultimo': numeros[-1],
+                        'quantidade': len(numeros),
+                        'primeira_matricula': matriculas.formatar_matricula(current_year, numeros[0]),
+                        'ultima_matricula': matriculas.formatar_matricula(current_year, numeros[-1]),
+                    },
+                })
         else:
-            # First matrícula for this year
-            next_sequential = 1
-        
-        # Format: year + "111" + sequential number (4 digits)
-        matricula = f"{year_prefix}{next_sequential:04d}"
-        
-        # Save the new matricula as available
-        MatriculaDisponivel.objects.create(matricula=matricula)
-        
-        # Refresh the list of available matriculas
-        matriculas_disponiveis = MatriculaDisponivel.objects.filter(utilizada=False).order_by('-data_criacao')
-        
-        context = {
-            'matricula': matricula,
-            'ano': current_year,
-            'gerada': True,
-            'matriculas_disponiveis': matriculas_disponiveis
-        }
-        
-        return render(request, 'usuarios/criar_matricula.html', context)
+            # Número sequencial reservado atomicamente no contador do ano
+            context.update({
+                'gerada': True,
+                'matricula': matriculas.gerar_matricula(current_year).matricula,
+            })
     
-    # GET request - show form to generate matrícula
-    context = {
-        'gerada': False,
-        'matriculas_disponiveis': matriculas_disponiveis
-    }
+    # Matrículas disponíveis (não utilizadas), paginadas por cursor
+    paginator = CursorPaginator(
+        MatriculaDisponivel.objects.filter(utilizada=False).only('id', 'matricula', 'data_criacao'),
+        MATRICULAS_POR_PAGINA,
+        ('-data_criacao', '-id'),
+    )
+    try:
+        page_obj = paginator.page(request.GET.get('cursor'))
+    except CursorInvalido:
+        raise Http404('Cursor de paginação inválido.')
+    
+    context.update({
+        'lote_form': lote_form,
+        'matriculas_disponiveis': page_obj.object_list,
+        'page_obj': page_obj,
+        'paginator': paginator,
+        'is_paginated': page_obj.has_other_pages(),
+        'mostrar_total': True,
+    })
     return render(request, 'usuarios/criar_matricula.html', context)
 
+
+def exportar_lote_matriculas(request):
+    """
+    Exporta um lote de matrículas (parâmetros ano, de e ate) em CSV,
+    transmitido em streaming, ou em uma página para impressão
+    (formato=impressao).
+    """
+    if not request.user.is_staff:
+        raise PermissionDenied("Apenas administradores podem exportar matrículas.")
+    
+    try:
+        ano = int(request.GET['ano'])
+        primeiro = int(request.GET['de'])
+        ultimo = int(request.GET['ate'])
+    except (KeyError, ValueError):
+        return HttpResponseBadRequest('Parâmetros ano, de e ate são obrigatórios e devem ser números.')
+    if primeiro < 1 or ultimo < primeiro or ultimo - primeiro + 1 > matriculas.LOTE_MAXIMO:
+        return HttpResponseBadRequest(f'Intervalo inválido (máximo de {matriculas.LOTE_MAXIMO} matrículas).')
+    
+    lote = matriculas.matriculas_do_lote(ano, primeiro, ultimo)
+    
+    if request.GET.get('formato') == 'impressao':
+        return render(request, 'usuarios/matriculas_impressao.html', {
+            'ano': ano,
+            'matriculas': lote,
+            'primeira_matricula': matriculas.formatar_matricula(ano, primeiro),
+            'ultima_matricula': matriculas.formatar_matricula(ano, ultimo),
+        })
+    
+    linhas = (
+        (
+            mat.matricula,
+            'Utilizada' if mat.utilizada else 'Disponível',
+            localtime(mat.data_criacao).strftime('%d/%m/%Y %H:%M'),
+        )
+        for mat in lote
+    )
+    return resposta_csv(
+        f'matriculas_{ano}_{primeiro}-{ultimo}.csv',
+        ['Matrícula', 'Situação', 'Data de Criação'],
+        linhas,
+        request,
+    )
+
+
+# Erros exibidos na página de importação; o comando importar_membros gera o relatório completo
+ERROS_IMPORTACAO_EXIBIDOS = 200
+
+
+def importar_membros(request):
+    """
+    Importação em massa de membros (staff) a partir de uma planilha CSV ou
+    XLSX. Mostra o total importado e os erros por linha.
+    """
+    if not request.user.is_staff:
+        raise PermissionDenied("Apenas administradores podem importar membros.")
+
+    form = ImportarMembrosForm()
+    resultado = None
+    validar_apenas = False
+    if request.method == 'POST':
+        form = ImportarMembrosForm(request.POST, request.FILES)
+        if form.is_valid():
+            arquivo = form.cleaned_data['arquivo']
+            validar_apenas = form.cleaned_data['validar_apenas']
+            importador = importacao.Importador(
+                processos=settings.IMPORTACAO_PROCESSOS, validar_apenas=validar_apenas,
+            )
+            try:
+                resultado = importador.importar(importacao.ler_linhas(arquivo.file, arquivo.name))
+            except importacao.ArquivoInvalido as erro:
+                form.add_error('arquivo', str(erro))
+            else:
+                if resultado.criados:
+                    messages.success(request, f'{resultado.criados} membro(s) importado(s).')
+                elif validar_apenas and not resultado.erros:
+                    messages.success(request, 'Nenhum erro encontrado: o arquivo pode ser importado.')
+
+    context = {'form': form, 'resultado': resultado, 'validar_apenas': validar_apenas}
+    if resultado is not None:
+        context['erros'] = resultado.erros[:ERROS_IMPORTACAO_EXIBIDOS]
+    return render(request, 'usuarios/importar_membros.html', context)
+
+@login_required
+def typeahead_perfis(request):
+    """
+    Busca de membros enquanto se digita (check-in da recepção).
+    Parâmetros: q (início do nome ou da matrícula) e limite (opcional).
+    """
+    if not request.user.is_staff:
+        raise PermissionDenied("Apenas administradores podem buscar membros.")
+    
+    try:
+        limite = int(request.GET.get('limite', typeahead.LIMITE_RESULTADOS))
+    except ValueError:
+        return JsonResponse({'erro': 'Parâmetro limite inválido.'}, status=400)
+    
+    resultados = typeahead.buscar_perfis(request.GET.get('q', ''), limite)
+    return JsonResponse({'resultados': resultados})
+
 def excluir_perfil(request, id):
     """
     View para excluir um perfil de usuário.